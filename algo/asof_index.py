@@ -0,0 +1,67 @@
+"""
+AS-OF INDEX — "Latest bar at or before date" lookups
+====================================================
+The backtest constantly asks for the latest bar at or before the current
+date. Building `df.index <= date` masks for that is O(history) per ticker
+per call. These helpers answer it with a binary search (O(log n)) or, for
+dates on a known trading calendar, a precomputed date -> position table
+per ticker (O(1)).
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+
+def asof_position(index: pd.DatetimeIndex, date) -> int:
+    """Position of the latest index entry at or before date (-1 if none)."""
+    return int(index.searchsorted(date, side="right")) - 1
+
+
+def asof_row(df: pd.DataFrame, date) -> Optional[pd.Series]:
+    """Latest row at or before date, or None if the frame starts after date."""
+    pos = asof_position(df.index, date)
+    if pos < 0:
+        return None
+    return df.iloc[pos]
+
+
+class AsOfResolver:
+    """
+    Precomputed date -> position tables for a set of frames on a trading
+    calendar. position(ticker, date) is a single array read for calendar
+    dates and falls back to a binary search for anything else.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], calendar: pd.DatetimeIndex):
+        self.frames = frames
+        self.calendar = pd.DatetimeIndex(calendar)
+        self._col: Dict[pd.Timestamp, int] = {d: j for j, d in enumerate(self.calendar)}
+        self._tables: Dict[str, np.ndarray] = {}
+
+    def table(self, ticker: str) -> np.ndarray:
+        """int32[len(calendar)]: as-of position into the ticker's own frame."""
+        tbl = self._tables.get(ticker)
+        if tbl is None:
+            idx = self.frames[ticker].index.values
+            tbl = (np.searchsorted(idx, self.calendar.values, side="right") - 1).astype(np.int32)
+            self._tables[ticker] = tbl
+        return tbl
+
+    def position(self, ticker: str, date) -> int:
+        """As-of position of date in the ticker's frame (-1 if before its first bar)."""
+        j = self._col.get(date)
+        if j is not None:
+            return int(self.table(ticker)[j])
+        return asof_position(self.frames[ticker].index, date)
+
+    def positions(self, tickers: Iterable[str], date) -> Dict[str, int]:
+        """{ticker: as-of position} for tickers with a bar at or before date."""
+        out = {}
+        for ticker in tickers:
+            if ticker not in self.frames:
+                continue
+            pos = self.position(ticker, date)
+            if pos >= 0:
+                out[ticker] = pos
+        return out
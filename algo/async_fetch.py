@@ -0,0 +1,131 @@
+"""
+ASYNC FETCH — Concurrent, rate-limited per-ticker downloads
+===========================================================
+Replaces "one batch at a time + fixed sleep" with an asyncio pipeline:
+
+  - at most `max_in_flight` requests running at once (semaphore)
+  - a token bucket caps the request rate (`rate` per second, bursts of
+    `burst`) instead of sleeping between batches
+  - retries are per ticker, with exponential backoff; one bad symbol no
+    longer stalls or re-downloads its whole batch
+  - `on_result(ticker, result)` is called as each download completes, in
+    the event-loop thread (so cache writes are never concurrent)
+
+fetch_fn(ticker) is a plain blocking function (yfinance is synchronous)
+that runs in worker threads and returns a DataFrame or a list of records;
+an empty result means "no data". Pass any stand-in for tests.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # FIFO: waiters are served in arrival order
+            self._refill()
+            if self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1.0
+
+
+async def fetch_all(
+    tickers: Iterable[str],
+    fetch_fn: Callable[[str], Any],
+    max_in_flight: int = 8,
+    rate: float = 4.0,
+    burst: int = 8,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    on_result: Optional[Callable[[str, Any], None]] = None,
+    verbose: bool = True,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Download every ticker concurrently. Returns ({ticker: result} for
+    non-empty results, failed tickers). An empty result is a valid answer
+    (no data): it is passed to on_result but not retried. An exception is
+    retried up to max_retries times with delays of backoff, 2*backoff, ...
+    """
+    tickers = list(dict.fromkeys(tickers))
+    bucket = TokenBucket(rate, burst)
+    gate = asyncio.Semaphore(max(1, max_in_flight))
+    results: Dict[str, Any] = {}
+    failed: List[str] = []
+    progress = {"done": 0, "next_report": time.monotonic() + 10.0}
+
+    async def one(ticker: str):
+        for attempt in range(max_retries + 1):
+            try:
+                async with gate:
+                    await bucket.acquire()
+                    res = await asyncio.to_thread(fetch_fn, ticker)
+            except Exception as e:
+                if attempt < max_retries:
+                    await asyncio.sleep(backoff * (2 ** attempt))
+                    continue
+                if verbose:
+                    print(f"  [WARN] Failed to fetch {ticker} after {max_retries + 1} attempts: {e}")
+                failed.append(ticker)
+                break
+            if res is not None and len(res):
+                results[ticker] = res
+            if on_result is not None:
+                on_result(ticker, res)
+            break
+
+        progress["done"] += 1
+        if verbose and time.monotonic() >= progress["next_report"]:
+            progress["next_report"] = time.monotonic() + 10.0
+            print(f"  Downloaded {progress['done']}/{len(tickers)} tickers...")
+
+    await asyncio.gather(*(one(t) for t in tickers))
+    return results, failed
+
+
+def fetch_all_sync(tickers: Iterable[str], fetch_fn: Callable[[str], Any],
+                   **kwargs) -> Tuple[Dict[str, Any], List[str]]:
+    """fetch_all from synchronous code (runs its own event loop; safe inside a running loop)."""
+    coro = fetch_all(tickers, fetch_fn, **kwargs)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Called from inside an event loop (e.g. a notebook): run on a helper thread
+    box = {}
+
+    def runner():
+        try:
+            box["result"] = asyncio.run(coro)
+        except BaseException as e:  # re-raised in the caller
+            box["error"] = e
+
+    t = threading.Thread(target=runner)
+    t.start()
+    t.join()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
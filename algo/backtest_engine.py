@@ -21,20 +21,27 @@ from algo.config import (
     BACKTEST_START, BACKTEST_END, BENCHMARK_TICKER,
     FULL_UNIVERSE, SECTOR_ETF_UNIVERSE, CHINA_ADR_UNIVERSE,
 )
-from algo.config import MACRO_ENGINE
-from algo.universe_builder import daily_scan_prefilter
+from algo.config import MACRO_ENGINE, CME, EXECUTION
+from algo.universe_builder import ScanPrefilter
 from algo.indicators import (
     sma, ema, market_regime, kitchin_cycle_position,
     kitchin_sine_wave, composite_technical_score,
-    is_cme_t35_window, sector_strength,
+    cme_t35_series, CME_MAX_SCORE_MULT, sector_strength,
 )
-from algo.scanner import run_full_scan, ScanResult
+from algo.scanner import (
+    run_full_scan, ScanResult, build_signal_table, lookup_signals, apply_cme_overlay,
+)
+from algo.indicator_panel import build_indicator_panels
+from algo.universe_panel import UniversePanel
+from algo.universe_snapshot import UniverseSnapshot
+from algo.kitchin_calendar import KitchinCalendar
+from algo.asof_index import AsOfResolver, asof_position
 from algo.position_manager import PositionManager, TradeRecord
+from algo.execution import OrderQueue
 from algo.macro_engine import (
-    fetch_macro_data, macro_regime_score, macro_sizing_multiplier,
-    kitchin_rotation_signal, describe_macro_regime,
+    fetch_macro_data, macro_regime_series, describe_macro_regime,
 )
-from algo.earnings_engine import bulk_fetch_earnings
+from algo.earnings_engine import bulk_fetch_earnings, build_earnings_index
 
 
 class BacktestEngine:
@@ -60,11 +67,28 @@ class BacktestEngine:
         end_date: str = BACKTEST_END,
         verbose: bool = True,
         sector_etf_data: Optional[Dict[str, pd.DataFrame]] = None,
+        precompute_signals: bool = False,
+        universe_panel: Optional[UniversePanel] = None,
+        indicator_panels: Optional[Dict[str, pd.DataFrame]] = None,
+        macro_data: Optional[dict] = None,
+        earnings_data: Optional[Dict[str, list]] = None,
+        position_manager: Optional[PositionManager] = None,
+        close_at_end: bool = True,
     ):
+        """
+        universe_panel / indicator_panels / macro_data / earnings_data: already
+        loaded inputs to reuse (e.g. across sweep runs); built or fetched here
+        when None.
+        position_manager: warm-start portfolio (cash, open positions, trade
+        history) carried over from an earlier run; initial_capital is ignored.
+        close_at_end: liquidate open positions on the last day (off when the
+        portfolio continues into a later run).
+        """
         self.universe_data = universe_data
         self.spy_data = spy_data
         self.sector_etf_data = sector_etf_data or {}
-        self.pm = PositionManager(initial_capital)
+        self.pm = position_manager if position_manager is not None else PositionManager(initial_capital)
+        self.close_at_end = close_at_end
         self.scan_frequency = scan_frequency
         self.start_date = pd.Timestamp(start_date)
         self.end_date = pd.Timestamp(end_date)
@@ -79,53 +103,118 @@ class BacktestEngine:
         # Pre-compute regime
         self.regime = market_regime(spy_data)
 
-        # Pre-compute Kitchin cycle for all dates (US cycle)
-        self.kitchin_positions = {}
-        for d in self.trading_days:
-            self.kitchin_positions[d] = kitchin_cycle_position(
-                d.date(), KITCHIN.c3_trough, KITCHIN.period_months
-            )
+        # Pre-compute Kitchin cycles for all dates: US cycle, China/EM cycle
+        # (leads US by 12-18 months) and the US/China rotation multiplier
+        self.kitchin = KitchinCalendar(self.trading_days)
 
-        # Pre-compute China/EM Kitchin cycle (leads US by 12-18 months)
-        self.china_kitchin_positions = {}
-        for d in self.trading_days:
-            self.china_kitchin_positions[d] = kitchin_cycle_position(
-                d.date(), KITCHIN.china_trough, KITCHIN.china_period_months
-            )
+        # CME T+35 window flag and score multiplier for all dates
+        self.cme = cme_t35_series(self.trading_days)
 
         # China ADR set for quick lookup
         self.china_adrs = set(CHINA_ADR_UNIVERSE)
 
+        # Cross-sectional OHLCV arrays on the SPY calendar (ticker × date).
+        # Daily price lookups and the pre-filter run as column slices on this.
+        if universe_panel is None:
+            universe_panel = UniversePanel.from_frames(universe_data, spy_data.index)
+        self.universe = universe_panel
+
+        # Entry orders for pending setups, filled against the panel's bars
+        self.orders = OrderQueue()
+
+        # Daily pre-filter for every date at once (ticker × date candidate mask);
+        # only used for universes big enough to need it
+        self.prefilter: Optional[ScanPrefilter] = None
+        if len(universe_data) > 200:
+            self.prefilter = ScanPrefilter(
+                self.universe,
+                min_adr_pct=UNIVERSE.pre_filter_min_adr,
+                above_sma=UNIVERSE.pre_filter_above_sma,
+            )
+
+        # Date -> bar position tables (O(1) "latest bar at or before date")
+        self.asof = AsOfResolver(universe_data, self.trading_days)
+        self.sector_asof = AsOfResolver(self.sector_etf_data, self.trading_days)
+
+        # Pre-compute scanner indicators once per ticker (full history).
+        # All indicators are causal, so row i of the panel equals what the
+        # scanners would compute on data truncated at bar i.
+        if indicator_panels is None:
+            if verbose:
+                print(f"  Pre-computing indicator panels for {len(universe_data)} tickers...")
+            indicator_panels = build_indicator_panels(universe_data, spy_data["close"])
+        self.indicator_panels = indicator_panels
+
         # === MACRO ENGINE: Fetch forward-looking indicators ===
-        self.macro_data = {}
-        if MACRO_ENGINE.enabled:
+        self.macro_data = macro_data if macro_data is not None else {}
+        if macro_data is None and MACRO_ENGINE.enabled:
             try:
                 print("  Loading macro indicators (8 Yahoo Finance tickers)...")
                 self.macro_data = fetch_macro_data(start_date, end_date)
             except Exception as e:
                 print(f"  [WARN] Macro data fetch failed: {e}")
 
+        # Macro regime for every trading day in one vectorized pass
+        # (signals, composite score, sizing multiplier); the run loop only indexes it.
+        self.macro_regime: Optional[pd.DataFrame] = None
+        if self.macro_data and MACRO_ENGINE.enabled:
+            try:
+                self.macro_regime = macro_regime_series(
+                    self.macro_data, self.trading_days,
+                    max_boost=MACRO_ENGINE.max_boost,
+                    max_penalty=MACRO_ENGINE.max_penalty,
+                )
+            except Exception as e:
+                print(f"  [WARN] Macro regime computation failed: {e}")
+
         # === EARNINGS ENGINE: Pre-fetch earnings data ===
-        self.earnings_data = {}
-        if MACRO_ENGINE.earnings_enabled:
+        self.earnings_data = earnings_data if earnings_data is not None else {}
+        if earnings_data is None and MACRO_ENGINE.earnings_enabled:
             try:
                 tickers_list = list(universe_data.keys())
-                # Only fetch earnings for manageable universe sizes
-                if len(tickers_list) <= 500:
-                    print(f"  Loading earnings data for {len(tickers_list)} tickers...")
-                    self.earnings_data = bulk_fetch_earnings(
-                        tickers_list,
-                        delay=MACRO_ENGINE.earnings_fetch_delay,
-                    )
-                else:
-                    print(f"  Skipping earnings fetch ({len(tickers_list)} tickers > 500 limit)")
+                print(f"  Loading earnings data for {len(tickers_list)} tickers...")
+                self.earnings_data = bulk_fetch_earnings(tickers_list)
             except Exception as e:
                 print(f"  [WARN] Earnings data fetch failed: {e}")
+        # Parse every ticker's earnings calendar once (binary-search lookups in scan_ep)
+        self.earnings_data = build_earnings_index(self.earnings_data)
+
+        # === SIGNAL TABLE: every scanner signal over the full history ===
+        # With this on, the daily scan is a table lookup instead of re-running
+        # the scanners on every trading day.
+        self.signal_table = None
+        if precompute_signals:
+            if verbose:
+                print(f"  Pre-computing scanner signals for {len(universe_data)} tickers...")
+            # With the CME overlay on, keep the signals a post-flush boost can lift over 20
+            self.signal_table = build_signal_table(
+                universe_data, spy_data,
+                min_score=20.0 / CME_MAX_SCORE_MULT if CME.score_overlay else 20.0,
+                earnings_data=self.earnings_data if self.earnings_data else None,
+                indicator_panels=self.indicator_panels,
+            )
 
         # Tracking
         self.scan_results_log: List[Tuple[pd.Timestamp, List[ScanResult]]] = []
         self.daily_log: List[dict] = []
 
+    @classmethod
+    def from_snapshot(cls, snapshot, **kwargs) -> "BacktestEngine":
+        """
+        Engine over a universe snapshot (path or UniverseSnapshot). The
+        universe panel is the snapshot's memory map, not a rebuilt copy.
+        """
+        if not isinstance(snapshot, UniverseSnapshot):
+            snapshot = UniverseSnapshot(snapshot)
+        kwargs.setdefault("sector_etf_data", snapshot.sector_etf_data)
+        kwargs.setdefault("universe_panel", snapshot.panel("universe"))
+        return cls(snapshot.universe_data, snapshot.spy_data, **kwargs)
+
+    def _queue_entries(self, pending_entries: Dict[str, ScanResult], order_type: str):
+        """Queue one entry order per pending setup, highest score first."""
+        for result in sorted(pending_entries.values(), key=lambda x: x.score, reverse=True):
+            self.orders.submit(result.ticker, order_type, price=result.entry_price, tag=result)
+
     def run(self) -> dict:
         """Execute the full backtest. Returns performance summary."""
         if self.verbose:
@@ -146,34 +235,28 @@ class BacktestEngine:
 
             # === 1. REGIME CHECK ===
             regime_val = 0
-            if current_date in self.regime.index:
-                regime_val = self.regime.loc[current_date]
-            elif len(self.regime) > 0:
-                mask = self.regime.index <= current_date
-                if mask.any():
-                    regime_val = self.regime.loc[self.regime.index[mask][-1]]
+            regime_pos = asof_position(self.regime.index, current_date)
+            if regime_pos >= 0:
+                regime_val = self.regime.iloc[regime_pos]
 
             is_bullish_regime = regime_val >= 1
 
             # Kitchin cycle position (US default — China override per-ticker at entry)
-            cycle_pos = self.kitchin_positions.get(current_date, 0.5)
-            china_cycle_pos = self.china_kitchin_positions.get(current_date, 0.5)
-            cycle_phase = KITCHIN.get_phase_label(cycle_pos)
-            cycle_score = KITCHIN.get_cycle_score(cycle_pos)
+            cycle_pos = float(self.kitchin.position[i])
+            china_cycle_pos = float(self.kitchin.china_position[i])
+            cycle_phase = self.kitchin.phase(i)
+            cycle_score = float(self.kitchin.score[i])
+
+            # CME T+35 score overlay (research only; 1.0 when CME.score_overlay is off)
+            cme_mult = float(self.cme["score_mult"].values[i]) if CME.score_overlay else 1.0
 
             # === MACRO REGIME SIZING ===
             macro_mult = 1.0
             china_rotation_mult = 1.0
-            if self.macro_data and MACRO_ENGINE.enabled:
+            if self.macro_regime is not None and MACRO_ENGINE.enabled:
                 try:
-                    m_score = macro_regime_score(self.macro_data, current_date)
-                    macro_mult = macro_sizing_multiplier(
-                        m_score,
-                        max_boost=MACRO_ENGINE.max_boost,
-                        max_penalty=MACRO_ENGINE.max_penalty,
-                    )
-                    rot_mult, _ = kitchin_rotation_signal(current_date)
-                    china_rotation_mult = rot_mult
+                    macro_mult = float(self.macro_regime["multiplier"].values[i])
+                    china_rotation_mult = float(self.kitchin.rotation_mult[i])
                 except Exception:
                     pass
 
@@ -181,7 +264,7 @@ class BacktestEngine:
             self.pm._current_regime = regime_val
 
             # === 2. UPDATE EXISTING POSITIONS ===
-            closed_trades = self.pm.update_positions(self.universe_data, current_date)
+            closed_trades = self.pm.update_positions(self.universe, current_date)
             for trade in closed_trades:
                 self.pm.trade_history.append(trade)
 
@@ -194,13 +277,12 @@ class BacktestEngine:
                     self.pm.positions.items(),
                     key=lambda x: x[1].r_multiple,
                 )
+                held_bars = self.universe.asof_bars(self.pm.positions.keys(), current_date)
                 while self.pm.num_positions > max_pos_now and sorted_positions:
                     weak_ticker, weak_pos = sorted_positions.pop(0)
                     if weak_ticker in self.universe_data:
-                        df = self.universe_data[weak_ticker]
-                        mask = df.index <= current_date
-                        if mask.any():
-                            price = df.loc[df.index[mask][-1], "close"]
+                        if weak_ticker in held_bars:
+                            price = held_bars[weak_ticker]["close"]
                             fill_price = price * (1 - 0.001)
                             commission = fill_price * weak_pos.shares * 0.001
                             proceeds = fill_price * weak_pos.shares - commission
@@ -235,51 +317,53 @@ class BacktestEngine:
                        cycle_phase in ["TROUGH_ACCUMULATE", "EARLY_EXPANSION", "LATE_CONTRACTION"])
 
             if can_scan and (do_full_scan or do_ep_scan):
-                # PRE-FILTER: Fast vectorized check before full scan
+                # PRE-FILTER: precomputed candidate mask, one column per day
                 # Narrows 3000 tickers → 200-500 candidates per day
-                if len(self.universe_data) > 200:
-                    prefiltered = daily_scan_prefilter(
-                        self.universe_data, current_date,
-                        min_adr_pct=UNIVERSE.pre_filter_min_adr,
-                        above_sma=UNIVERSE.pre_filter_above_sma,
-                    )
+                if self.prefilter is not None:
+                    prefiltered = self.prefilter.candidates(current_date)
                     scan_source = {t: self.universe_data[t] for t in prefiltered
                                    if t in self.universe_data}
                 else:
                     scan_source = self.universe_data
 
-                # Build subset of data up to current date
-                scan_data = {}
-                for ticker, df in scan_source.items():
-                    mask = df.index <= current_date
-                    if mask.any():
-                        subset = df.loc[mask]
-                        if len(subset) >= 100:
-                            scan_data[ticker] = subset
+                # As-of bar positions into the full-history frames (no copies).
+                # Scanners never read past these positions.
+                scan_positions = {
+                    t: p for t, p in self.asof.positions(scan_source, current_date).items()
+                    if p + 1 >= 100
+                }
+                scan_data = {t: scan_source[t] for t in scan_positions}
 
-                spy_subset = self.spy_data[self.spy_data.index <= current_date]
+                spy_pos = asof_position(self.spy_data.index, current_date)
+                spy_subset = self.spy_data.iloc[:spy_pos + 1]  # view, not a copy
 
                 # Compute sector relative strength for this date
                 sector_rs = {}
                 if hasattr(self, 'sector_etf_data') and self.sector_etf_data:
-                    sector_scan = {}
-                    for etf, edf in self.sector_etf_data.items():
-                        mask = edf.index <= current_date
-                        if mask.any():
-                            subset = edf.loc[mask]
-                            if len(subset) >= 63:
-                                sector_scan[etf] = subset
+                    sector_positions = {
+                        e: p for e, p in self.sector_asof.positions(self.sector_etf_data, current_date).items()
+                        if p + 1 >= 63
+                    }
                     spy_close_sub = spy_subset["close"] if not spy_subset.empty else pd.Series()
-                    if sector_scan and len(spy_close_sub) >= 63:
-                        sector_rs = sector_strength(sector_scan, spy_close_sub, 63)
+                    if sector_positions and len(spy_close_sub) >= 63:
+                        sector_rs = sector_strength(self.sector_etf_data, spy_close_sub, 63,
+                                                    as_of_positions=sector_positions)
 
                 if do_full_scan:
-                    last_scan_results = run_full_scan(
-                        scan_data, spy_subset, as_of_idx=-1, min_score=20.0,
-                        sector_rs=sector_rs, current_date=current_date,
-                        cycle_phase=cycle_phase,
-                        earnings_data=self.earnings_data if self.earnings_data else None,
-                    )
+                    if self.signal_table is not None:
+                        last_scan_results = lookup_signals(self.signal_table, scan_data, scan_positions)
+                        if CME.score_overlay:
+                            last_scan_results = apply_cme_overlay(last_scan_results, cme_mult, 20.0)
+                    else:
+                        last_scan_results = run_full_scan(
+                            scan_data, spy_subset, min_score=20.0,
+                            sector_rs=sector_rs, current_date=current_date,
+                            cycle_phase=cycle_phase,
+                            earnings_data=self.earnings_data if self.earnings_data else None,
+                            indicator_panels=self.indicator_panels,
+                            as_of_positions=scan_positions,
+                            cme_score_mult=cme_mult,
+                        )
                     # Refresh pending entries — keep highest score per ticker
                     pending_entries = {}
                     for r in last_scan_results:
@@ -289,13 +373,22 @@ class BacktestEngine:
                 else:
                     # Daily EP-only scan
                     from algo.scanner import scan_ep
-                    for ticker, df_sub in scan_data.items():
+                    for ticker, df_full in scan_data.items():
                         if ticker in self.pm.positions or ticker in pending_entries:
                             continue
                         try:
-                            ticker_earnings = self.earnings_data.get(ticker) if self.earnings_data else None
-                            ep = scan_ep(df_sub, ticker, spy_subset["close"] if not spy_subset.empty else pd.Series(), -1,
-                                         earnings_data=ticker_earnings)
+                            if self.signal_table is not None:
+                                hits = lookup_signals(self.signal_table, scan_data,
+                                                      {ticker: scan_positions[ticker]}, ("EP",))
+                                ep = hits[0] if hits else None
+                            else:
+                                ticker_earnings = self.earnings_data.get(ticker) if self.earnings_data else None
+                                ep = scan_ep(df_full, ticker, spy_subset["close"] if not spy_subset.empty else pd.Series(),
+                                             scan_positions[ticker],
+                                             earnings_data=ticker_earnings,
+                                             panel=self.indicator_panels.get(ticker))
+                            if ep and cme_mult != 1.0:
+                                ep = next(iter(apply_cme_overlay([ep], cme_mult, 20.0)), None)
                             if ep and ep.score >= 20.0:
                                 pending_entries[ticker] = ep
                         except Exception:
@@ -304,68 +397,76 @@ class BacktestEngine:
                 self.scan_results_log.append((current_date, list(pending_entries.values())))
 
             # === 5. EXECUTE ENTRIES ===
-            if self.pm.can_open_position() and pending_entries:
-                # Sort candidates by score
-                candidates = sorted(
-                    pending_entries.values(),
-                    key=lambda x: x.score,
-                    reverse=True,
+            # Entry orders fill in one pass over the queue (algo.execution).
+            # "CLOSE": queue the ranked setups and fill them on today's close.
+            # Otherwise: fill the orders queued yesterday against today's bar,
+            # then queue the still-pending setups for tomorrow.
+            next_bar = EXECUTION.entry_order != "CLOSE"
+            if not next_bar:
+                self.orders.clear()
+                if self.pm.can_open_position() and pending_entries:
+                    self._queue_entries(pending_entries, "CLOSE")
+            fills = self.orders.process_panel(self.universe, current_date)
+            entry_fills: Dict[str, float] = {}
+
+            for fill in fills:
+                result = fill.tag
+                ticker = fill.ticker
+                if not self.pm.can_open_position(ticker):
+                    if self.pm.num_positions >= self.pm.get_max_positions():
+                        break  # At max positions, stop entirely
+                    continue  # Sector limit hit, try next ticker
+
+                if ticker in self.pm.positions:
+                    continue
+
+                if ticker not in self.universe_data:
+                    continue
+
+                # CME T+35 window: no hard block — with CME.score_overlay on it is
+                # penalized via the score multiplier, and ranking handles it
+
+                # Use China Kitchin cycle for China ADRs, US cycle for others
+                is_china_adr = ticker in self.china_adrs
+                ticker_cycle = china_cycle_pos if is_china_adr else cycle_pos
+
+                # Macro multiplier: apply China rotation for China ADRs
+                ticker_macro_mult = macro_mult
+                if is_china_adr:
+                    ticker_macro_mult *= china_rotation_mult
+
+                # Open position
+                pos = self.pm.open_position(
+                    ticker=ticker,
+                    entry_date=current_date,
+                    entry_price=fill.price,
+                    stop_price=result.stop_price,
+                    setup_type=result.setup_type,
+                    score=result.score,
+                    cycle_position=ticker_cycle,
+                    macro_multiplier=ticker_macro_mult,
                 )
 
-                for result in candidates:
-                    ticker = result.ticker
-                    if not self.pm.can_open_position(ticker):
-                        if self.pm.num_positions >= self.pm.get_max_positions():
-                            break  # At max positions, stop entirely
-                        continue  # Sector limit hit, try next ticker
-
-                    if ticker in self.pm.positions:
-                        continue
-
-                    if ticker not in self.universe_data:
-                        continue
-
-                    df = self.universe_data[ticker]
-                    mask = df.index <= current_date
-                    if not mask.any():
-                        continue
-
-                    current_row = df.loc[df.index[mask][-1]]
-                    current_close = current_row["close"]
-
-                    # CME T+35 window: already penalized via score multiplier in scanner
-                    # No hard block — let score-based ranking handle it
-
-                    # Entry fill price
-                    entry_fill = current_close
-
-                    # Use China Kitchin cycle for China ADRs, US cycle for others
-                    is_china_adr = ticker in self.china_adrs
-                    ticker_cycle = china_cycle_pos if is_china_adr else cycle_pos
-
-                    # Macro multiplier: apply China rotation for China ADRs
-                    ticker_macro_mult = macro_mult
-                    if is_china_adr:
-                        ticker_macro_mult *= china_rotation_mult
-
-                    # Open position
-                    pos = self.pm.open_position(
-                        ticker=ticker,
-                        entry_date=current_date,
-                        entry_price=entry_fill,
-                        stop_price=result.stop_price,
-                        setup_type=result.setup_type,
-                        score=result.score,
-                        cycle_position=ticker_cycle,
-                        macro_multiplier=ticker_macro_mult,
-                    )
-
-                    if pos and self.verbose and day_count % 20 == 0:
-                        pass  # Reduce noise
-
-                    # Remove from pending
-                    if ticker in pending_entries:
-                        del pending_entries[ticker]
+                if pos:
+                    entry_fills[ticker] = fill.price
+
+                if pos and self.verbose and day_count % 20 == 0:
+                    pass  # Reduce noise
+
+                # Remove from pending
+                if ticker in pending_entries:
+                    del pending_entries[ticker]
+
+            if next_bar:
+                # Entries filled inside today's bar can be stopped out on it too
+                # (update_positions already ran for today)
+                for trade in self.pm.stop_new_entries(entry_fills, self.universe, current_date):
+                    self.pm.trade_history.append(trade)
+                self.orders.clear()
+                self._queue_entries(
+                    {t: r for t, r in pending_entries.items() if t not in self.pm.positions},
+                    EXECUTION.entry_order,
+                )
 
             # === 6. DAILY LOG ===
             self.daily_log.append({
@@ -378,6 +479,7 @@ class BacktestEngine:
                 "cycle_phase": cycle_phase,
                 "cycle_score": cycle_score,
                 "macro_mult": macro_mult,
+                "cme_window": bool(self.cme["t35_window"].values[i]),
                 "halted": self.pm.halted,
             })
 
@@ -391,11 +493,12 @@ class BacktestEngine:
                       f"MacroMult: {macro_mult:.2f}")
 
         # === END: Close all remaining positions ===
-        final_closes = self.pm.force_close_all(
-            self.universe_data, self.trading_days[-1], "END_OF_BACKTEST"
-        )
-        for trade in final_closes:
-            self.pm.trade_history.append(trade)
+        if self.close_at_end:
+            final_closes = self.pm.force_close_all(
+                self.universe, self.trading_days[-1], "END_OF_BACKTEST"
+            )
+            for trade in final_closes:
+                self.pm.trade_history.append(trade)
 
         # Build results
         return self._compute_results()
@@ -408,90 +511,30 @@ class BacktestEngine:
 
         daily_df = daily_df.set_index("date")
         equity = daily_df["equity"]
-
-        # Total return
+        performance = equity_performance(equity)
         total_return = (equity.iloc[-1] / equity.iloc[0] - 1) * 100
 
-        # CAGR
-        years = (equity.index[-1] - equity.index[0]).days / 365.25
-        cagr = ((equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1) * 100 if years > 0 else 0
-
-        # Max drawdown
-        peak = equity.cummax()
-        drawdown = (equity - peak) / peak * 100
-        max_dd = drawdown.min()
-        max_dd_date = drawdown.idxmin()
-
-        # Sharpe ratio (assuming risk-free = 0)
-        daily_returns = equity.pct_change().dropna()
-        sharpe = (daily_returns.mean() / daily_returns.std() * np.sqrt(252)) if daily_returns.std() > 0 else 0
-
-        # Sortino ratio
-        downside = daily_returns[daily_returns < 0]
-        sortino = (daily_returns.mean() / downside.std() * np.sqrt(252)) if len(downside) > 0 and downside.std() > 0 else 0
-
-        # Calmar ratio
-        calmar = cagr / abs(max_dd) if max_dd != 0 else 0
-
-        # Trade statistics
+        # Trade statistics: column reductions over the trade ledger
         trades = self.pm.trade_history
-        num_trades = len(trades)
-
-        if num_trades > 0:
-            winners = [t for t in trades if t.pnl > 0]
-            losers = [t for t in trades if t.pnl <= 0]
-            win_rate = len(winners) / num_trades * 100
-
-            avg_win = np.mean([t.pnl for t in winners]) if winners else 0
-            avg_loss = np.mean([t.pnl for t in losers]) if losers else 0
-            profit_factor = abs(sum(t.pnl for t in winners) / sum(t.pnl for t in losers)) if losers and sum(t.pnl for t in losers) != 0 else float('inf')
-
-            avg_r = np.mean([t.r_multiple for t in trades])
-            avg_hold = np.mean([t.holding_days for t in trades])
-
-            # By setup type
-            setup_stats = {}
-            for stype in set(t.setup_type for t in trades):
-                s_trades = [t for t in trades if t.setup_type == stype]
-                s_winners = [t for t in s_trades if t.pnl > 0]
-                setup_stats[stype] = {
-                    "count": len(s_trades),
-                    "win_rate": len(s_winners) / len(s_trades) * 100 if s_trades else 0,
-                    "avg_r": np.mean([t.r_multiple for t in s_trades]),
-                    "total_pnl": sum(t.pnl for t in s_trades),
-                }
-        else:
-            win_rate = 0
-            avg_win = avg_loss = profit_factor = avg_r = avg_hold = 0
-            setup_stats = {}
+        stats = trades.stats()
 
         # Benchmark comparison (SPY buy-and-hold)
         spy_start = self.spy_data["close"].iloc[0]
-        spy_end_mask = self.spy_data.index <= self.end_date
-        spy_end = self.spy_data.loc[spy_end_mask, "close"].iloc[-1] if spy_end_mask.any() else spy_start
+        spy_end_pos = asof_position(self.spy_data.index, self.end_date)
+        spy_end = self.spy_data["close"].iloc[spy_end_pos] if spy_end_pos >= 0 else spy_start
         spy_return = (spy_end / spy_start - 1) * 100
 
         results = {
-            "performance": {
-                "total_return_pct": round(total_return, 2),
-                "cagr_pct": round(cagr, 2),
-                "max_drawdown_pct": round(max_dd, 2),
-                "max_dd_date": str(max_dd_date.date()) if hasattr(max_dd_date, 'date') else str(max_dd_date),
-                "sharpe_ratio": round(sharpe, 3),
-                "sortino_ratio": round(sortino, 3),
-                "calmar_ratio": round(calmar, 3),
-                "final_equity": round(equity.iloc[-1], 2),
-                "peak_equity": round(peak.max(), 2),
-            },
+            "performance": performance,
             "trades": {
-                "total": num_trades,
-                "win_rate_pct": round(win_rate, 1),
-                "avg_win": round(avg_win, 2),
-                "avg_loss": round(avg_loss, 2),
-                "profit_factor": round(profit_factor, 3),
-                "avg_r_multiple": round(avg_r, 3),
-                "avg_holding_days": round(avg_hold, 1),
-                "by_setup": setup_stats,
+                "total": stats["total"],
+                "win_rate_pct": round(stats["win_rate_pct"], 1),
+                "avg_win": round(stats["avg_win"], 2),
+                "avg_loss": round(stats["avg_loss"], 2),
+                "profit_factor": round(stats["profit_factor"], 3),
+                "avg_r_multiple": round(stats["avg_r_multiple"], 3),
+                "avg_holding_days": round(stats["avg_holding_days"], 1),
+                "by_setup": stats["by_setup"],
             },
             "benchmark": {
                 "spy_return_pct": round(spy_return, 2),
@@ -501,22 +544,7 @@ class BacktestEngine:
                 "phases_traded": {str(k): int(v) for k, v in daily_df["cycle_phase"].value_counts().items()},
             },
             "equity_curve": {str(k): v for k, v in daily_df["equity"].to_dict().items()},
-            "trade_log": [
-                {
-                    "ticker": t.ticker,
-                    "setup": t.setup_type,
-                    "entry_date": str(t.entry_date.date()) if hasattr(t.entry_date, 'date') else str(t.entry_date),
-                    "exit_date": str(t.exit_date.date()) if hasattr(t.exit_date, 'date') else str(t.exit_date),
-                    "entry_price": round(t.entry_price, 2),
-                    "exit_price": round(t.exit_price, 2),
-                    "shares": t.shares,
-                    "pnl": round(t.pnl, 2),
-                    "r_multiple": round(t.r_multiple, 2),
-                    "days": t.holding_days,
-                    "exit_reason": t.exit_reason,
-                }
-                for t in trades
-            ],
+            "trade_log": trades.to_records(),
         }
 
         if self.verbose:
@@ -563,3 +591,42 @@ class BacktestEngine:
                       f"PnL=${stats['total_pnl']:,.0f}")
 
         print(f"{'='*70}\n")
+
+
+def equity_performance(equity: pd.Series) -> dict:
+    """Return / drawdown / risk-adjusted stats for a daily equity curve."""
+    # Total return
+    total_return = (equity.iloc[-1] / equity.iloc[0] - 1) * 100
+
+    # CAGR
+    years = (equity.index[-1] - equity.index[0]).days / 365.25
+    cagr = ((equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1) * 100 if years > 0 else 0
+
+    # Max drawdown
+    peak = equity.cummax()
+    drawdown = (equity - peak) / peak * 100
+    max_dd = drawdown.min()
+    max_dd_date = drawdown.idxmin()
+
+    # Sharpe ratio (assuming risk-free = 0)
+    daily_returns = equity.pct_change().dropna()
+    sharpe = (daily_returns.mean() / daily_returns.std() * np.sqrt(252)) if daily_returns.std() > 0 else 0
+
+    # Sortino ratio
+    downside = daily_returns[daily_returns < 0]
+    sortino = (daily_returns.mean() / downside.std() * np.sqrt(252)) if len(downside) > 0 and downside.std() > 0 else 0
+
+    # Calmar ratio
+    calmar = cagr / abs(max_dd) if max_dd != 0 else 0
+
+    return {
+        "total_return_pct": round(total_return, 2),
+        "cagr_pct": round(cagr, 2),
+        "max_drawdown_pct": round(max_dd, 2),
+        "max_dd_date": str(max_dd_date.date()) if hasattr(max_dd_date, 'date') else str(max_dd_date),
+        "sharpe_ratio": round(sharpe, 3),
+        "sortino_ratio": round(sortino, 3),
+        "calmar_ratio": round(calmar, 3),
+        "final_equity": round(equity.iloc[-1], 2),
+        "peak_equity": round(peak.max(), 2),
+    }
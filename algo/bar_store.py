@@ -0,0 +1,223 @@
+"""
+BAR STORE — Persistent per-ticker OHLCV store with incremental append
+=====================================================================
+One append-only binary file per ticker (and interval) holding fixed-size
+records:
+
+  date (int64 ns) | open | high | low | close | volume   (float64)
+
+Files are read through np.memmap, so opening a ticker costs nothing until
+its pages are touched, and a refresh only appends the missing tail
+instead of re-downloading the whole history.
+
+index.json (per interval) records the date range each ticker's file is
+known to be complete for:
+  {"AAPL": {"from": "2014-01-01", "to": "2026-02-20"}}   # to = exclusive end
+
+Adjusted prices (auto_adjust) change retroactively on splits/dividends, so
+tail fetches overlap the stored history by a few days. If the overlapping
+closes disagree the stored history is stale and the caller must refetch it
+in full; the last stored bar is allowed to differ (it may have been a
+partial intraday bar) and is simply replaced.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+BAR_DTYPE = np.dtype([
+    ("date", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Calendar days of stored history re-fetched with every tail update
+TAIL_OVERLAP_DAYS = 10
+
+# Relative close difference that marks the stored history as re-adjusted
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+class BarStore:
+    """Append-only per-ticker bar files for one interval."""
+
+    def __init__(self, root: str, interval: str = "1d"):
+        self.root = os.path.join(root, interval)
+        os.makedirs(self.root, exist_ok=True)
+        self._index_path = os.path.join(self.root, "index.json")
+        try:
+            with open(self._index_path) as f:
+                self.index: Dict[str, Dict[str, str]] = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.replace(os.sep, '_')}.bars")
+
+    def __contains__(self, ticker: str) -> bool:
+        return os.path.exists(self.path(ticker))
+
+    def tickers(self) -> List[str]:
+        return sorted(f[:-5] for f in os.listdir(self.root) if f.endswith(".bars"))
+
+    def _n_records(self, ticker: str) -> int:
+        try:
+            return os.path.getsize(self.path(ticker)) // BAR_DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def records(self, ticker: str) -> np.ndarray:
+        """Read-only memmap of the ticker's records (empty array if none)."""
+        n = self._n_records(ticker)
+        if n == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(self.path(ticker), dtype=BAR_DTYPE, mode="r", shape=(n,))
+
+    def _record_at(self, ticker: str, pos: int) -> Optional[np.void]:
+        n = self._n_records(ticker)
+        if n == 0:
+            return None
+        with open(self.path(ticker), "rb") as f:
+            f.seek((pos % n) * BAR_DTYPE.itemsize)
+            return np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)[0]
+
+    def first_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        rec = self._record_at(ticker, 0)
+        return None if rec is None else pd.Timestamp(int(rec["date"]))
+
+    def last_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        rec = self._record_at(ticker, -1)
+        return None if rec is None else pd.Timestamp(int(rec["date"]))
+
+    def read(self, ticker: str, start=None, end=None) -> pd.DataFrame:
+        """OHLCV frame for start <= date < end (both optional)."""
+        recs = self.records(ticker)
+        if len(recs) == 0:
+            return pd.DataFrame()
+        dates = recs["date"]
+        lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side="left"))
+        hi = len(recs) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side="left"))
+        block = np.array(recs[lo:hi])
+        df = pd.DataFrame({c: block[c] for c in OHLCV_COLUMNS},
+                          index=pd.DatetimeIndex(block["date"].astype("datetime64[ns]")))
+        return df
+
+    @staticmethod
+    def _to_records(df: pd.DataFrame) -> np.ndarray:
+        df = df.sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        recs = np.empty(len(df), dtype=BAR_DTYPE)
+        recs["date"] = pd.DatetimeIndex(df.index).values.astype("datetime64[ns]").view(np.int64)
+        for c in OHLCV_COLUMNS:
+            recs[c] = df[c].to_numpy(dtype=np.float64)
+        return recs
+
+    def write(self, ticker: str, df: pd.DataFrame):
+        """Replace the ticker's history (its completeness range is reset)."""
+        tmp = self.path(ticker) + ".tmp"
+        self._to_records(df).tofile(tmp)
+        os.replace(tmp, self.path(ticker))
+        self.index.pop(ticker, None)
+
+    def append(self, ticker: str, df: pd.DataFrame) -> int:
+        """Append bars dated after the last stored bar; returns the number appended."""
+        last = self.last_date(ticker)
+        if last is not None:
+            df = df[df.index > last]
+        if df.empty:
+            return 0
+        with open(self.path(ticker), "ab") as f:
+            self._to_records(df).tofile(f)
+        return len(df)
+
+    # ------------------------------------------------------------------
+    # Incremental refresh
+    # ------------------------------------------------------------------
+
+    def covers_start(self, ticker: str, start) -> bool:
+        """True when the stored history is complete from start (or earlier) onwards."""
+        meta = self.index.get(ticker)
+        return (meta is not None and self.last_date(ticker) is not None
+                and pd.Timestamp(meta["from"]) <= pd.Timestamp(start))
+
+    def fetch_start(self, ticker: str, start, end) -> Optional[pd.Timestamp]:
+        """
+        Where a refresh for [start, end) has to start fetching:
+        None when the store already covers it, `start` when the ticker needs
+        a full (re)fetch (see full_range), otherwise a date shortly before
+        the last stored bar, even when that is before `start`, so the tail
+        can be merged onto the stored history.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if not self.covers_start(ticker, start):
+            return start
+        if pd.Timestamp(self.index[ticker]["to"]) >= min(end, _today_end()):
+            return None
+        return self.last_date(ticker) - pd.Timedelta(days=TAIL_OVERLAP_DAYS)
+
+    def full_range(self, ticker: str, start, end):
+        """(start, end) of a full refetch: [start, end) widened to the range the store already covers."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        meta = self.index.get(ticker)
+        if meta is None or ticker not in self:
+            return start, end
+        return min(start, pd.Timestamp(meta["from"])), max(end, pd.Timestamp(meta["to"]))
+
+    def merge_tail(self, ticker: str, df: pd.DataFrame) -> bool:
+        """
+        Merge a tail fetch that overlaps the stored history. Returns False
+        (nothing written) when the overlap shows the history was re-adjusted.
+        """
+        if df.empty:
+            return True
+        recs = self.records(ticker)
+        dates = np.array(recs["date"])
+        stored = pd.Series(np.array(recs["close"]), index=pd.DatetimeIndex(dates.astype("datetime64[ns]")))
+        del recs  # release the map before truncating
+        cut = int(np.searchsorted(dates, df.index[0].value, side="left"))
+
+        # Compare everything in the overlap except the last stored bar
+        overlap = stored.iloc[cut:-1]
+        common = overlap.index.intersection(df.index)
+        if len(common):
+            old, new = overlap.loc[common].values, df.loc[common, "close"].values
+            if not np.allclose(old, new, rtol=ADJUSTMENT_TOLERANCE, atol=0.0):
+                return False
+
+        # Replace the overlapping tail (incl. a possibly partial last bar)
+        os.truncate(self.path(ticker), cut * BAR_DTYPE.itemsize)
+        with open(self.path(ticker), "ab") as f:
+            self._to_records(df).tofile(f)
+        return True
+
+    def mark_complete(self, ticker: str, start, end):
+        """Record that the ticker's file is complete for [start, min(end, today))."""
+        start = pd.Timestamp(start)
+        end = min(pd.Timestamp(end), _today_end())
+        meta = self.index.get(ticker)
+        if meta is not None:
+            start = min(start, pd.Timestamp(meta["from"]))
+        self.index[ticker] = {"from": str(start.date()), "to": str(end.date())}
+
+    def save_index(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, indent=0, sort_keys=True)
+        os.replace(tmp, self._index_path)
+
+
+def _today_end() -> pd.Timestamp:
+    """Exclusive end for data available now (tomorrow 00:00)."""
+    return pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
@@ -12,6 +12,7 @@ All parameters extracted from:
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import List, Dict
+import bisect
 import math
 
 # ============================================================================
@@ -62,7 +63,8 @@ class KitchinCycleConfig:
     china_trough: date = date(2024, 1, 1)    # EM trough ~15 months before US C4 trough
     china_period_months: float = 37.0        # China cycles shorter than global
 
-    # Phase definitions (fraction of cycle)
+    # Phase definitions (fraction of cycle): phase_labels[i] runs from
+    # phase_edges[i-1] up to phase_edges[i]
     # 0.00-0.10 = Late Contraction (accumulate zone)
     # 0.10-0.25 = Trough / Accumulation
     # 0.25-0.40 = Early Expansion
@@ -70,51 +72,38 @@ class KitchinCycleConfig:
     # 0.55-0.70 = Late Expansion / Peak
     # 0.70-0.85 = Early Contraction
     # 0.85-1.00 = Late Contraction
+    phase_edges: List[float] = field(default_factory=lambda: [0.10, 0.25, 0.40, 0.55, 0.70, 0.85])
+    phase_labels: List[str] = field(default_factory=lambda: [
+        "LATE_CONTRACTION", "TROUGH_ACCUMULATE", "EARLY_EXPANSION", "MID_EXPANSION",
+        "LATE_EXPANSION_PEAK", "EARLY_CONTRACTION", "LATE_CONTRACTION",
+    ])
+
+    # Cycle score mapping (from Pine Script): linear between the breakpoints
+    score_positions: List[float] = field(default_factory=lambda: [0.0, 0.10, 0.25, 0.50, 0.75, 1.0])
+    score_values: List[float] = field(default_factory=lambda: [60.0, 90.0, 70.0, 40.0, 15.0, 60.0])
+
+    # Position sizing multiplier by cycle phase (Qullamaggie: aggressive in bull, minimal in bear)
+    phase_multipliers: Dict[str, float] = field(default_factory=lambda: {
+        "LATE_CONTRACTION": 2.0,       # Accumulate zone — start building
+        "TROUGH_ACCUMULATE": 2.5,      # Max conviction — user's key insight
+        "EARLY_EXPANSION": 2.5,        # Ride the wave HARD
+        "MID_EXPANSION": 2.0,          # Still aggressive
+        "LATE_EXPANSION_PEAK": 1.0,    # Start trimming
+        "EARLY_CONTRACTION": 0.4,      # Go mostly to cash
+    })
 
-    # Cycle score mapping (from Pine Script)
     def get_cycle_score(self, position: float) -> float:
         """Returns 0-100 score based on cycle position (0=trough, 1=next trough)."""
-        if position < 0.10:
-            return 60.0 + position / 0.10 * 30.0
-        elif position < 0.25:
-            return 90.0 - (position - 0.10) / 0.15 * 20.0
-        elif position < 0.50:
-            return 70.0 - (position - 0.25) / 0.25 * 30.0
-        elif position < 0.75:
-            return 40.0 - (position - 0.50) / 0.25 * 25.0
-        else:
-            return 15.0 + (position - 0.75) / 0.25 * 45.0
+        xs, ys = self.score_positions, self.score_values
+        i = min(max(bisect.bisect_right(xs, position), 1), len(xs) - 1) - 1
+        return ys[i] + (position - xs[i]) / (xs[i + 1] - xs[i]) * (ys[i + 1] - ys[i])
 
     def get_phase_label(self, position: float) -> str:
-        if position < 0.10:
-            return "LATE_CONTRACTION"
-        elif position < 0.25:
-            return "TROUGH_ACCUMULATE"
-        elif position < 0.40:
-            return "EARLY_EXPANSION"
-        elif position < 0.55:
-            return "MID_EXPANSION"
-        elif position < 0.70:
-            return "LATE_EXPANSION_PEAK"
-        elif position < 0.85:
-            return "EARLY_CONTRACTION"
-        else:
-            return "LATE_CONTRACTION"
+        return self.phase_labels[bisect.bisect_right(self.phase_edges, position)]
 
-    # Position sizing multiplier by cycle phase (Qullamaggie: aggressive in bull, minimal in bear)
     def get_cycle_sizing_multiplier(self, position: float) -> float:
         """Aggressive near trough/expansion, defensive near peak/contraction."""
-        phase = self.get_phase_label(position)
-        multipliers = {
-            "LATE_CONTRACTION": 2.0,       # Accumulate zone — start building
-            "TROUGH_ACCUMULATE": 2.5,      # Max conviction — user's key insight
-            "EARLY_EXPANSION": 2.5,        # Ride the wave HARD
-            "MID_EXPANSION": 2.0,          # Still aggressive
-            "LATE_EXPANSION_PEAK": 1.0,    # Start trimming
-            "EARLY_CONTRACTION": 0.4,      # Go mostly to cash
-        }
-        return multipliers.get(phase, 1.0)
-
+        return self.phase_multipliers.get(self.get_phase_label(position), 1.0)
 
 KITCHIN = KitchinCycleConfig()
 
@@ -138,6 +127,7 @@ class QullamaggieConfig:
     rs_lookback: int = 63              # ~3 months for RS ranking
     rs_top_pct: float = 2.5            # Top 2.5% RS rank for HTFs
     rs_ep_top_pct: float = 10.0        # Looser for EPs
+    rs_rank_filter: bool = False       # Gate HTF / EP on the cross-sectional rs_rank
 
     # --- HTF (High Tight Flag) ---
     htf_prior_run_pct: float = 30.0    # Prior trend: +30-100% in 4-8 weeks
@@ -283,9 +273,38 @@ class CMECycleConfig:
     quarterly_expiries: List[int] = field(default_factory=lambda: [3, 6, 9, 12])
     # Typical expiry is 3rd Friday of the month
 
+    # Research overlay: scale scan scores by cme_t35_score_adjustment
+    # (0.5 in the T+35 window, 1.2 post-flush). Off: pure price action.
+    score_overlay: bool = False
+
 
 CME = CMECycleConfig()
 
+# ============================================================================
+# FILL MODEL (stops / profit targets inside daily bars, see algo.fill_simulator)
+# ============================================================================
+@dataclass
+class FillModelConfig:
+    """How stop and profit-target orders fill on daily OHLC bars."""
+    path: str = "close"            # "close" (legacy), "OLHC", "OHLC", "worst"
+    gap_fills: bool = True         # Intraday paths: gaps through a level fill at the open
+    adr_slippage_pct: float = 0.0  # Slippage = this % of ADR(20), floored at SLIPPAGE_PCT
+
+
+FILLS = FillModelConfig()
+
+# ============================================================================
+# EXECUTION (how backtest entries are ordered, see algo.execution)
+# ============================================================================
+@dataclass
+class ExecutionConfig:
+    """Entry order type for pending setups."""
+    entry_order: str = "CLOSE"  # "CLOSE" = scan-day close (legacy); "MOO" / "STOP" / "LIMIT"
+                                # fill on the next bar (STOP / LIMIT at the setup's entry_price)
+
+
+EXECUTION = ExecutionConfig()
+
 # ============================================================================
 # MACRO / LIQUIDITY (from Pine Script weights)
 # ============================================================================
@@ -362,8 +381,10 @@ class UniverseConfig:
     min_price: float = 5.0                 # No penny stocks
     max_tickers: int = 3000                # Cap for backtest performance
     refresh_days: int = 7                  # Refresh ticker list weekly
-    batch_size: int = 100                  # Download batch size for yfinance
-    batch_delay_sec: float = 2.0           # Delay between batches (rate limit)
+    download_concurrency: int = 8          # Max in-flight yfinance requests
+    download_rate_per_sec: float = 4.0     # Token-bucket request rate (rate limit)
+    download_burst: int = 8                # Requests allowed back to back
+    download_retries: int = 3              # Per-ticker retries (exponential backoff)
     # Daily scan pre-filter (fast vectorized check before full scan)
     pre_filter_above_sma: int = 200        # Must be above N-day SMA
     pre_filter_min_adr: float = 2.0        # ADR(20) must exceed this %
@@ -388,7 +409,9 @@ class MacroEngineConfig:
     vix_weight: float = 0.10
     # Earnings engine
     earnings_enabled: bool = True
-    earnings_fetch_delay: float = 1.0  # Delay between yfinance calls
+    earnings_concurrency: int = 8      # Max in-flight yfinance earnings requests
+    earnings_rate_per_sec: float = 4.0 # Token-bucket request rate
+    earnings_retries: int = 2          # Per-ticker retries (exponential backoff)
 
 
 MACRO_ENGINE = MacroEngineConfig()
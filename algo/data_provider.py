@@ -10,9 +10,10 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import os
-import time
 import json
 
+from algo.bar_store import BarStore
+
 
 class DataProvider:
     """Abstract data provider interface."""
@@ -25,155 +26,172 @@ class DataProvider:
 
 
 class YFinanceProvider(DataProvider):
-    """Yahoo Finance data provider for backtesting."""
+    """Yahoo Finance data provider for backtesting (bars persisted in a local BarStore)."""
 
-    def __init__(self, cache_dir: str = None):
-        try:
-            import yfinance as yf
-            self.yf = yf
-        except ImportError:
-            raise ImportError("Install yfinance: pip install yfinance")
+    def __init__(self, cache_dir: str = None, fetch_fn=None):
+        """
+        fetch_fn(ticker, start, end, interval) -> OHLCV DataFrame replaces the
+        yfinance download (e.g. a local stand-in for tests); it should raise
+        on transient errors so the request is retried.
+        """
+        self.yf = None
+        if fetch_fn is None:
+            try:
+                import yfinance as yf
+                self.yf = yf
+            except ImportError:
+                raise ImportError("Install yfinance: pip install yfinance")
+        self.fetch_fn = fetch_fn or self._history
         self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), "..", ".cache")
         os.makedirs(self.cache_dir, exist_ok=True)
-        self._cache: Dict[str, pd.DataFrame] = {}
-
-    def _cache_key(self, ticker: str, start: str, end: str, interval: str) -> str:
-        return f"{ticker}_{start}_{end}_{interval}"
+        self._cache: Dict[tuple, pd.DataFrame] = {}
+        self._stores: Dict[str, BarStore] = {}
 
-    def _cache_path(self, key: str) -> str:
-        return os.path.join(self.cache_dir, f"{key}.parquet")
+    def _store(self, interval: str) -> BarStore:
+        store = self._stores.get(interval)
+        if store is None:
+            store = BarStore(os.path.join(self.cache_dir, "bars"), interval)
+            self._stores[interval] = store
+        return store
 
     def get_ohlcv(self, ticker: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
-        """Fetch OHLCV data with disk caching."""
-        key = self._cache_key(ticker, start, end, interval)
+        """Fetch OHLCV data through the local bar store (only missing bars are downloaded)."""
+        key = (ticker, start, end, interval)
 
         # Memory cache
         if key in self._cache:
             return self._cache[key]
 
-        # Disk cache
-        cache_file = self._cache_path(key)
-        if os.path.exists(cache_file):
-            mod_time = os.path.getmtime(cache_file)
-            if time.time() - mod_time < 86400:  # 24h cache
-                try:
-                    df = pd.read_parquet(cache_file)
-                    self._cache[key] = df
-                    return df
-                except Exception:
-                    pass
-
-        # Fetch from yfinance
-        try:
-            tk = self.yf.Ticker(ticker)
-            df = tk.history(start=start, end=end, interval=interval, auto_adjust=True)
-            if df.empty:
-                return pd.DataFrame()
+        store = self._store(interval)
+        fetch_from = store.fetch_start(ticker, start, end)
+        if fetch_from is not None:
+            tail = store.covers_start(ticker, start)
+            if tail:
+                df = self._fetch_single(ticker, str(fetch_from.date()), end, interval)
+            if not tail or self._update_store(store, ticker, df, True, start, end) is None:
+                lo, hi = store.full_range(ticker, start, end)
+                df = self._fetch_single(ticker, str(lo.date()), str(hi.date()), interval)
+                self._update_store(store, ticker, df, False, lo, hi)
+            store.save_index()
+
+        df = store.read(ticker, start, end)
+        if not df.empty:
+            self._cache[key] = df
+        return df
 
-            # Standardize columns
-            df.columns = [c.lower().replace(" ", "_") for c in df.columns]
-            for col in ["open", "high", "low", "close", "volume"]:
-                if col not in df.columns:
-                    df[col] = np.nan
+    def _history(self, ticker: str, start: str, end: str, interval: str) -> pd.DataFrame:
+        """Download one ticker via yf.Ticker.history (raises on request errors)."""
+        tk = self.yf.Ticker(ticker)
+        return tk.history(start=start, end=end, interval=interval, auto_adjust=True)
 
-            df = df[["open", "high", "low", "close", "volume"]].copy()
-            df.index = pd.to_datetime(df.index)
-            df.index = df.index.tz_localize(None)  # Remove timezone
-            df = df.dropna(subset=["close"])
+    def _download(self, ticker: str, start: str, end: str, interval: str) -> pd.DataFrame:
+        """fetch_fn with standardized columns and a tz-naive index."""
+        df = self.fetch_fn(ticker, start, end, interval)
+        if df is None or df.empty:
+            return pd.DataFrame()
 
-            # Cache
-            try:
-                df.to_parquet(cache_file)
-            except Exception:
-                pass
-            self._cache[key] = df
-            return df
+        # Standardize columns
+        df.columns = [c.lower().replace(" ", "_") for c in df.columns]
+        for col in ["open", "high", "low", "close", "volume"]:
+            if col not in df.columns:
+                df[col] = np.nan
 
+        df = df[["open", "high", "low", "close", "volume"]].copy()
+        df.index = pd.to_datetime(df.index)
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)  # Remove timezone
+        df = df.dropna(subset=["close"])
+        return df
+
+    def _fetch_single(self, ticker: str, start: str, end: str, interval: str) -> pd.DataFrame:
+        try:
+            return self._download(ticker, start, end, interval)
         except Exception as e:
             print(f"  [WARN] Failed to fetch {ticker}: {e}")
             return pd.DataFrame()
 
-    def get_bulk_ohlcv(self, tickers: List[str], start: str, end: str,
-                       interval: str = "1d",
-                       batch_size: int = 100,
-                       batch_delay: float = 2.0) -> Dict[str, pd.DataFrame]:
+    def _update_store(self, store: BarStore, ticker: str, df: pd.DataFrame,
+                      tail: bool, start, end) -> Optional[bool]:
         """
-        Fetch multiple tickers with batching and retry logic.
-        For large universes (1000+), downloads in batches to avoid rate limits.
+        Write a fetch into the store: a tail fetch is merged onto the stored
+        history, a full fetch (over BarStore.full_range) replaces it. Returns
+        True when the store now covers [start, end), False when a full fetch
+        came back empty, and None when a tail fetch showed re-adjusted prices
+        (the caller refetches in full).
         """
-        result = {}
-
-        # Split into batches for large universes
-        if len(tickers) <= batch_size:
-            batches = [tickers]
+        if df is None or df.empty:
+            return tail  # no new bars yet; the stored history stays valid
+        if tail:
+            if not store.merge_tail(ticker, df):
+                return None
         else:
-            batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
-            print(f"  Downloading {len(tickers)} tickers in {len(batches)} batches...")
-
-        for batch_idx, batch in enumerate(batches):
-            if len(batches) > 1:
-                print(f"  Batch {batch_idx + 1}/{len(batches)}: {len(batch)} tickers "
-                      f"({len(result)} loaded so far)...")
-
-            batch_result = self._download_batch(batch, start, end, interval)
-            result.update(batch_result)
+            store.write(ticker, df)
+        store.mark_complete(ticker, start, end)
+        return True
 
-            # Delay between batches to avoid rate limits
-            if batch_idx < len(batches) - 1 and batch_delay > 0:
-                time.sleep(batch_delay)
-
-        # Fetch missing tickers individually (with retry)
-        missing = [t for t in tickers if t not in result]
-        if missing and len(missing) <= 50:
-            for ticker in missing:
-                df = self.get_ohlcv(ticker, start, end, interval)
-                if not df.empty:
-                    result[ticker] = df
-
-        return result
+    def get_bulk_ohlcv(self, tickers: List[str], start: str, end: str,
+                       interval: str = "1d",
+                       max_in_flight: int = None,
+                       rate: float = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch multiple tickers concurrently (algo.async_fetch): bounded
+        in-flight requests, token-bucket rate limit, per-ticker retries.
+        Tickers already in the bar store only download their missing tail;
+        each download is written to the store as it arrives.
+        """
+        from algo.async_fetch import fetch_all_sync
+        from algo.config import UNIVERSE
+
+        store = self._store(interval)
+        fetch_from = {}  # ticker -> (fetch start, fetch end, tail)
+        for ticker in dict.fromkeys(tickers):
+            fs = store.fetch_start(ticker, start, end)
+            if fs is None:
+                continue
+            if store.covers_start(ticker, start):
+                fetch_from[ticker] = (fs, pd.Timestamp(end), True)
+            else:
+                fetch_from[ticker] = (*store.full_range(ticker, start, end), False)
+        if len(fetch_from) < len(tickers):
+            print(f"  Bar store: {len(tickers) - len(fetch_from)}/{len(tickers)} tickers up to date")
+
+        stale = []
+
+        def on_result(ticker: str, df: pd.DataFrame):
+            lo, hi, tail = fetch_from[ticker]
+            if self._update_store(store, ticker, df, tail,
+                                  start if tail else lo, end if tail else hi) is None:
+                stale.append(ticker)
+
+        def fetch(ticker: str) -> pd.DataFrame:
+            lo, hi, _ = fetch_from[ticker]
+            return self._download(ticker, str(lo.date()), str(hi.date()), interval)
+
+        options = dict(
+            max_in_flight=max_in_flight or UNIVERSE.download_concurrency,
+            rate=rate or UNIVERSE.download_rate_per_sec,
+            burst=UNIVERSE.download_burst,
+            max_retries=UNIVERSE.download_retries,
+        )
+        if fetch_from:
+            if len(fetch_from) > 1:
+                print(f"  Downloading {len(fetch_from)} tickers "
+                      f"({options['max_in_flight']} concurrent, {options['rate']:g} req/s)...")
+            fetch_all_sync(fetch_from, fetch, on_result=on_result, **options)
+
+        # Re-adjusted history (split / dividend since the last refresh): full refetch
+        if stale:
+            print(f"  Refetching {len(stale)} tickers with re-adjusted history...")
+            for ticker in stale:
+                fetch_from[ticker] = (*store.full_range(ticker, start, end), False)
+            fetch_all_sync(stale, fetch, on_result=on_result, **options)
+        store.save_index()
 
-    def _download_batch(self, tickers: List[str], start: str, end: str,
-                        interval: str, max_retries: int = 3) -> Dict[str, pd.DataFrame]:
-        """Download a batch of tickers with retry logic."""
         result = {}
-
-        for attempt in range(max_retries):
-            try:
-                raw = self.yf.download(tickers, start=start, end=end,
-                                       interval=interval, auto_adjust=True,
-                                       group_by="ticker", threads=True,
-                                       progress=False)
-
-                if isinstance(raw.columns, pd.MultiIndex):
-                    for ticker in tickers:
-                        try:
-                            df = raw[ticker].copy()
-                            df.columns = [c.lower().replace(" ", "_") for c in df.columns]
-                            df = df[["open", "high", "low", "close", "volume"]].dropna(subset=["close"])
-                            df.index = pd.to_datetime(df.index).tz_localize(None)
-                            if not df.empty:
-                                result[ticker] = df
-                        except Exception:
-                            pass
-                elif len(tickers) == 1:
-                    df = raw.copy()
-                    df.columns = [c.lower().replace(" ", "_") for c in df.columns]
-                    df = df[["open", "high", "low", "close", "volume"]].dropna(subset=["close"])
-                    df.index = pd.to_datetime(df.index).tz_localize(None)
-                    if not df.empty:
-                        result[tickers[0]] = df
-
-                return result
-
-            except Exception as e:
-                delay = 5 * (3 ** attempt)  # 5s, 15s, 45s
-                if attempt < max_retries - 1:
-                    print(f"  [RETRY] Batch download failed (attempt {attempt + 1}): {e}. "
-                          f"Retrying in {delay}s...")
-                    time.sleep(delay)
-                else:
-                    print(f"  [WARN] Batch download failed after {max_retries} attempts: {e}")
-
+        for ticker in tickers:
+            df = store.read(ticker, start, end)
+            if not df.empty:
+                result[ticker] = df
         return result
 
     def get_market_cap(self, ticker: str) -> Optional[float]:
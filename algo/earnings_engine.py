@@ -14,7 +14,6 @@ Earnings Catalyst Score (0-100):
 
 import os
 import json
-import time
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional, Tuple
@@ -24,6 +23,22 @@ from datetime import datetime, date, timedelta
 # ============================================================================
 # CACHE
 # ============================================================================
+# All tickers' records live in one columnar file (earnings.npz):
+#   tickers  str[n]          offsets int64[n+1]   (ticker i = rows offsets[i]:offsets[i+1])
+#   fetched  datetime64[D][n] last download per ticker
+#   date     datetime64[D][m] + one float64[m] column per EARNINGS_FIELDS (NaN = None)
+# A new store is seeded from the old per-ticker <TICKER>_earnings.json files.
+
+EARNINGS_FIELDS = ("eps_actual", "eps_estimate", "revenue_actual", "revenue_estimate")
+
+# Expected gap between reports; the next report is due this long after the last one
+REPORT_INTERVAL_DAYS = 91
+
+# Once a report is due, refetch daily for this many days, then fall back to
+# NO_DATA_RETRY_DAYS (late filers, delisted tickers, tickers with no data)
+LATE_REPORT_DAYS = 30
+NO_DATA_RETRY_DAYS = 7
+
 
 def _earnings_cache_dir() -> str:
     cache_dir = os.path.join(os.path.dirname(__file__), "..", ".cache", "earnings")
@@ -31,135 +46,258 @@ def _earnings_cache_dir() -> str:
     return cache_dir
 
 
-def _cache_path(ticker: str) -> str:
-    return os.path.join(_earnings_cache_dir(), f"{ticker}_earnings.json")
+class EarningsStore:
+    """Every ticker's earnings records in one consolidated columnar file."""
 
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(_earnings_cache_dir(), "earnings.npz")
+        self._records: Dict[str, List[dict]] = {}
+        self._fetched: Dict[str, date] = {}
+        self._load()
 
-def _cache_is_fresh(path: str, max_age_hours: int = 168) -> bool:
-    """Earnings data cached for 7 days (168 hours) — rarely changes retroactively."""
-    if not os.path.exists(path):
-        return False
-    age = time.time() - os.path.getmtime(path)
-    return age < max_age_hours * 3600
+    def _load(self):
+        try:
+            z = np.load(self.path, allow_pickle=False)
+        except (OSError, ValueError):
+            self._import_legacy()
+            return
+        with z:
+            tickers, offsets = z["tickers"], z["offsets"]
+            fetched = z["fetched"]
+            dates = z["date"].astype(str).tolist()
+            cols = {f: z[f] for f in EARNINGS_FIELDS}
+        for i, ticker in enumerate(tickers.tolist()):
+            lo, hi = int(offsets[i]), int(offsets[i + 1])
+            self._fetched[ticker] = fetched[i].item()
+            self._records[ticker] = [
+                {"date": dates[k],
+                 **{f: (None if np.isnan(cols[f][k]) else float(cols[f][k])) for f in EARNINGS_FIELDS}}
+                for k in range(lo, hi)
+            ]
+
+    def _import_legacy(self):
+        """Seed a new store from the old per-ticker <TICKER>_earnings.json files."""
+        folder = os.path.dirname(self.path)
+        if not os.path.isdir(folder):
+            return
+        for name in os.listdir(folder):
+            if not name.endswith("_earnings.json"):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                with open(path) as f:
+                    records = json.load(f)
+            except (OSError, ValueError):
+                continue
+            fetched = date.fromtimestamp(os.path.getmtime(path))
+            self.update(name[:-len("_earnings.json")], records, fetched)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._fetched
+
+    def records(self, ticker: str) -> List[dict]:
+        return self._records.get(ticker, [])
+
+    def next_report_date(self, ticker: str) -> Optional[date]:
+        """Estimated next report: last EPS report (or last record) + REPORT_INTERVAL_DAYS."""
+        records = self._records.get(ticker)
+        if not records:
+            return None
+        reported = [r for r in records if r.get("eps_actual") is not None] or records
+        last = pd.Timestamp(reported[-1]["date"]).date()
+        return last + timedelta(days=REPORT_INTERVAL_DAYS)
+
+    def needs_refresh(self, ticker: str, today: Optional[date] = None) -> bool:
+        """True when the ticker was never fetched or its next report is due."""
+        today = today or date.today()
+        fetched = self._fetched.get(ticker)
+        if fetched is None:
+            return True
+        age = (today - fetched).days
+        due = self.next_report_date(ticker)
+        if due is None:
+            return age >= NO_DATA_RETRY_DAYS
+        if due > today:
+            return False
+        late = (today - due).days
+        return age >= (1 if late <= LATE_REPORT_DAYS else NO_DATA_RETRY_DAYS)
+
+    def update(self, ticker: str, records: List[dict], fetched: Optional[date] = None):
+        """Replace a ticker's records (unparseable dates are dropped)."""
+        clean = []
+        for r in records or []:
+            try:
+                d = pd.Timestamp(r["date"])
+            except (KeyError, ValueError, TypeError):
+                continue
+            clean.append({"date": str(d.date()), **{f: r.get(f) for f in EARNINGS_FIELDS}})
+        self._records[ticker] = clean
+        self._fetched[ticker] = fetched or date.today()
+
+    def record_fetch(self, ticker: str, records: List[dict], fetched: Optional[date] = None):
+        """
+        Store a download result. An empty download never replaces stored
+        records (it only bumps the fetch date), so a bad response cannot
+        wipe a ticker's history.
+        """
+        if records or not self._records.get(ticker):
+            self.update(ticker, records, fetched)
+        else:
+            self._fetched[ticker] = fetched or date.today()
+
+    def as_dict(self, tickers: Optional[List[str]] = None) -> Dict[str, List[dict]]:
+        """{ticker: records} for tickers with data (all stored tickers by default)."""
+        tickers = self._records.keys() if tickers is None else tickers
+        return {t: self._records[t] for t in tickers if self._records.get(t)}
+
+    def save(self):
+        tickers = sorted(self._fetched)
+        counts = [len(self._records.get(t, [])) for t in tickers]
+        rows = [r for t in tickers for r in self._records.get(t, [])]
+        arrays = {
+            "tickers": np.array(tickers, dtype=str),
+            "offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            "fetched": np.array([self._fetched[t] for t in tickers], dtype="datetime64[D]"),
+            "date": np.array([r["date"] for r in rows], dtype="datetime64[D]"),
+        }
+        for f in EARNINGS_FIELDS:
+            arrays[f] = np.array([np.nan if r.get(f) is None else r[f] for r in rows], dtype=np.float64)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.path)
 
 
 # ============================================================================
 # DATA FETCHING
 # ============================================================================
 
-def fetch_earnings_for_ticker(ticker: str) -> List[dict]:
+def download_earnings(ticker: str) -> List[dict]:
     """
-    Fetch earnings history for a single ticker from yfinance.
+    Download earnings history for a single ticker from yfinance.
     Returns list of earnings records sorted by date (oldest first).
     Each record: {date, eps_actual, eps_estimate, revenue_actual, revenue_estimate}
+    Raises when both yfinance requests fail, so callers can retry.
     """
-    cache_file = _cache_path(ticker)
+    import yfinance as yf
+    tk = yf.Ticker(ticker)
 
-    if _cache_is_fresh(cache_file):
-        try:
-            with open(cache_file, "r") as f:
-                return json.load(f)
-        except Exception:
-            pass
+    records = []
+    errors = []
 
+    # Try earnings_history (has EPS actual vs estimate)
     try:
-        import yfinance as yf
-        tk = yf.Ticker(ticker)
-
-        records = []
-
-        # Try earnings_history (has EPS actual vs estimate)
-        try:
-            eh = tk.earnings_history
-            if eh is not None and not eh.empty:
-                for _, row in eh.iterrows():
-                    record = {
-                        "date": str(row.name.date()) if hasattr(row.name, 'date') else str(row.name),
-                        "eps_actual": float(row.get("epsActual", 0)) if pd.notna(row.get("epsActual")) else None,
-                        "eps_estimate": float(row.get("epsEstimate", 0)) if pd.notna(row.get("epsEstimate")) else None,
-                    }
-                    records.append(record)
-        except Exception:
-            pass
-
-        # Try quarterly financials for revenue data
-        try:
-            qf = tk.quarterly_financials
-            if qf is not None and not qf.empty:
-                for col_date in qf.columns:
-                    rev = None
-                    for key in ["Total Revenue", "Revenue", "totalRevenue"]:
-                        if key in qf.index:
-                            val = qf.loc[key, col_date]
-                            if pd.notna(val):
-                                rev = float(val)
-                                break
-
-                    date_str = str(col_date.date()) if hasattr(col_date, 'date') else str(col_date)
-
-                    # Match to existing record or create new one
-                    matched = False
-                    for r in records:
-                        # Match within 30 days
-                        try:
-                            r_date = datetime.strptime(r["date"], "%Y-%m-%d").date()
-                            q_date = col_date.date() if hasattr(col_date, 'date') else col_date
-                            if abs((r_date - q_date).days) <= 30:
-                                r["revenue_actual"] = rev
-                                matched = True
-                                break
-                        except Exception:
-                            pass
-
-                    if not matched and rev is not None:
-                        records.append({
-                            "date": date_str,
-                            "eps_actual": None,
-                            "eps_estimate": None,
-                            "revenue_actual": rev,
-                        })
-        except Exception:
-            pass
-
-        # Sort by date
-        records.sort(key=lambda x: x.get("date", ""))
-
-        # Cache
+        eh = tk.earnings_history
+        if eh is not None and not eh.empty:
+            for _, row in eh.iterrows():
+                record = {
+                    "date": str(row.name.date()) if hasattr(row.name, 'date') else str(row.name),
+                    "eps_actual": float(row.get("epsActual", 0)) if pd.notna(row.get("epsActual")) else None,
+                    "eps_estimate": float(row.get("epsEstimate", 0)) if pd.notna(row.get("epsEstimate")) else None,
+                }
+                records.append(record)
+    except Exception as e:
+        errors.append(e)
+
+    # Try quarterly financials for revenue data
+    try:
+        qf = tk.quarterly_financials
+        if qf is not None and not qf.empty:
+            for col_date in qf.columns:
+                rev = None
+                for key in ["Total Revenue", "Revenue", "totalRevenue"]:
+                    if key in qf.index:
+                        val = qf.loc[key, col_date]
+                        if pd.notna(val):
+                            rev = float(val)
+                            break
+
+                date_str = str(col_date.date()) if hasattr(col_date, 'date') else str(col_date)
+
+                # Match to existing record or create new one
+                matched = False
+                for r in records:
+                    # Match within 30 days
+                    try:
+                        r_date = datetime.strptime(r["date"], "%Y-%m-%d").date()
+                        q_date = col_date.date() if hasattr(col_date, 'date') else col_date
+                        if abs((r_date - q_date).days) <= 30:
+                            r["revenue_actual"] = rev
+                            matched = True
+                            break
+                    except Exception:
+                        pass
+
+                if not matched and rev is not None:
+                    records.append({
+                        "date": date_str,
+                        "eps_actual": None,
+                        "eps_estimate": None,
+                        "revenue_actual": rev,
+                    })
+    except Exception as e:
+        errors.append(e)
+
+    if len(errors) == 2:
+        raise RuntimeError(f"earnings download failed for {ticker}: {errors[-1]}") from errors[-1]
+
+    # Sort by date
+    records.sort(key=lambda x: x.get("date", ""))
+    return records
+
+
+def fetch_earnings_for_ticker(ticker: str, store: Optional[EarningsStore] = None) -> List[dict]:
+    """Earnings records for one ticker, refreshed in the store when a report is due."""
+    store = store or EarningsStore()
+    if store.needs_refresh(ticker):
         try:
-            with open(cache_file, "w") as f:
-                json.dump(records, f, indent=2)
+            store.record_fetch(ticker, download_earnings(ticker))
+            store.save()
         except Exception:
             pass
-
-        return records
-
-    except Exception:
-        return []
+    return store.records(ticker)
 
 
 def bulk_fetch_earnings(
     tickers: List[str],
-    max_per_batch: int = 20,
-    delay: float = 1.0,
+    max_in_flight: Optional[int] = None,
+    rate: Optional[float] = None,
+    store: Optional[EarningsStore] = None,
+    fetch_fn=None,
 ) -> Dict[str, List[dict]]:
     """
     Fetch earnings data for multiple tickers.
+    Only tickers that are new or have a report due are downloaded
+    (concurrently, rate limited — see algo.async_fetch); the rest come
+    from the consolidated store.
+    fetch_fn(ticker) -> records replaces the yfinance download (tests).
     Returns: {ticker: [earnings_records]}
     """
-    result = {}
-    total = len(tickers)
-
-    for i, ticker in enumerate(tickers):
-        if i > 0 and i % max_per_batch == 0:
-            if i % 100 == 0:
-                print(f"  Earnings fetch: {i}/{total} tickers...")
-            time.sleep(delay)
-
-        records = fetch_earnings_for_ticker(ticker)
-        if records:
-            result[ticker] = records
-
-    print(f"  Fetched earnings for {len(result)}/{total} tickers")
+    from algo.async_fetch import fetch_all_sync
+    from algo.config import MACRO_ENGINE
+
+    store = store or EarningsStore()
+    tickers = list(dict.fromkeys(tickers))
+    today = date.today()
+    due = [t for t in tickers if store.needs_refresh(t, today)]
+
+    if due:
+        print(f"  Earnings fetch: {len(due)}/{len(tickers)} tickers new or due for a report...")
+
+        def on_result(ticker: str, records: List[dict]):
+            store.record_fetch(ticker, records, today)
+
+        fetch_all_sync(
+            due, fetch_fn or download_earnings, on_result=on_result,
+            max_in_flight=max_in_flight or MACRO_ENGINE.earnings_concurrency,
+            rate=rate or MACRO_ENGINE.earnings_rate_per_sec,
+            burst=MACRO_ENGINE.earnings_concurrency,
+            max_retries=MACRO_ENGINE.earnings_retries,
+            verbose=False,
+        )
+        store.save()
+
+    result = store.as_dict(tickers)
+    print(f"  Fetched earnings for {len(result)}/{len(tickers)} tickers")
     return result
 
 
@@ -167,145 +305,182 @@ def bulk_fetch_earnings(
 # EARNINGS CATALYST SCORING
 # ============================================================================
 
-def earnings_catalyst_score(
-    earnings_records: List[dict],
-    as_of_date,
-) -> float:
-    """
-    Compute earnings catalyst score (0-100) based on the most recent
-    earnings report on or before as_of_date.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NS_PER_DAY = 86_400_000_000_000
 
-    Components:
-      EPS Surprise (0-30): How much did EPS beat estimates?
-      Revenue Surprise (0-25): How much did revenue beat?
-      Revenue Acceleration (0-25): Is revenue growth accelerating QoQ?
-      Earnings Streak (0-20): How many consecutive beats?
-    """
-    if not earnings_records:
-        return 0.0
 
-    # Convert as_of_date
+def _day_number(as_of_date) -> int:
+    """Days since 1970-01-01 for a Timestamp / datetime / date / 'YYYY-MM-DD'."""
+    if isinstance(as_of_date, pd.Timestamp):
+        return int(as_of_date.value // _NS_PER_DAY)
     if hasattr(as_of_date, 'date'):
-        target = as_of_date.date()
+        as_of_date = as_of_date.date()
     elif isinstance(as_of_date, str):
-        target = datetime.strptime(as_of_date, "%Y-%m-%d").date()
-    else:
-        target = as_of_date
+        as_of_date = datetime.strptime(as_of_date, "%Y-%m-%d").date()
+    return as_of_date.toordinal() - _EPOCH_ORDINAL
 
-    # Find records on or before as_of_date
-    past_records = []
-    for r in earnings_records:
-        try:
-            r_date = datetime.strptime(r["date"], "%Y-%m-%d").date()
-            if r_date <= target:
-                past_records.append(r)
-        except Exception:
-            continue
 
-    if not past_records:
-        return 0.0
+class EarningsIndex:
+    """
+    One ticker's earnings calendar, parsed once.
 
-    # Most recent record
-    latest = past_records[-1]
-    score = 0.0
-
-    # === EPS Surprise (0-30) ===
-    eps_actual = latest.get("eps_actual")
-    eps_estimate = latest.get("eps_estimate")
-    if eps_actual is not None and eps_estimate is not None and eps_estimate != 0:
-        surprise_pct = (eps_actual - eps_estimate) / abs(eps_estimate) * 100
-        if surprise_pct >= 20:
-            score += 30
-        elif surprise_pct >= 10:
-            score += 20
-        elif surprise_pct >= 0:
-            score += 10
-        # Miss: 0 points (no penalty)
-
-    # === Revenue Surprise (0-25) ===
-    rev_actual = latest.get("revenue_actual")
-    rev_estimate = latest.get("revenue_estimate")
-    if rev_actual is not None and rev_estimate is not None and rev_estimate != 0:
-        rev_surprise_pct = (rev_actual - rev_estimate) / abs(rev_estimate) * 100
-        if rev_surprise_pct >= 5:
-            score += 25
-        elif rev_surprise_pct >= 2:
-            score += 15
-        elif rev_surprise_pct >= 0:
-            score += 8
-
-    # === Revenue Acceleration (0-25) ===
-    # Compare last 2 quarters of revenue
-    rev_values = []
-    for r in past_records[-4:]:
-        rev = r.get("revenue_actual")
-        if rev is not None and rev > 0:
-            rev_values.append(rev)
-
-    if len(rev_values) >= 3:
-        growth_recent = (rev_values[-1] / rev_values[-2] - 1) * 100
-        growth_prior = (rev_values[-2] / rev_values[-3] - 1) * 100
-        if growth_recent > growth_prior and growth_recent > 0:
-            score += 25  # Accelerating
-        elif growth_recent > 0:
-            score += 15  # Steady growth
-        else:
-            score += 5   # Decelerating
-    elif len(rev_values) >= 2:
-        growth = (rev_values[-1] / rev_values[-2] - 1) * 100
-        if growth > 5:
-            score += 20
-        elif growth > 0:
-            score += 10
-
-    # === Earnings Beat Streak (0-20) ===
-    streak = 0
-    for r in reversed(past_records):
-        ea = r.get("eps_actual")
-        ee = r.get("eps_estimate")
-        if ea is not None and ee is not None:
-            if ea >= ee:
+      days   int64[n]   report dates (days since epoch), sorted
+      score  float64[n] catalyst score as of report k (using reports 0..k)
+
+    "Latest report as of date" and "any report within N days" are binary
+    searches, so catalyst scoring costs O(log n) with no string parsing.
+    """
+
+    def __init__(self, earnings_records: List[dict]):
+        parsed = []
+        for r in earnings_records or []:
+            try:
+                d = datetime.strptime(r["date"], "%Y-%m-%d").date()
+            except Exception:
+                continue
+            parsed.append((d.toordinal() - _EPOCH_ORDINAL, r))
+        parsed.sort(key=lambda x: x[0])  # stable: same-day records keep their order
+        self.days = np.array([d for d, _ in parsed], dtype=np.int64)
+        self.score = self._cumulative_scores([r for _, r in parsed])
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @staticmethod
+    def _cumulative_scores(records: List[dict]) -> np.ndarray:
+        """
+        Catalyst score (0-100) as of each report, using that report and the
+        ones before it.
+
+        Components:
+          EPS Surprise (0-30): How much did EPS beat estimates?
+          Revenue Surprise (0-25): How much did revenue beat?
+          Revenue Acceleration (0-25): Is revenue growth accelerating QoQ?
+          Earnings Streak (0-20): How many consecutive beats?
+        """
+        scores = np.zeros(len(records))
+        streak = 0
+        for k, latest in enumerate(records):
+            score = 0.0
+
+            # === EPS Surprise (0-30) ===
+            eps_actual = latest.get("eps_actual")
+            eps_estimate = latest.get("eps_estimate")
+            if eps_actual is not None and eps_estimate is not None and eps_estimate != 0:
+                surprise_pct = (eps_actual - eps_estimate) / abs(eps_estimate) * 100
+                if surprise_pct >= 20:
+                    score += 30
+                elif surprise_pct >= 10:
+                    score += 20
+                elif surprise_pct >= 0:
+                    score += 10
+                # Miss: 0 points (no penalty)
+
+            # === Revenue Surprise (0-25) ===
+            rev_actual = latest.get("revenue_actual")
+            rev_estimate = latest.get("revenue_estimate")
+            if rev_actual is not None and rev_estimate is not None and rev_estimate != 0:
+                rev_surprise_pct = (rev_actual - rev_estimate) / abs(rev_estimate) * 100
+                if rev_surprise_pct >= 5:
+                    score += 25
+                elif rev_surprise_pct >= 2:
+                    score += 15
+                elif rev_surprise_pct >= 0:
+                    score += 8
+
+            # === Revenue Acceleration (0-25) ===
+            # Compare last 2 quarters of revenue
+            rev_values = []
+            for r in records[max(0, k - 3):k + 1]:
+                rev = r.get("revenue_actual")
+                if rev is not None and rev > 0:
+                    rev_values.append(rev)
+
+            if len(rev_values) >= 3:
+                growth_recent = (rev_values[-1] / rev_values[-2] - 1) * 100
+                growth_prior = (rev_values[-2] / rev_values[-3] - 1) * 100
+                if growth_recent > growth_prior and growth_recent > 0:
+                    score += 25  # Accelerating
+                elif growth_recent > 0:
+                    score += 15  # Steady growth
+                else:
+                    score += 5   # Decelerating
+            elif len(rev_values) >= 2:
+                growth = (rev_values[-1] / rev_values[-2] - 1) * 100
+                if growth > 5:
+                    score += 20
+                elif growth > 0:
+                    score += 10
+
+            # === Earnings Beat Streak (0-20) ===
+            # Consecutive beats ending at this report (a miss or a report
+            # without EPS data ends the streak)
+            if eps_actual is not None and eps_estimate is not None and eps_actual >= eps_estimate:
                 streak += 1
             else:
-                break
-        else:
-            break
+                streak = 0
+
+            if streak >= 3:
+                score += 20
+            elif streak >= 2:
+                score += 10
+            elif streak >= 1:
+                score += 5
+
+            scores[k] = min(100.0, score)
+        return scores
 
-    if streak >= 3:
-        score += 20
-    elif streak >= 2:
-        score += 10
-    elif streak >= 1:
-        score += 5
+    def latest_position(self, as_of_date) -> int:
+        """Index of the latest report on or before as_of_date (-1 if none)."""
+        return int(np.searchsorted(self.days, _day_number(as_of_date), side="right")) - 1
 
-    return min(100.0, score)
+    def catalyst_score(self, as_of_date) -> float:
+        k = self.latest_position(as_of_date)
+        return float(self.score[k]) if k >= 0 else 0.0
+
+    def near(self, as_of_date, window_days: int = 3) -> bool:
+        """True if a report falls within window_days of as_of_date."""
+        target = _day_number(as_of_date)
+        k = int(np.searchsorted(self.days, target - window_days, side="left"))
+        return k < len(self.days) and self.days[k] <= target + window_days
+
+
+def build_earnings_index(earnings_data: Dict[str, list]) -> Dict[str, EarningsIndex]:
+    """{ticker: EarningsIndex} for {ticker: records} (existing indexes pass through)."""
+    return {
+        t: recs if isinstance(recs, EarningsIndex) else EarningsIndex(recs)
+        for t, recs in earnings_data.items()
+    }
+
+
+def earnings_catalyst_score(
+    earnings_records,
+    as_of_date,
+) -> float:
+    """
+    Compute earnings catalyst score (0-100) based on the most recent
+    earnings report on or before as_of_date (see EarningsIndex).
+    earnings_records: list of records or a prebuilt EarningsIndex.
+    """
+    if not earnings_records:
+        return 0.0
+    if not isinstance(earnings_records, EarningsIndex):
+        earnings_records = EarningsIndex(earnings_records)
+    return earnings_records.catalyst_score(as_of_date)
 
 
 def is_near_earnings(
-    earnings_records: List[dict],
+    earnings_records,
     as_of_date,
     window_days: int = 3,
 ) -> bool:
     """
     Check if there's an earnings event within window_days of as_of_date.
     Used to determine if an EP gap is earnings-driven.
+    earnings_records: list of records or a prebuilt EarningsIndex.
     """
     if not earnings_records:
         return False
-
-    if hasattr(as_of_date, 'date'):
-        target = as_of_date.date()
-    elif isinstance(as_of_date, str):
-        target = datetime.strptime(as_of_date, "%Y-%m-%d").date()
-    else:
-        target = as_of_date
-
-    for r in earnings_records:
-        try:
-            r_date = datetime.strptime(r["date"], "%Y-%m-%d").date()
-            if abs((r_date - target).days) <= window_days:
-                return True
-        except Exception:
-            continue
-
-    return False
+    if not isinstance(earnings_records, EarningsIndex):
+        earnings_records = EarningsIndex(earnings_records)
+    return earnings_records.near(as_of_date, window_days)
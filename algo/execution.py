@@ -0,0 +1,220 @@
+"""
+EXECUTION — Order queue filled against daily OHLC bars
+======================================================
+Orders wait in an OrderQueue until a bar is processed against them; every
+working order of the day is evaluated in one array pass:
+
+  CLOSE   fill at the bar's close (legacy backtest: enter on the scan day)
+  MOO     market-on-open: fill at the bar's open
+  STOP    buy stop:  high >= price, fill at max(open, price)
+          sell stop: low <= price,  fill at min(open, price)
+  LIMIT   buy limit:  low <= price,  fill at min(open, price)
+          sell limit: high >= price, fill at max(open, price)
+
+An order that does not fill stays queued for `ttl` processed bars (None =
+good till cancelled). Fills come back in submission order, so a queue
+filled from a ranked candidate list keeps its ranking.
+
+The backtest queues its entries here (config EXECUTION.entry_order):
+"CLOSE" keeps the old same-day close entry, the other types fill on the
+next bar. LocalBroker wraps a queue as a stand-in broker for LiveTrader.
+"""
+
+import itertools
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from algo.universe_panel import UniversePanel
+
+
+ORDER_TYPES = ("CLOSE", "MOO", "STOP", "LIMIT")
+SIDES = ("BUY", "SELL")
+
+
+@dataclass
+class Fill:
+    """One filled order."""
+    order_id: int
+    ticker: str
+    side: str
+    order_type: str
+    price: float
+    shares: int
+    tag: Any = None  # whatever the submitter attached (e.g. the ScanResult)
+
+
+def fill_prices(type_code: np.ndarray, is_buy: np.ndarray, price: np.ndarray,
+                open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (filled, fill price) for orders against their bars (NaN bar = no fill).
+    type_code indexes ORDER_TYPES.
+    """
+    is_close, is_moo, is_stop, is_limit = (type_code == k for k in range(len(ORDER_TYPES)))
+    # A buy stop and a sell limit trigger on the high, the others on the low
+    on_high = (is_stop & is_buy) | (is_limit & ~is_buy)
+    with np.errstate(invalid="ignore"):
+        touched = np.where(on_high, high >= price, low <= price)
+    gap = np.where(on_high, np.fmax(open_, price), np.fmin(open_, price))
+    filled = np.select([is_close, is_moo], [~np.isnan(close), ~np.isnan(open_)],
+                       touched & ~np.isnan(open_))
+    fill = np.select([is_close, is_moo], [close, open_], gap)
+    return filled, fill
+
+
+class OrderQueue:
+    """Working orders as parallel columns, filled bar by bar in one pass."""
+
+    _FIELDS = ("order_id", "ticker", "side", "order_type", "price", "shares", "ttl", "tag")
+
+    def __init__(self):
+        self._cols: Dict[str, list] = {f: [] for f in self._FIELDS}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._cols["order_id"])
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self._cols["ticker"])
+
+    @property
+    def tags(self) -> List[Any]:
+        return list(self._cols["tag"])
+
+    def submit(self, ticker: str, order_type: str = "MOO", price: float = np.nan,
+               side: str = "BUY", shares: int = 0, ttl: Optional[int] = 1,
+               tag: Any = None) -> int:
+        """Queue an order; returns its id. price is required for STOP / LIMIT."""
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Unknown order type '{order_type}' (expected one of {ORDER_TYPES})")
+        if side not in SIDES:
+            raise ValueError(f"Unknown side '{side}' (expected one of {SIDES})")
+        if order_type in ("STOP", "LIMIT") and not np.isfinite(price):
+            raise ValueError(f"{order_type} order for {ticker} needs a price")
+        order_id = next(self._ids)
+        values = {"order_id": order_id, "ticker": ticker, "side": side, "order_type": order_type,
+                  "price": float(price), "shares": int(shares), "ttl": ttl, "tag": tag}
+        for f, v in values.items():
+            self._cols[f].append(v)
+        return order_id
+
+    def cancel(self, order_id: int) -> bool:
+        if order_id not in self._cols["order_id"]:
+            return False
+        self._keep(np.array([oid != order_id for oid in self._cols["order_id"]], dtype=bool))
+        return True
+
+    def clear(self):
+        self._keep(np.zeros(len(self), dtype=bool))
+
+    def _keep(self, mask: np.ndarray):
+        for f, col in self._cols.items():
+            self._cols[f] = [v for v, k in zip(col, mask) if k]
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+
+    def process(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                close: np.ndarray) -> List[Fill]:
+        """
+        Fill the queue against one bar per order (arrays aligned with the
+        queue, NaN = no bar). Filled orders leave the queue, unfilled ones
+        lose one bar of ttl and leave when it runs out.
+        """
+        n = len(self)
+        if n == 0:
+            return []
+        c = self._cols
+        type_code = np.array([ORDER_TYPES.index(t) for t in c["order_type"]])
+        is_buy = np.array([s == "BUY" for s in c["side"]], dtype=bool)
+        filled, fill = fill_prices(type_code, is_buy, np.array(c["price"], dtype=float),
+                                   open_, high, low, close)
+
+        fills = [Fill(order_id=c["order_id"][j], ticker=c["ticker"][j], side=c["side"][j],
+                      order_type=c["order_type"][j], price=float(fill[j]),
+                      shares=c["shares"][j], tag=c["tag"][j])
+                 for j in np.flatnonzero(filled)]
+
+        ttl = [None if t is None else t - 1 for t in c["ttl"]]
+        c["ttl"] = ttl
+        self._keep(~filled & np.array([t is None or t > 0 for t in ttl], dtype=bool))
+        return fills
+
+    def process_panel(self, panel: UniversePanel, date) -> List[Fill]:
+        """
+        process() against the panel's bars for date. CLOSE orders take the
+        latest bar at or before date (as the scan saw it); the other types
+        need a bar on date itself.
+        """
+        if len(self) == 0:
+            return []
+        rows = panel.rows(self._cols["ticker"])
+        col = panel.date_col(date)
+        bars = {f: panel.asof_column(f, col, rows) for f in ("open", "high", "low", "close")}
+        if col >= 0:
+            src = np.where(rows >= 0, panel.last_valid[np.maximum(rows, 0), col], -1)
+            stale = (src != col) & np.array([t != "CLOSE" for t in self._cols["order_type"]])
+            for arr in bars.values():
+                arr[stale] = np.nan
+        return self.process(bars["open"], bars["high"], bars["low"], bars["close"])
+
+
+class LocalBroker:
+    """
+    In-process broker stand-in: orders go into an OrderQueue and fill when
+    bars are fed in with on_bars(). Same place_order signature as
+    LiveTrader.place_order, so paper runs exercise the live code path.
+    Fills carry the broker order id (the string place_order returned) in
+    Fill.tag; working_orders() lists the ids still working.
+    """
+
+    # LiveTrader order types -> queue order types
+    _TYPE_MAP = {"MARKET": "MOO", "LIMIT": "LIMIT", "STOP": "STOP"}
+
+    def __init__(self, cash: float = 0.0, ttl: Optional[int] = 1):
+        self.cash = cash
+        self.ttl = ttl  # bars an unfilled order stays working (1 = day order)
+        self.orders = OrderQueue()
+        self.positions: Dict[str, int] = {}
+        self.fills: List[Fill] = []
+        self._queue_ids: Dict[str, int] = {}  # broker order id -> queue order id
+
+    def place_order(self, ticker: str, side: str, shares: int, price: float = None,
+                    order_type: str = "LIMIT") -> str:
+        queue_type = "MOO" if price is None else self._TYPE_MAP.get(order_type, "LIMIT")
+        broker_id = f"LOCAL_{datetime.now().strftime('%Y%m%d')}_{len(self._queue_ids) + 1}"
+        self._queue_ids[broker_id] = self.orders.submit(
+            ticker, queue_type, price=np.nan if price is None else price,
+            side=side, shares=shares, ttl=self.ttl, tag=broker_id,
+        )
+        return broker_id
+
+    def cancel_order(self, order_id: str) -> bool:
+        queue_id = self._queue_ids.get(order_id)
+        return queue_id is not None and self.orders.cancel(queue_id)
+
+    def working_orders(self) -> set:
+        """Broker ids of the orders still working (not filled, cancelled or expired)."""
+        return set(self.orders.tags)
+
+    def on_bars(self, bars: Dict[str, Dict[str, float]]) -> List[Fill]:
+        """Fill working orders against {ticker: {open, high, low, close}}; updates cash/positions."""
+        tickers = self.orders.tickers
+        cols = {f: np.array([bars.get(t, {}).get(f, np.nan) for t in tickers], dtype=float)
+                for f in ("open", "high", "low", "close")}
+        fills = self.orders.process(cols["open"], cols["high"], cols["low"], cols["close"])
+        for f in fills:
+            sign = 1 if f.side == "BUY" else -1
+            self.cash -= sign * f.price * f.shares
+            held = self.positions.get(f.ticker, 0) + sign * f.shares
+            if held:
+                self.positions[f.ticker] = held
+            else:
+                self.positions.pop(f.ticker, None)
+        self.fills.extend(fills)
+        return fills
@@ -0,0 +1,134 @@
+"""
+FILL SIMULATOR — Stop / profit-target fills inside daily OHLC bars
+=================================================================
+A daily bar only says where price opened, closed and how far it ranged,
+not in which order. The fill model (config FILLS) makes that explicit:
+
+  path "close"  legacy daily model: a stop fills at its level whenever
+                low <= stop, profit targets are judged and filled on the
+                close, a stop moved by a partial applies from the next bar
+       "OLHC"   open -> low -> high -> close
+       "OHLC"   open -> high -> low -> close
+       "worst"  the order that hurts: with both a stop and a target inside
+                the bar the stop fills first, and after a target fills the
+                bar may still trade back down to the (moved) stop
+
+  gap_fills         with an intraday path, an open through a stop / target
+                    fills at the open instead of at the level
+  adr_slippage_pct  slippage as % of the ticker's ADR(20), floored at the
+                    flat SLIPPAGE_PCT (0 = flat slippage everywhere)
+
+Every function works on arrays with one entry per open position, so the
+position manager evaluates a whole day in a handful of array operations.
+Targets are given in R (multiples of the risk per share) so the "close"
+path compares exactly the close R-multiple the position manager tracks.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from algo.config import FILLS, FillModelConfig
+from algo.universe_panel import UniversePanel, trailing_mean
+
+
+PATHS = ("close", "OLHC", "OHLC", "worst")
+
+
+class FillSimulator:
+    """Vectorized stop / target fills for one fill model."""
+
+    def __init__(self, config: FillModelConfig = FILLS):
+        self.config = config
+        self._adr: Optional[Tuple[UniversePanel, np.ndarray]] = None
+
+    @property
+    def path(self) -> str:
+        path = self.config.path
+        if path not in PATHS:
+            raise ValueError(f"Unknown fill path '{path}' (expected one of {PATHS})")
+        return path
+
+    @property
+    def intraday(self) -> bool:
+        return self.path != "close"
+
+    # ------------------------------------------------------------------
+    # Slippage
+    # ------------------------------------------------------------------
+
+    def slippage(self, adr: Optional[np.ndarray], n: int, floor: float) -> np.ndarray:
+        """Per-position slippage fraction: adr_slippage_pct of ADR%, at least `floor`."""
+        if not self.config.adr_slippage_pct or adr is None:
+            return np.full(n, floor)
+        slip = self.config.adr_slippage_pct / 100.0 * adr / 100.0
+        return np.where(np.isnan(slip), floor, np.maximum(slip, floor))
+
+    def panel_adr(self, panel: UniversePanel, rows: np.ndarray, date) -> np.ndarray:
+        """
+        ADR(20) % as of date for panel rows: the ticker's last 20 bars, as
+        indicators.adr_pct (matrix built once per panel).
+        """
+        if self._adr is None or self._adr[0] is not panel:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                daily_range = ((panel.bar_values("high") - panel.bar_values("low"))
+                               / panel.bar_values("close") * 100.0)
+            self._adr = (panel, panel.on_calendar(trailing_mean(daily_range, 20)))
+        out = np.full(len(rows), np.nan)
+        col = panel.date_col(date)
+        if col < 0:
+            return out
+        ok = rows >= 0
+        out[ok] = self._adr[1][rows[ok], col]
+        return out
+
+    # ------------------------------------------------------------------
+    # Fills
+    # ------------------------------------------------------------------
+
+    def _gap(self, mask: np.ndarray) -> np.ndarray:
+        return mask if self.intraday and self.config.gap_fills else np.zeros_like(mask)
+
+    def stop(self, open_: np.ndarray, low: np.ndarray, stop: np.ndarray,
+             slip: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(hit, fill price) of sell stops: low <= stop, gap opens fill at the open."""
+        hit = low <= stop
+        level = np.where(self._gap(open_ <= stop), open_, stop)
+        return hit, level * (1 - slip)
+
+    def target(self, target_r: np.ndarray, open_: np.ndarray, high: np.ndarray,
+               close: np.ndarray, entry: np.ndarray, risk: np.ndarray,
+               r_close: np.ndarray, slip: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (hit, fill price) of sell targets at entry + target_r * risk.
+        "close": hit when the close R-multiple reaches target_r, filled at
+        the close. Intraday paths: hit when the high reaches the target,
+        filled at the target (at the open if it gapped above it).
+        """
+        if not self.intraday:
+            return r_close >= target_r, close * (1 - slip)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r_high = np.where(risk > 0, (high - entry) / risk, -np.inf)
+            level = entry + target_r * risk
+        level = np.where(self._gap(open_ >= level), open_, level)
+        return r_high >= target_r, level * (1 - slip)
+
+    def stop_first(self, open_: np.ndarray, stop: np.ndarray, target_level: np.ndarray) -> np.ndarray:
+        """Where a bar touches both the stop and the next target: does the stop fill first?"""
+        path = self.path
+        if path == "close":
+            return np.ones(len(open_), dtype=bool)
+        gap_stop = self._gap(open_ <= stop)
+        gap_target = self._gap(open_ >= target_level)
+        if path == "OHLC":
+            return gap_stop
+        return ~gap_target  # OLHC / worst: the low comes first unless the open is above the target
+
+    def retouch(self, low: np.ndarray, close: np.ndarray, level: np.ndarray) -> np.ndarray:
+        """After the bar's high, does price trade back down to level (a stop raised intrabar)?"""
+        path = self.path
+        if path == "close":
+            return np.zeros(len(low), dtype=bool)
+        if path == "OLHC":
+            return close <= level  # only the close is left after the high
+        return low <= level
@@ -0,0 +1,118 @@
+"""
+INDICATOR PANEL — Precomputed per-ticker indicator columns
+==========================================================
+Every indicator the scanners read is a causal rolling series: its value at
+row i only depends on bars 0..i. So instead of recomputing the full series
+on every scan call just to read one row, we compute each series ONCE per
+ticker and let the scanners do O(1) row lookups.
+
+Panel columns (one row per bar of the ticker's own OHLCV frame):
+  adr             ADR(20) %
+  sma200          200 SMA of close
+  atr14           ATR(14)
+  vcp             VCP score (5d ATR vs 20d ATR, 0-100)
+  vol_contraction 5d avg volume / 20d SMA volume (dry-up ratio)
+  ma_aligned      MA stack for QMAG.trend_mas (1.0 / 0.0)
+  ma_aligned_std  MA stack for 10/20/50 (breakout scanner)
+  rvol            Volume / 50d SMA volume
+  avg_vol50       50d SMA volume
+  squeeze         Bollinger squeeze (1.0 / 0.0)
+  rs              63d return minus SPY 63d return
+  rs_rank         cross-sectional percentile (0-100) of rs among every
+                  ticker with a bar that day; only set by build_indicator_panels
+                  / add_rs_ranks, which see the whole universe
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+
+from algo.indicators import (
+    sma, adr_pct, atr, relative_volume, volume_contraction,
+    vcp_score, ma_alignment, bollinger_squeeze,
+)
+from algo.config import QMAG
+
+
+BREAKOUT_MAS = [10, 20, 50]
+
+
+def build_indicator_panel(df: pd.DataFrame, spy_close: pd.Series,
+                          trend_mas: Optional[List[int]] = None) -> pd.DataFrame:
+    """
+    Compute every scanner indicator for one ticker over its full history.
+    Returns a float DataFrame on the same index as df (booleans as 1.0/0.0).
+    """
+    trend_mas = list(trend_mas or QMAG.trend_mas)
+    close = df["close"]
+    vol = df["volume"]
+
+    aligned = ma_alignment(df, trend_mas)
+    if sorted(trend_mas) == BREAKOUT_MAS:
+        aligned_std = aligned
+    else:
+        aligned_std = ma_alignment(df, BREAKOUT_MAS)
+
+    # RS on the ticker's own dates (SPY return aligned by date, not position)
+    stock_ret = close.pct_change(63)
+    if spy_close is not None and len(spy_close) > 0:
+        bench_ret = spy_close.pct_change(63).reindex(df.index)
+    else:
+        bench_ret = pd.Series(np.nan, index=df.index)
+
+    panel = pd.DataFrame({
+        "adr": adr_pct(df, 20),
+        "sma200": sma(close, 200),
+        "atr14": atr(df, 14),
+        "vcp": vcp_score(df),
+        "vol_contraction": volume_contraction(vol, 20),
+        "ma_aligned": aligned,
+        "ma_aligned_std": aligned_std,
+        "rvol": relative_volume(vol, 50),
+        "avg_vol50": sma(vol, 50),
+        "squeeze": bollinger_squeeze(close),
+        "rs": stock_ret - bench_ret,
+    }, index=df.index)
+    return panel.astype(float)
+
+
+def build_indicator_panels(universe_data: Dict[str, pd.DataFrame],
+                           spy_close: pd.Series,
+                           trend_mas: Optional[List[int]] = None) -> Dict[str, pd.DataFrame]:
+    """Build indicator panels for every ticker in the universe."""
+    panels = {}
+    for ticker, df in universe_data.items():
+        if df.empty:
+            continue
+        panels[ticker] = build_indicator_panel(df, spy_close, trend_mas)
+    return add_rs_ranks(panels)
+
+
+def rs_rank_matrix(panels: Dict[str, pd.DataFrame]):
+    """
+    RS percentile ranks for every ticker on every date, in one pass.
+    Scatters each panel's rs column into a date x ticker matrix (NaN where
+    the ticker has no bar) and ranks every row at once, like rs_rank does
+    for a single day: average rank of ties, pct=True, scaled to 0-100.
+    Returns (dates, tickers, ranks[date, ticker]).
+    """
+    tickers = [t for t, p in panels.items() if len(p)]
+    if not tickers:
+        return pd.DatetimeIndex([]), tickers, np.empty((0, 0))
+    stamps = np.concatenate([panels[t].index.values.astype("datetime64[ns]") for t in tickers])
+    dates = pd.DatetimeIndex(np.unique(stamps))
+
+    rs = np.full((len(dates), len(tickers)), np.nan)
+    for k, t in enumerate(tickers):
+        rows = dates.get_indexer(panels[t].index)
+        rs[rows, k] = panels[t]["rs"].values
+    ranks = pd.DataFrame(rs).rank(axis=1, pct=True).values * 100.0
+    return dates, tickers, ranks
+
+
+def add_rs_ranks(panels: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Add the rs_rank column to every panel (in place); returns panels."""
+    dates, tickers, ranks = rs_rank_matrix(panels)
+    for k, t in enumerate(tickers):
+        panels[t]["rs_rank"] = ranks[dates.get_indexer(panels[t].index), k]
+    return panels
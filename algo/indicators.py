@@ -12,7 +12,6 @@ import pandas as pd
 import numpy as np
 from typing import Optional, Tuple, Dict
 from datetime import date, datetime
-import math
 
 
 # ============================================================================
@@ -259,15 +258,11 @@ def kitchin_sine_wave(dates: pd.DatetimeIndex, anchor_date: date,
     Returns normalized 0-100 (0 = trough, 100 = peak).
     """
     cycle_days = period_months * 30.44
-    values = []
-    for d in dates:
-        as_of = d.date() if hasattr(d, 'date') else d
-        days_since = (as_of - anchor_date).days
-        phase = (days_since % cycle_days) / cycle_days * 2 * math.pi
-        sine = math.sin(phase - math.pi / 2)  # -1 at trough, +1 at peak
-        norm = (sine + 1) / 2 * 100  # 0-100
-        values.append(norm)
-    return pd.Series(values, index=dates)
+    days_since = (pd.DatetimeIndex(dates).normalize() - pd.Timestamp(anchor_date)).days.values
+    phase = np.mod(days_since, cycle_days) / cycle_days * 2 * np.pi
+    sine = np.sin(phase - np.pi / 2)  # -1 at trough, +1 at peak
+    norm = (sine + 1) / 2 * 100  # 0-100
+    return pd.Series(norm, index=dates)
 
 
 # ============================================================================
@@ -404,6 +399,67 @@ def cme_t35_score_adjustment(as_of_date) -> float:
     return 1.0
 
 
+# Vectorized equivalents of is_cme_t35_window / cme_t35_score_adjustment for a
+# whole DatetimeIndex. Expiries are ~91 days apart, so at most one expiry can
+# be 33-55 days back: only the latest expiry at least `buffer_start` days
+# before each date has to be checked (restricted, like the scalar versions,
+# to expiries in the date's year or the year before).
+
+CME_EXPIRY_MONTHS = (3, 6, 9, 12)
+CME_MAX_SCORE_MULT = 1.2
+
+_cme_calendars: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def cme_expiry_calendar(first_year: int, last_year: int) -> np.ndarray:
+    """Quarterly CME expiries of first_year..last_year (datetime64[D], ascending, cached)."""
+    key = (first_year, last_year)
+    cal = _cme_calendars.get(key)
+    if cal is None:
+        cal = np.array([cme_quarterly_expiry(y, m)
+                        for y in range(first_year, last_year + 1)
+                        for m in CME_EXPIRY_MONTHS], dtype="datetime64[D]")
+        _cme_calendars[key] = cal
+    return cal
+
+
+def _cme_days_since(days: np.ndarray, years: np.ndarray, min_days: int) -> np.ndarray:
+    """Days since the latest expiry >= min_days before each day (-1 if none in year-1/year)."""
+    cal = cme_expiry_calendar(int(years.min()) - 1, int(years.max()))
+    cal_days = cal.astype(np.int64)
+    cal_years = cal.astype("datetime64[Y]").astype(np.int64) + 1970
+    k = np.searchsorted(cal_days, days - min_days, side="right") - 1
+    kk = np.maximum(k, 0)
+    valid = (k >= 0) & (cal_years[kk] >= years - 1)
+    return np.where(valid, days - cal_days[kk], -1)
+
+
+def cme_t35_series(dates, buffer_start: int = 33, buffer_end: int = 44) -> pd.DataFrame:
+    """
+    CME timing for every date at once, indexed by `dates`:
+      t35_window  is_cme_t35_window(date, buffer_start, buffer_end)
+      score_mult  cme_t35_score_adjustment(date)  (0.5 / 1.0 / 1.2)
+    """
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) == 0:
+        return pd.DataFrame({"t35_window": np.zeros(0, dtype=bool),
+                             "score_mult": np.zeros(0)}, index=dates)
+    day = dates.normalize().values.astype("datetime64[D]")
+    days = day.astype(np.int64)
+    years = day.astype("datetime64[Y]").astype(np.int64) + 1970
+
+    since = _cme_days_since(days, years, buffer_start)
+    window = (since >= buffer_start) & (since <= buffer_end)
+
+    since = _cme_days_since(days, years, 33)
+    score_mult = np.select(
+        [(since >= 33) & (since <= 44), (since >= 45) & (since <= 55)],
+        [0.5, CME_MAX_SCORE_MULT],
+        1.0,
+    )
+    return pd.DataFrame({"t35_window": window, "score_mult": score_mult}, index=dates)
+
+
 # ============================================================================
 # SECTOR RELATIVE STRENGTH
 # ============================================================================
@@ -470,19 +526,28 @@ TICKER_SECTOR_MAP = {
 
 
 def sector_strength(sector_etf_data: Dict[str, pd.DataFrame], spy_close: pd.Series,
-                     lookback: int = 63) -> Dict[str, float]:
+                     lookback: int = 63,
+                     as_of_positions: Optional[Dict[str, int]] = None) -> Dict[str, float]:
     """
     Calculate relative strength of each sector ETF vs SPY.
     Returns dict: sector_etf -> RS score (-1 to +1).
     Positive = outperforming SPY, negative = underperforming.
+    as_of_positions: per-ETF last visible bar, so full-history frames can be
+    passed without truncating them first.
     """
     sector_rs = {}
     for etf, df in sector_etf_data.items():
-        if df.empty or len(df) < lookback:
+        if as_of_positions is not None:
+            if etf not in as_of_positions:
+                continue
+            end = as_of_positions[etf]
+        else:
+            end = len(df) - 1
+        if df.empty or end + 1 < lookback:
             continue
         close = df["close"]
-        if len(close) >= lookback and len(spy_close) >= lookback:
-            stock_ret = (close.iloc[-1] / close.iloc[-lookback] - 1)
+        if len(spy_close) >= lookback:
+            stock_ret = (close.iloc[end] / close.iloc[end + 1 - lookback] - 1)
             bench_ret = (spy_close.iloc[-1] / spy_close.iloc[-lookback] - 1)
             sector_rs[etf] = stock_ret - bench_ret
     return sector_rs
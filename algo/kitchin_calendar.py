@@ -0,0 +1,97 @@
+"""
+KITCHIN CALENDAR — Vectorized Kitchin cycle state for a DatetimeIndex
+=====================================================================
+Everything the system derives from the Kitchin cycles, for every date of a
+calendar at once (numpy arrays aligned with `dates`):
+
+  position / china_position       0.0 (trough) .. 1.0 (next trough)
+  phase_code / china_phase_code   index into PHASES
+  score                           KITCHIN.get_cycle_score (US cycle)
+  sizing_mult / china_sizing_mult KITCHIN.get_cycle_sizing_multiplier
+  rotation_mult                   kitchin_rotation_signal multiplier
+                                  (China ADR sizing, US vs China phase)
+
+Built once per calendar: the backtest builds it for its trading days,
+the scan and the live trader for today.
+"""
+
+from datetime import date
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from algo.config import KITCHIN, KitchinCycleConfig
+
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_numbers(dates: pd.DatetimeIndex) -> np.ndarray:
+    return dates.normalize().values.astype("datetime64[D]").astype(np.int64)
+
+
+def cycle_positions(dates: pd.DatetimeIndex, anchor_date: date,
+                    period_months: float = 41.0) -> np.ndarray:
+    """kitchin_cycle_position for every date."""
+    cycle_days = period_months * 30.44
+    days_since = _day_numbers(pd.DatetimeIndex(dates)) - (anchor_date - _EPOCH).days
+    return np.mod(days_since.astype(float), cycle_days) / cycle_days
+
+
+def cycle_scores(position: np.ndarray, config: KitchinCycleConfig = KITCHIN) -> np.ndarray:
+    """KitchinCycleConfig.get_cycle_score for every position."""
+    p = np.asarray(position, dtype=float)
+    xs = np.asarray(config.score_positions, dtype=float)
+    ys = np.asarray(config.score_values, dtype=float)
+    i = np.clip(np.searchsorted(xs, p, side="right"), 1, len(xs) - 1) - 1
+    return ys[i] + (p - xs[i]) / (xs[i + 1] - xs[i]) * (ys[i + 1] - ys[i])
+
+
+class KitchinCalendar:
+    """US and China Kitchin cycle state for every date of a calendar."""
+
+    def __init__(self, dates: Iterable, config: KitchinCycleConfig = KITCHIN):
+        from algo.macro_engine import kitchin_rotation_multiplier
+
+        self.dates = pd.DatetimeIndex(list(dates) if not isinstance(dates, pd.DatetimeIndex) else dates)
+
+        # Phase bucket (between config.phase_edges) -> phase code / sizing multiplier
+        self.phases: List[str] = list(dict.fromkeys(config.phase_labels))
+        bucket_code = np.array([self.phases.index(lbl) for lbl in config.phase_labels])
+        phase_mult = np.array([config.phase_multipliers.get(lbl, 1.0) for lbl in config.phase_labels])
+        rotation = np.array([[kitchin_rotation_multiplier(us, cn) for cn in self.phases]
+                             for us in self.phases])
+
+        self.position = cycle_positions(self.dates, config.c3_trough, config.period_months)
+        self.china_position = cycle_positions(self.dates, config.china_trough,
+                                              config.china_period_months)
+
+        edges = np.asarray(config.phase_edges, dtype=float)
+        us_bucket = np.searchsorted(edges, self.position, side="right")
+        cn_bucket = np.searchsorted(edges, self.china_position, side="right")
+        self.phase_code = bucket_code[us_bucket]
+        self.china_phase_code = bucket_code[cn_bucket]
+        self.score = cycle_scores(self.position, config)
+        self.sizing_mult = phase_mult[us_bucket]
+        self.china_sizing_mult = phase_mult[cn_bucket]
+        self.rotation_mult = rotation[self.phase_code, self.china_phase_code]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def phase(self, i: int) -> str:
+        return self.phases[self.phase_code[i]]
+
+    def china_phase(self, i: int) -> str:
+        return self.phases[self.china_phase_code[i]]
+
+    def index_of(self, as_of_date) -> int:
+        """Position of the latest calendar date on or before as_of_date (-1 if none)."""
+        return int(np.searchsorted(self.dates.values, np.datetime64(pd.Timestamp(as_of_date)),
+                                   side="right")) - 1
+
+
+def kitchin_today(config: KitchinCycleConfig = KITCHIN) -> KitchinCalendar:
+    """One-day calendar for the current date (scan / live paths)."""
+    return KitchinCalendar([pd.Timestamp(date.today())], config)
@@ -69,9 +69,13 @@ class LiveTrader:
         trader.execute_signals(signals)
     """
 
-    def __init__(self, config: LiveConfig = None):
+    def __init__(self, config: LiveConfig = None, broker=None):
         self.config = config or LiveConfig()
+        self.broker = broker  # e.g. algo.execution.LocalBroker: orders fill on fed bars
         self.positions: Dict[str, LivePosition] = {}
+        # With a broker, positions open on the BUY fill: order id -> position to open
+        self.pending_orders: Dict[str, LivePosition] = {}
+        self.exit_orders: Dict[str, str] = {}  # order id -> ticker of working SELLs
         self.trade_log: List[dict] = []
         self.trade_ctx = None
         self.quote_ctx = None
@@ -175,6 +179,12 @@ class LiveTrader:
         # Map ticker to Longbridge symbol format
         symbol = f"US.{ticker}" if self.config.market == "US" else f"HK.{ticker}"
         
+        if self.broker is not None:
+            order_id = self.broker.place_order(ticker, side, shares, price, order_type)
+            print(f"[LOCAL] {side} {shares} {ticker} @ ${price or 'MKT'} -> {order_id}")
+            self._log_trade(ticker, side, shares, price or 0, order_id, "LOCAL")
+            return order_id
+
         if self.config.paper_trade:
             order_id = f"PAPER_{datetime.now().strftime('%Y%m%d%H%M%S')}_{ticker}"
             print(f"[PAPER] {side} {shares} {ticker} @ ${price or 'MKT'} -> {order_id}")
@@ -216,13 +226,13 @@ class LiveTrader:
 
     def execute_signals(self, signals: list, available_cash: float = None):
         """Execute trading signals from the scanner."""
-        from algo.config import KITCHIN, QMAG, MAX_POSITIONS
-        from algo.indicators import kitchin_cycle_position
+        from algo.config import QMAG, MAX_POSITIONS
+        from algo.kitchin_calendar import kitchin_today
         
-        today = date.today()
-        cycle_pos = kitchin_cycle_position(today, KITCHIN.c3_trough, KITCHIN.period_months)
-        cycle_mult = KITCHIN.get_cycle_sizing_multiplier(cycle_pos)
-        cycle_phase = KITCHIN.get_phase_label(cycle_pos)
+        kitchin = kitchin_today()
+        cycle_pos = kitchin.position[0]
+        cycle_mult = kitchin.sizing_mult[0]
+        cycle_phase = kitchin.phase(0)
         
         print(f"\nKitchin Phase: {cycle_phase} (pos={cycle_pos:.2f}, sizing mult={cycle_mult:.1f}x)")
         
@@ -243,7 +253,7 @@ class LiveTrader:
         
         for signal in signals[:max_new]:
             ticker = signal.ticker
-            if ticker in self.positions:
+            if ticker in self.positions or any(p.ticker == ticker for p in self.pending_orders.values()):
                 continue
             
             # Calculate position size
@@ -274,20 +284,86 @@ class LiveTrader:
             )
             
             if order_id:
-                self.positions[ticker] = LivePosition(
+                pos = LivePosition(
                     ticker=ticker,
                     shares=shares,
                     entry_price=signal.entry_price,
-                    entry_date=str(today),
+                    entry_date=str(date.today()),
                     stop_price=signal.stop_price,
                     setup_type=signal.setup_type,
                     score=signal.score,
                     order_id=order_id,
                 )
+                if self.broker is not None:
+                    self.pending_orders[order_id] = pos  # opened by process_bars on the fill
+                else:
+                    self.positions[ticker] = pos
+                    self._save_positions()
                 available_cash -= cost
-                self._save_positions()
                 
-        print(f"\nActive positions: {len(self.positions)}")
+        print(f"\nActive positions: {len(self.positions)}"
+              + (f" | Working orders: {len(self.pending_orders)}" if self.broker is not None else ""))
+
+    def process_bars(self, bars: Dict[str, Dict[str, float]]) -> list:
+        """
+        Feed {ticker: {open, high, low, close}} to the local broker and apply
+        its fills: a BUY fill opens (or adds to) the position its order was
+        placed for, at the fill price and size; a SELL fill reduces or closes
+        it. Orders the broker no longer works without a fill (expired or
+        cancelled) are dropped. Returns the fills.
+        """
+        if self.broker is None:
+            return []
+        fills = self.broker.on_bars(bars)
+        for f in fills:
+            print(f"[LOCAL FILL] {f.side} {f.shares} {f.ticker} @ ${f.price:.2f} ({f.order_type})")
+            if f.side == "BUY":
+                self._apply_buy_fill(f)
+            else:
+                self._apply_sell_fill(f)
+
+        working = self.broker.working_orders()
+        for order_id in [o for o in self.pending_orders if o not in working]:
+            print(f"[LOCAL] {self.pending_orders[order_id].ticker} order {order_id} expired unfilled")
+            del self.pending_orders[order_id]
+        for order_id in [o for o in self.exit_orders if o not in working]:
+            del self.exit_orders[order_id]
+
+        if fills:
+            self._save_positions()
+        return fills
+
+    def cancel_order(self, order_id: str) -> bool:
+        """Cancel a working local-broker order (and the position it would open)."""
+        if self.broker is None or not self.broker.cancel_order(order_id):
+            return False
+        self.pending_orders.pop(order_id, None)
+        self.exit_orders.pop(order_id, None)
+        return True
+
+    def _apply_buy_fill(self, f):
+        order = self.pending_orders.pop(f.tag, None)
+        pos = self.positions.get(f.ticker)
+        if pos is not None:  # add to an open position at the blended price
+            total = pos.shares + f.shares
+            pos.entry_price = (pos.entry_price * pos.shares + f.price * f.shares) / total
+            pos.shares = total
+        elif order is not None:
+            order.shares = f.shares
+            order.entry_price = f.price
+            order.highest_close = f.price
+            self.positions[f.ticker] = order
+        else:
+            print(f"[LOCAL] BUY fill {f.tag} for {f.ticker} has no tracked order; not recorded")
+
+    def _apply_sell_fill(self, f):
+        self.exit_orders.pop(f.tag, None)
+        pos = self.positions.get(f.ticker)
+        if pos is None:
+            return
+        pos.shares -= f.shares
+        if pos.shares <= 0:
+            del self.positions[f.ticker]
 
     def check_stops(self, current_prices: Dict[str, float]):
         """Check all positions against stop losses."""
@@ -305,8 +381,12 @@ class LiveTrader:
             # Check stop
             if price <= pos.stop_price:
                 print(f"STOP HIT: {ticker} at ${price:.2f} (stop=${pos.stop_price:.2f})")
+                if ticker in self.exit_orders.values():
+                    continue  # SELL already working at the local broker
                 order_id = self.place_order(ticker, "SELL", pos.shares, order_type="MARKET")
-                if order_id:
+                if order_id and self.broker is not None:
+                    self.exit_orders[order_id] = ticker  # closed by process_bars on the fill
+                elif order_id:
                     to_close.append(ticker)
         
         for ticker in to_close:
@@ -317,11 +397,11 @@ class LiveTrader:
 
     def portfolio_summary(self) -> dict:
         """Get current portfolio status."""
-        from algo.config import KITCHIN
-        from algo.indicators import kitchin_cycle_position
+        from algo.kitchin_calendar import kitchin_today
         
         today = date.today()
-        cycle_pos = kitchin_cycle_position(today, KITCHIN.c3_trough, KITCHIN.period_months)
+        kitchin = kitchin_today()
+        cycle_pos = float(kitchin.position[0])
         
         return {
             "date": str(today),
@@ -336,9 +416,9 @@ class LiveTrader:
                 }
                 for ticker, p in self.positions.items()
             },
-            "kitchin_phase": KITCHIN.get_phase_label(cycle_pos),
+            "kitchin_phase": kitchin.phase(0),
             "kitchin_position": round(cycle_pos, 3),
-            "cycle_sizing_mult": KITCHIN.get_cycle_sizing_multiplier(cycle_pos),
+            "cycle_sizing_mult": float(kitchin.sizing_mult[0]),
         }
 
     def _log_trade(self, ticker, side, shares, price, order_id, mode):
@@ -389,17 +469,17 @@ class LiveTrader:
 
 def run_live_cycle():
     """Run one cycle of the live trading system."""
-    from algo.config import KITCHIN
-    from algo.indicators import kitchin_cycle_position
+    from algo.kitchin_calendar import kitchin_today
     from algo.main import run_scan
     
     print(f"\n{'#'*70}")
     print(f"# LIVE TRADING SYSTEM")
     print(f"# {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    cycle_pos = kitchin_cycle_position(date.today(), KITCHIN.c3_trough, KITCHIN.period_months)
-    phase = KITCHIN.get_phase_label(cycle_pos)
-    mult = KITCHIN.get_cycle_sizing_multiplier(cycle_pos)
+    kitchin = kitchin_today()
+    cycle_pos = kitchin.position[0]
+    phase = kitchin.phase(0)
+    mult = kitchin.sizing_mult[0]
     
     print(f"# Kitchin: {phase} | Pos: {cycle_pos:.3f} | Size Mult: {mult:.1f}x")
     print(f"{'#'*70}\n")
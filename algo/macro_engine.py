@@ -250,6 +250,15 @@ def vix_signal(macro_data: Dict[str, pd.DataFrame], as_of_date) -> int:
 # COMPOSITE MACRO REGIME SCORE
 # ============================================================================
 
+DEFAULT_SIGNAL_WEIGHTS = {
+    "yield_curve": 0.30,    # Strongest forward predictor
+    "rate_direction": 0.25, # Fed policy direction
+    "copper_gold": 0.20,    # Growth expectations
+    "dollar": 0.15,         # Liquidity proxy
+    "vix": 0.10,           # Sentiment
+}
+
+
 def macro_regime_score(
     macro_data: Dict[str, pd.DataFrame],
     as_of_date,
@@ -260,13 +269,7 @@ def macro_regime_score(
     Weighted average of all forward-looking signals.
     """
     if weights is None:
-        weights = {
-            "yield_curve": 0.30,    # Strongest forward predictor
-            "rate_direction": 0.25, # Fed policy direction
-            "copper_gold": 0.20,    # Growth expectations
-            "dollar": 0.15,         # Liquidity proxy
-            "vix": 0.10,           # Sentiment
-        }
+        weights = DEFAULT_SIGNAL_WEIGHTS
 
     signals = {
         "yield_curve": yield_curve_signal(macro_data, as_of_date),
@@ -305,6 +308,175 @@ def macro_sizing_multiplier(
         return 1.0
 
 
+# ============================================================================
+# VECTORIZED REGIME SERIES (whole backtest calendar in one pass)
+# ============================================================================
+# Same rules as the per-day signal functions above, evaluated for every date
+# at once: for each series, p = number of bars on or before the date, and the
+# "tail" windows become rows of a sliding-window view ending at bar p - 1.
+
+SIGNAL_NAMES = ("yield_curve", "rate_direction", "copper_gold", "dollar", "vix")
+
+def _asof_counts(series: pd.Series, dates: np.ndarray) -> np.ndarray:
+    """Number of bars on or before each date."""
+    return np.searchsorted(series.index.values, dates, side="right")
+
+
+def _last(values: np.ndarray, p: np.ndarray, back: int = 1) -> np.ndarray:
+    """values[p - back] where p >= back, else NaN."""
+    out = np.full(len(p), np.nan)
+    ok = p >= back
+    out[ok] = values[p[ok] - back]
+    return out
+
+
+def _tail_windows(values: np.ndarray, p: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows, ok): rows[k] = values[p[k] - window : p[k]] for dates with p >= window."""
+    ok = p >= window
+    if len(values) < window:
+        return np.empty((len(p), window)), ok
+    view = np.lib.stride_tricks.sliding_window_view(values, window)
+    return view[np.where(ok, p - window, 0)], ok
+
+
+def _tail_mean(values: np.ndarray, p: np.ndarray, window: int) -> np.ndarray:
+    rows, ok = _tail_windows(values, p, window)
+    return np.where(ok, rows.mean(axis=1), np.nan)
+
+
+def _yield_curve_signals(macro_data, dates) -> np.ndarray:
+    out = np.zeros(len(dates), dtype=np.int64)
+    if "tnx" not in macro_data or "irx" not in macro_data:
+        return out
+    tnx, irx = macro_data["tnx"]["close"], macro_data["irx"]["close"]
+    pt, pi = _asof_counts(tnx, dates), _asof_counts(irx, dates)
+    tv, iv = tnx.values.astype(float), irx.values.astype(float)
+    has = (pt > 0) & (pi > 0)
+    with np.errstate(invalid="ignore"):
+        spread = _last(tv, pt) - _last(iv, pi)
+
+        # Un-inverting after an inversion in the last 6 months
+        lookback = 126
+        wt, ok_t = _tail_windows(tv, pt, lookback)
+        wi, ok_i = _tail_windows(iv, pi, lookback)
+        long_enough = (pt > lookback) & (pi > lookback) & ok_t & ok_i
+        was_inverted = long_enough & ((wt - wi) < 0).any(axis=1)
+        un_inverting = was_inverted & (spread > 0)
+
+        sig = np.select([spread < -0.5, spread < 0, spread > 1.0], [-1, -1, 1], 0)
+    sig = np.where(un_inverting, -1, sig)
+    return np.where(has, sig, 0)
+
+
+def _rate_direction_signals(macro_data, dates) -> np.ndarray:
+    out = np.zeros(len(dates), dtype=np.int64)
+    if "irx" not in macro_data:
+        return out
+    irx = macro_data["irx"]["close"]
+    p = _asof_counts(irx, dates)
+    v = irx.values.astype(float)
+    current = _last(v, p)
+    sma50 = _tail_mean(v, p, 50)
+    ago = _last(v, p, 63)
+    with np.errstate(invalid="ignore"):
+        has63 = p >= 63
+        easing = has63 & (current < sma50) & (current < ago)
+        tightening = has63 & ~easing & (current > sma50) & (current > ago)
+        sig = np.select([easing, tightening, current < sma50 * 0.95, current > sma50 * 1.05],
+                        [1, -1, 1, -1], 0)
+    return np.where(p >= 50, sig, 0)
+
+
+def _copper_gold_signals(macro_data, dates) -> np.ndarray:
+    out = np.zeros(len(dates), dtype=np.int64)
+    if "copper" not in macro_data or "gold" not in macro_data:
+        return out
+    copper, gold = macro_data["copper"]["close"], macro_data["gold"]["close"]
+    pc, pg = _asof_counts(copper, dates), _asof_counts(gold, dates)
+    cv, gv = copper.values.astype(float), gold.values.astype(float)
+    has = (pc >= 63) & (pg >= 63)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        au_now, au_3m = _last(gv, pg), _last(gv, pg, 63)
+        ratio_now = np.where(au_now > 0, _last(cv, pc) / au_now, 0)
+        ratio_3m = np.where(au_3m > 0, _last(cv, pc, 63) / au_3m, 0)
+        change_pct = (ratio_now / ratio_3m - 1) * 100
+        sig = np.select([change_pct > 5, change_pct < -5], [1, -1], 0)
+    return np.where(has & (ratio_3m > 0), sig, 0)
+
+
+def _dollar_signals(macro_data, dates) -> np.ndarray:
+    out = np.zeros(len(dates), dtype=np.int64)
+    if "dxy" not in macro_data:
+        return out
+    dxy = macro_data["dxy"]["close"]
+    p = _asof_counts(dxy, dates)
+    v = dxy.values.astype(float)
+    current = _last(v, p)
+    sma50 = _tail_mean(v, p, 50)
+    with np.errstate(invalid="ignore"):
+        sig = np.select([current < sma50 * 0.98, current > sma50 * 1.02], [1, -1], 0)
+    return np.where(p >= 50, sig, 0)
+
+
+def _vix_signals(macro_data, dates) -> np.ndarray:
+    out = np.zeros(len(dates), dtype=np.int64)
+    if "vix" not in macro_data:
+        return out
+    vix = macro_data["vix"]["close"]
+    p = _asof_counts(vix, dates)
+    v = vix.values.astype(float)
+    current = _last(v, p)
+    rows, ok = _tail_windows(v, p, 20)
+    recent_peak = np.where(ok, rows.max(axis=1), np.nan)
+    with np.errstate(invalid="ignore"):
+        reverting = (recent_peak > 30) & (current < recent_peak * 0.7)
+        sig = np.select([reverting, current > 35, current > 25, current < 15], [1, -1, 0, 1], 0)
+    return np.where(p >= 20, sig, 0)
+
+
+_SIGNAL_FUNCS = {
+    "yield_curve": _yield_curve_signals,
+    "rate_direction": _rate_direction_signals,
+    "copper_gold": _copper_gold_signals,
+    "dollar": _dollar_signals,
+    "vix": _vix_signals,
+}
+
+
+def macro_regime_series(
+    macro_data: Dict[str, pd.DataFrame],
+    dates,
+    weights: Dict[str, float] = None,
+    max_boost: float = 1.15,
+    max_penalty: float = 0.85,
+) -> pd.DataFrame:
+    """
+    Macro regime for every date in one pass. Columns: the five signals
+    (-1/0/+1), score (macro_regime_score) and multiplier
+    (macro_sizing_multiplier); indexed by dates.
+    """
+    if weights is None:
+        weights = DEFAULT_SIGNAL_WEIGHTS
+    index = pd.DatetimeIndex(dates)
+    d = index.values
+    out = {name: _SIGNAL_FUNCS[name](macro_data, d) for name in SIGNAL_NAMES}
+
+    score = 0
+    for name in SIGNAL_NAMES:
+        score = score + out[name] * weights.get(name, 0)
+    score = np.clip(np.asarray(score, dtype=float) * np.ones(len(d)), -1.0, 1.0)
+
+    with np.errstate(invalid="ignore"):
+        boost = 1.0 + np.minimum(1.0, (score - 0.5) / 0.5) * (max_boost - 1.0)
+        penalty = 1.0 - np.minimum(1.0, (-0.25 - score) / 0.75) * (1.0 - max_penalty)
+    multiplier = np.where(score > 0.5, boost, np.where(score < -0.25, penalty, 1.0))
+
+    frame = pd.DataFrame(out, index=index)
+    frame["score"] = score
+    frame["multiplier"] = multiplier
+    return frame
+
+
 # ============================================================================
 # KITCHIN CYCLE FORECASTING
 # ============================================================================
@@ -415,9 +587,18 @@ def kitchin_rotation_signal(as_of_date) -> Tuple[float, str]:
     This mult applies to China ADR sizing only.
     """
     forecast = kitchin_forecast(as_of_date, is_china=False)
-    divergence = forecast["divergence"]
-    us_phase = forecast["us_phase"]
-    china_phase = forecast["china_phase"]
+    return _rotation(forecast["us_phase"], forecast["china_phase"])
+
+
+def kitchin_rotation_multiplier(us_phase: str, china_phase: str) -> float:
+    """China ADR rotation multiplier for a pair of phase labels (see kitchin_rotation_signal)."""
+    return _rotation(us_phase, china_phase)[0]
+
+
+def _rotation(us_phase: str, china_phase: str) -> Tuple[float, str]:
+    us_phase_score = _phase_to_score(us_phase)
+    china_phase_score = _phase_to_score(china_phase)
+    divergence = round((china_phase_score - us_phase_score) / 100.0, 2)
 
     if divergence > 0.3:
         # China significantly ahead — favor China ADRs
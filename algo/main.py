@@ -4,11 +4,16 @@ MAIN — Unified Trading System Entry Point
 Modes:
   1. BACKTEST: Walk-forward simulation over historical data
   2. SCAN: Run current scanner on latest data
-  3. LIVE: Connect to Longbridge for live signals (future)
+  3. SWEEP: Parallel parameter sweep of the backtest (ranked table)
+  4. WALKFORWARD: Rolling train/test optimization, stitched out-of-sample curve
+  5. LIVE: Connect to Longbridge for live signals (future)
 
 Usage:
   python -m algo.main --mode backtest
+  python -m algo.main --mode backtest --snapshot .cache/snapshots/full
   python -m algo.main --mode scan
+  python -m algo.main --mode sweep --sweep-spec sweep.json
+  python -m algo.main --mode walkforward --sweep-spec sweep.json
   python -m algo.main --mode live
 """
 
@@ -28,18 +33,18 @@ from algo.config import (
 from algo.data_provider import YFinanceProvider
 from algo.backtest_engine import BacktestEngine
 from algo.scanner import run_full_scan
-from algo.indicators import kitchin_cycle_position
+from algo.kitchin_calendar import kitchin_today
 
 
-def run_backtest(
+def load_backtest_data(
     universe: list = None,
     start: str = BACKTEST_START,
     end: str = BACKTEST_END,
     capital: float = INITIAL_CAPITAL,
-    scan_freq: int = 3,
     universe_mode: str = "core",
 ):
-    """Run full backtest."""
+    """Fetch universe, SPY and sector ETF data. Returns (universe_data, spy_data,
+    sector_etf_data), or None when SPY is unavailable."""
     if universe is None:
         if universe_mode == "full":
             # Dynamic universe: discover and pre-filter 3000+ tickers
@@ -92,26 +97,134 @@ def run_backtest(
     sector_etf_data = {t: df for t, df in sector_etf_data.items() if not df.empty}
     print(f"Loaded {len(sector_etf_data)} sector ETFs")
 
-    # Run backtest
-    engine = BacktestEngine(
-        universe_data=universe_data,
-        spy_data=spy_data,
+    return universe_data, spy_data, sector_etf_data
+
+
+def load_backtest_snapshot(
+    path: str,
+    universe: list = None,
+    start: str = BACKTEST_START,
+    end: str = BACKTEST_END,
+    capital: float = INITIAL_CAPITAL,
+    universe_mode: str = "core",
+    rebuild: bool = False,
+):
+    """
+    Open the universe snapshot at path, building it first (via
+    load_backtest_data) when it is missing, was built for another universe
+    or date range, or rebuild is set. Returns a UniverseSnapshot, or None
+    when the data could not be loaded.
+    """
+    from algo.universe_snapshot import UniverseSnapshot, read_snapshot_meta, write_snapshot
+
+    meta = {
+        "start": start,
+        "end": end,
+        "universe_mode": universe_mode,
+        "universe": sorted(universe) if universe is not None else None,
+        "benchmark": BENCHMARK_TICKER,
+    }
+    if not rebuild and read_snapshot_meta(path) == meta:
+        snapshot = UniverseSnapshot(path)
+        print(f"Opened universe snapshot {snapshot.path} "
+              f"({len(snapshot.group_tickers('universe'))} tickers x {len(snapshot.dates)} days)")
+        return snapshot
+
+    loaded = load_backtest_data(universe, start, end, capital, universe_mode)
+    if loaded is None:
+        return None
+    universe_data, spy_data, sector_etf_data = loaded
+    bin_path = write_snapshot(path, universe_data, spy_data, sector_etf_data,
+                              benchmark=BENCHMARK_TICKER, meta=meta)
+    print(f"Universe snapshot written to: {bin_path}")
+    return UniverseSnapshot(path)
+
+
+def _load_backtest_inputs(
+    universe: list = None,
+    start: str = BACKTEST_START,
+    end: str = BACKTEST_END,
+    capital: float = INITIAL_CAPITAL,
+    universe_mode: str = "core",
+    snapshot: str = None,
+    rebuild_snapshot: bool = False,
+):
+    """
+    BacktestEngine data keyword arguments (universe_data, spy_data,
+    sector_etf_data, plus the memory-mapped universe_panel when loaded from
+    a snapshot), or None when the data could not be loaded.
+    """
+    if snapshot:
+        snap = load_backtest_snapshot(snapshot, universe, start, end, capital,
+                                      universe_mode, rebuild_snapshot)
+        if snap is None:
+            return None
+        return {
+            "universe_data": snap.universe_data,
+            "spy_data": snap.spy_data,
+            "sector_etf_data": snap.sector_etf_data,
+            "universe_panel": snap.panel("universe"),
+        }
+    loaded = load_backtest_data(universe, start, end, capital, universe_mode)
+    if loaded is None:
+        return None
+    universe_data, spy_data, sector_etf_data = loaded
+    return {"universe_data": universe_data, "spy_data": spy_data,
+            "sector_etf_data": sector_etf_data}
+
+
+def _load_sweep_spec(spec_path: str):
+    """(spec, param_sets) from a sweep spec JSON file (see run_parameter_sweep)."""
+    from algo.sweep import param_grid, random_params
+
+    with open(spec_path) as f:
+        spec = json.load(f)
+    if "grid" in spec:
+        param_sets = param_grid(spec["grid"])
+    else:
+        param_sets = random_params(spec["random"], int(spec.get("samples", 20)), spec.get("seed"))
+    return spec, param_sets
+
+
+def _output_path(prefix: str, ext: str, timestamp: str = None) -> str:
+    """backtest_results/<prefix>_<timestamp>.<ext> (directory created if needed)."""
+    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtest_results")
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"{prefix}_{timestamp}.{ext}")
+
+
+def run_backtest(
+    universe: list = None,
+    start: str = BACKTEST_START,
+    end: str = BACKTEST_END,
+    capital: float = INITIAL_CAPITAL,
+    scan_freq: int = 3,
+    universe_mode: str = "core",
+    precompute_signals: bool = False,
+    snapshot: str = None,
+    rebuild_snapshot: bool = False,
+):
+    """Run full backtest (from a universe snapshot when `snapshot` is a path)."""
+    engine_kwargs = dict(
         initial_capital=capital,
         scan_frequency=scan_freq,
         start_date=start,
         end_date=end,
         verbose=True,
-        sector_etf_data=sector_etf_data,
+        precompute_signals=precompute_signals,
     )
+    inputs = _load_backtest_inputs(universe, start, end, capital, universe_mode,
+                                   snapshot, rebuild_snapshot)
+    if inputs is None:
+        return None
+    engine = BacktestEngine(**inputs, **engine_kwargs)
 
     results = engine.run()
 
     # Save results
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtest_results")
-    os.makedirs(output_dir, exist_ok=True)
-
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = os.path.join(output_dir, f"backtest_{timestamp}.json")
+    output_file = _output_path("backtest", "json", timestamp)
 
     # Convert non-serializable types
     serializable = json.loads(json.dumps(results, default=str))
@@ -122,28 +235,114 @@ def run_backtest(
 
     # Generate interactive dashboard
     from algo.dashboard import generate_dashboard
-    dashboard_path = os.path.join(output_dir, f"dashboard_{timestamp}.html")
+    dashboard_path = _output_path("dashboard", "html", timestamp)
     generate_dashboard(serializable, dashboard_path)
     print(f"Dashboard saved to: {dashboard_path}")
 
     return results
 
 
-def run_scan():
-    """Run current scanner on latest data."""
+def run_parameter_sweep(
+    spec_path: str,
+    start: str = BACKTEST_START,
+    end: str = BACKTEST_END,
+    capital: float = INITIAL_CAPITAL,
+    scan_freq: int = 3,
+    universe_mode: str = "core",
+    workers: int = None,
+    snapshot: str = None,
+    rebuild_snapshot: bool = False,
+):
+    """
+    Run a parameter sweep from a JSON spec:
+      {"grid": {"QMAG.trail_ma": [10, 20, 50], ...}}
+      {"random": {"QMAG.min_adr_pct": {"low": 2.0, "high": 5.0}}, "samples": 50, "seed": 1}
+    Optional "rank_by" (default calmar_ratio).
+    """
+    from algo.sweep import run_sweep
+
+    spec, param_sets = _load_sweep_spec(spec_path)
+    inputs = _load_backtest_inputs(None, start, end, capital, universe_mode,
+                                   snapshot, rebuild_snapshot)
+    if inputs is None:
+        return None
+
+    table = run_sweep(
+        inputs["universe_data"], inputs["spy_data"], param_sets,
+        start_date=start, end_date=end, initial_capital=capital,
+        scan_frequency=scan_freq, sector_etf_data=inputs["sector_etf_data"],
+        workers=workers or os.cpu_count() or 1,
+        rank_by=spec.get("rank_by", "calmar_ratio"),
+    )
+
+    output_file = _output_path("sweep", "csv")
+    table.to_csv(output_file, index=False)
+
+    print(f"\nTop runs:\n{table.head(10).to_string(index=False)}")
+    print(f"\nSweep table saved to: {output_file}")
+    return table
+
+
+def run_walk_forward_mode(
+    spec_path: str,
+    start: str = BACKTEST_START,
+    end: str = BACKTEST_END,
+    capital: float = INITIAL_CAPITAL,
+    scan_freq: int = 3,
+    universe_mode: str = "core",
+    workers: int = None,
+    train_days: int = 504,
+    test_days: int = 126,
+    snapshot: str = None,
+    rebuild_snapshot: bool = False,
+):
+    """Walk-forward optimization over the sweep spec's parameter sets (see run_parameter_sweep)."""
+    from algo.walk_forward import run_walk_forward
+
+    spec, param_sets = _load_sweep_spec(spec_path)
+    inputs = _load_backtest_inputs(None, start, end, capital, universe_mode,
+                                   snapshot, rebuild_snapshot)
+    if inputs is None:
+        return None
+
+    results = run_walk_forward(
+        inputs["universe_data"], inputs["spy_data"], param_sets,
+        start_date=start, end_date=end,
+        train_days=train_days, test_days=test_days,
+        initial_capital=capital, scan_frequency=scan_freq,
+        sector_etf_data=inputs["sector_etf_data"],
+        workers=workers or os.cpu_count() or 1,
+        rank_by=spec.get("rank_by", "calmar_ratio"),
+    )
+
+    output_file = _output_path("walkforward", "json")
+    with open(output_file, "w") as f:
+        json.dump(json.loads(json.dumps(results, default=str)), f, indent=2)
+
+    if "performance" in results:
+        p = results["performance"]
+        print(f"\nOut-of-sample: CAGR {p['cagr_pct']:.1f}% | MaxDD {p['max_drawdown_pct']:.1f}% | "
+              f"Sharpe {p['sharpe_ratio']:.3f}")
+    print(f"Walk-forward results saved to: {output_file}")
+    return results
+
+
+def run_scan(workers: int = None):
+    """Run current scanner on latest data (tickers sharded across `workers` processes)."""
     print(f"\n{'#'*70}")
     print(f"# UNIFIED TRADING SYSTEM — DAILY SCAN")
     print(f"# Date: {date.today()}")
     print(f"{'#'*70}\n")
 
     # Current Kitchin cycle position
-    cycle_pos = kitchin_cycle_position(date.today(), KITCHIN.c3_trough, KITCHIN.period_months)
-    cycle_phase = KITCHIN.get_phase_label(cycle_pos)
-    cycle_score = KITCHIN.get_cycle_score(cycle_pos)
+    kitchin = kitchin_today()
+    cycle_pos = kitchin.position[0]
+    cycle_phase = kitchin.phase(0)
+    cycle_score = kitchin.score[0]
 
     print(f"Kitchin Cycle Position: {cycle_pos:.3f} ({cycle_phase})")
     print(f"Cycle Score: {cycle_score:.1f}/100")
-    print(f"Cycle Sizing Multiplier: {KITCHIN.get_cycle_sizing_multiplier(cycle_pos):.2f}x\n")
+    print(f"Cycle Sizing Multiplier: {kitchin.sizing_mult[0]:.2f}x\n")
 
     # Fetch latest data (6 months back)
     provider = YFinanceProvider()
@@ -162,10 +361,27 @@ def run_scan():
         print("ERROR: Could not fetch SPY data.")
         return
 
-    universe_data = {t: df for t, df in data.items() if not df.empty and len(df) > 50}
+    universe_tickers = [t for t, df in data.items() if not df.empty and len(df) > 50]
+
+    # Incremental indicators: only bars since the last scan are processed
+    from algo.streaming_indicators import StreamingIndicatorEngine
+    state_path = os.path.join(provider.cache_dir, "streaming_indicators.pkl")
+    engine = StreamingIndicatorEngine.load(state_path, benchmark=BENCHMARK_TICKER)
+    new_bars = engine.sync(BENCHMARK_TICKER, spy_data)
+    for t in universe_tickers:
+        new_bars += engine.sync(t, data[t])
+    try:
+        engine.save(state_path)
+    except Exception as e:
+        print(f"  [WARN] Could not save indicator state: {e}")
+    print(f"Updated indicators with {new_bars} new bars")
+
+    universe_data = engine.frames(universe_tickers)
     print(f"Scanning {len(universe_data)} tickers...\n")
 
-    results = run_full_scan(universe_data, spy_data, min_score=40.0)
+    results = run_full_scan(universe_data, spy_data, min_score=40.0,
+                            indicator_panels=engine.panels(universe_tickers),
+                            workers=workers or os.cpu_count() or 1)
 
     if not results:
         print("No setups found today.")
@@ -186,7 +402,7 @@ def run_scan():
 
 def main():
     parser = argparse.ArgumentParser(description="Unified Trading System")
-    parser.add_argument("--mode", choices=["backtest", "scan", "live"],
+    parser.add_argument("--mode", choices=["backtest", "scan", "sweep", "walkforward", "live"],
                         default="backtest", help="Operating mode")
     parser.add_argument("--start", default=BACKTEST_START, help="Backtest start date")
     parser.add_argument("--end", default=BACKTEST_END, help="Backtest end date")
@@ -194,14 +410,44 @@ def main():
     parser.add_argument("--scan-freq", type=int, default=5, help="Scan frequency in trading days")
     parser.add_argument("--universe", choices=["core", "full"], default="core",
                         help="Universe: 'core' (89 tickers) or 'full' (3000+ discovered)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Scan / sweep processes (default: all cores)")
+    parser.add_argument("--sweep-spec", default=None,
+                        help="JSON parameter space for --mode sweep / walkforward")
+    parser.add_argument("--train-days", type=int, default=504, help="Walk-forward train window")
+    parser.add_argument("--test-days", type=int, default=126, help="Walk-forward test window")
+    parser.add_argument("--precompute-signals", action="store_true",
+                        help="Generate all scanner signals up front instead of scanning daily")
+    parser.add_argument("--snapshot", default=None,
+                        help="Universe snapshot path for backtest / sweep / walkforward "
+                             "(built on first use, then memory-mapped)")
+    parser.add_argument("--rebuild-snapshot", action="store_true",
+                        help="Re-download the data and rewrite --snapshot")
 
     args = parser.parse_args()
 
     if args.mode == "backtest":
         run_backtest(start=args.start, end=args.end, capital=args.capital,
-                     scan_freq=args.scan_freq, universe_mode=args.universe)
+                     scan_freq=args.scan_freq, universe_mode=args.universe,
+                     precompute_signals=args.precompute_signals,
+                     snapshot=args.snapshot, rebuild_snapshot=args.rebuild_snapshot)
     elif args.mode == "scan":
-        run_scan()
+        run_scan(workers=args.workers)
+    elif args.mode == "sweep":
+        if not args.sweep_spec:
+            parser.error("--mode sweep requires --sweep-spec")
+        run_parameter_sweep(args.sweep_spec, start=args.start, end=args.end,
+                            capital=args.capital, scan_freq=args.scan_freq,
+                            universe_mode=args.universe, workers=args.workers,
+                            snapshot=args.snapshot, rebuild_snapshot=args.rebuild_snapshot)
+    elif args.mode == "walkforward":
+        if not args.sweep_spec:
+            parser.error("--mode walkforward requires --sweep-spec")
+        run_walk_forward_mode(args.sweep_spec, start=args.start, end=args.end,
+                              capital=args.capital, scan_freq=args.scan_freq,
+                              universe_mode=args.universe, workers=args.workers,
+                              train_days=args.train_days, test_days=args.test_days,
+                              snapshot=args.snapshot, rebuild_snapshot=args.rebuild_snapshot)
     elif args.mode == "live":
         print("Live mode not yet implemented. Use --mode scan for daily signals.")
 
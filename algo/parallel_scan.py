@@ -0,0 +1,193 @@
+"""
+PARALLEL SCAN — Process-pool sharding for run_full_scan
+=======================================================
+The scanners are CPU-bound pandas code, so a 3000-ticker scan on one core
+leaves the rest of the box idle. This module shards tickers across a
+ProcessPoolExecutor.
+
+OHLCV (and the indicator panels, when given) are packed once into
+shared-memory blocks:
+
+  ohlcv : float64[total_bars, 5]   all tickers' bars, back to back
+  dates : int64[total_bars]        datetime64[ns] bar dates
+  panel : float64[total_bars, k]   indicator panel rows (optional)
+
+Each task only receives (ticker, start, stop, position) offsets into those
+blocks, so frames are not pickled per task. Shards are contiguous runs of
+tickers in universe order and are concatenated in order, so after the
+stable score sort the output matches the serial scan exactly.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from algo.scanner import ScanResult, scan_universe
+from algo.universe_panel import OHLCV_FIELDS
+
+
+# Shards per worker: enough to even out slow tickers, few enough to keep
+# per-task overhead (attach + spy/earnings pickling) negligible.
+SHARDS_PER_WORKER = 4
+
+# Below this many tickers per worker the pool costs more than it saves.
+MIN_TICKERS_PER_WORKER = 25
+
+
+def _pack(arrays: List[np.ndarray], width: int, dtype) -> Tuple[shared_memory.SharedMemory, tuple]:
+    """Stack arrays row-wise into a new shared-memory block."""
+    total = sum(len(a) for a in arrays)
+    shape = (total, width) if width else (total,)
+    nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    out = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    if arrays:
+        np.concatenate(arrays, axis=0, out=out)
+    return shm, shape
+
+
+def _attach(name: str, shape: tuple, dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _scan_shard(
+    blocks: dict,
+    shard: List[Tuple[str, int, int, int]],
+    spy_close: pd.Series,
+    min_score: float,
+    earnings: Optional[Dict[str, list]],
+    panel_columns: Optional[List[str]],
+) -> List[ScanResult]:
+    """Worker: rebuild the shard's frames as views on shared memory and scan them."""
+    handles = []
+    try:
+        shm, ohlcv = _attach(*blocks["ohlcv"], np.float64)
+        handles.append(shm)
+        shm, dates = _attach(*blocks["dates"], np.int64)
+        handles.append(shm)
+        panel_rows = None
+        if panel_columns is not None:
+            shm, panel_rows = _attach(*blocks["panel"], np.float64)
+            handles.append(shm)
+
+        universe, panels, positions = {}, {}, {}
+        for ticker, start, stop, pos in shard:
+            index = pd.DatetimeIndex(dates[start:stop].view("datetime64[ns]"))
+            universe[ticker] = pd.DataFrame(ohlcv[start:stop], index=index,
+                                            columns=list(OHLCV_FIELDS), copy=False)
+            if panel_rows is not None:
+                panels[ticker] = pd.DataFrame(panel_rows[start:stop], index=index,
+                                              columns=panel_columns, copy=False)
+            positions[ticker] = pos
+
+        results = scan_universe(
+            universe, spy_close, min_score=min_score, earnings_data=earnings,
+            indicator_panels=panels or None, as_of_positions=positions,
+        )
+        # Drop the views before unmapping
+        del universe, panels, ohlcv, dates, panel_rows
+        return results
+    finally:
+        for shm in handles:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+def parallel_scan_universe(
+    universe_data: Dict[str, pd.DataFrame],
+    spy_close: pd.Series,
+    workers: int,
+    as_of_idx: int = -1,
+    min_score: float = 20.0,
+    earnings_data: Optional[Dict[str, list]] = None,
+    indicator_panels: Optional[Dict[str, pd.DataFrame]] = None,
+    as_of_positions: Optional[Dict[str, int]] = None,
+) -> List[ScanResult]:
+    """
+    scan_universe across a process pool. Returns results in ticker / scanner
+    order (unsorted), like scan_universe.
+    """
+    # Resolve scan positions up front; same gating as the serial loop
+    tickers, positions = [], {}
+    for ticker, df in universe_data.items():
+        if df.empty:
+            continue
+        if as_of_positions is not None:
+            if ticker not in as_of_positions:
+                continue
+            idx = as_of_positions[ticker]
+        else:
+            idx = as_of_idx if as_of_idx != -1 else len(df) - 1
+        if idx + 1 < 100:
+            continue
+        tickers.append(ticker)
+        positions[ticker] = idx
+
+    workers = min(workers, os.cpu_count() or 1, max(1, len(tickers) // MIN_TICKERS_PER_WORKER))
+    if workers <= 1:
+        return scan_universe(
+            {t: universe_data[t] for t in tickers}, spy_close, min_score=min_score,
+            earnings_data=earnings_data, indicator_panels=indicator_panels,
+            as_of_positions=positions,
+        )
+
+    # Panels only go to shared memory when every ticker has one on its frame's index
+    panel_columns = None
+    if indicator_panels and all(t in indicator_panels for t in tickers):
+        panel_columns = list(indicator_panels[tickers[0]].columns)
+        if not all(list(indicator_panels[t].columns) == panel_columns
+                   and len(indicator_panels[t]) == len(universe_data[t]) for t in tickers):
+            panel_columns = None
+
+    frames = [universe_data[t] for t in tickers]
+    offsets = np.concatenate([[0], np.cumsum([len(df) for df in frames])])
+
+    shms = []
+    try:
+        shm, shape = _pack([df[list(OHLCV_FIELDS)].to_numpy(dtype=np.float64) for df in frames],
+                           len(OHLCV_FIELDS), np.float64)
+        shms.append(shm)
+        blocks = {"ohlcv": (shm.name, shape)}
+        shm, shape = _pack([df.index.values.astype("datetime64[ns]").view(np.int64) for df in frames],
+                           0, np.int64)
+        shms.append(shm)
+        blocks["dates"] = (shm.name, shape)
+        if panel_columns is not None:
+            shm, shape = _pack([indicator_panels[t][panel_columns].to_numpy(dtype=np.float64)
+                                for t in tickers], len(panel_columns), np.float64)
+            shms.append(shm)
+            blocks["panel"] = (shm.name, shape)
+
+        # Contiguous shards keep the merged output in universe order
+        meta = [(t, int(offsets[i]), int(offsets[i + 1]), positions[t])
+                for i, t in enumerate(tickers)]
+        n_shards = min(len(meta), workers * SHARDS_PER_WORKER)
+        shards = [[meta[i] for i in part]
+                  for part in np.array_split(np.arange(len(meta)), n_shards)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for shard in shards:
+                shard_earnings = None
+                if earnings_data:
+                    shard_earnings = {t: earnings_data[t] for t, _, _, _ in shard
+                                      if t in earnings_data}
+                futures.append(pool.submit(
+                    _scan_shard, blocks, shard, spy_close, min_score,
+                    shard_earnings, panel_columns,
+                ))
+            results = []
+            for fut in futures:
+                results.extend(fut.result())
+        return results
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,224 @@
+"""
+POSITION BOOK — Array-backed store of open positions
+====================================================
+Struct-of-arrays replacement for Dict[str, Position]: one numpy array per
+field, one row per open position, rows kept in opening order (closing a
+position compacts the rows behind it, so iteration order is the same as
+the old insertion-ordered dict).
+
+  shares / initial_shares / pyramid_count / trail_ma / days_held  int64
+  entry_price / stop_price / initial_stop / highest_close /
+  score / r_multiple / pnl                                          float64
+  partial_1_sold / partial_2_sold                                   bool
+  ticker / entry_date / setup_type / status                         object
+
+Running totals are maintained on every open / share change / close:
+
+  exposure   sum(entry_price * shares)
+  open_risk  sum((entry_price - initial_stop) * shares)
+
+so portfolio checks (risk budget, margin) are O(1) instead of a sum over
+all positions for every candidate.
+
+The book is also a read/write mapping ticker -> Position, where Position
+is a live view of the ticker's row with the old dataclass attributes.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+INT_FIELDS = ("shares", "initial_shares", "pyramid_count", "trail_ma", "days_held", "entry_ns")
+FLOAT_FIELDS = ("entry_price", "stop_price", "initial_stop", "highest_close",
+                "score", "r_multiple", "pnl")
+BOOL_FIELDS = ("partial_1_sold", "partial_2_sold")
+OBJECT_FIELDS = ("ticker", "entry_date", "setup_type", "status")
+
+_DTYPES = {
+    **{f: np.int64 for f in INT_FIELDS},
+    **{f: np.float64 for f in FLOAT_FIELDS},
+    **{f: np.bool_ for f in BOOL_FIELDS},
+    **{f: object for f in OBJECT_FIELDS},
+}
+
+_CASTS = {
+    **{f: int for f in INT_FIELDS},
+    **{f: float for f in FLOAT_FIELDS},
+    **{f: bool for f in BOOL_FIELDS},
+}
+
+
+class Position:
+    """Live view of one open position (attributes read/write the book's arrays)."""
+
+    __slots__ = ("_book", "ticker")
+
+    def __init__(self, book: "PositionBook", ticker: str):
+        object.__setattr__(self, "_book", book)
+        object.__setattr__(self, "ticker", ticker)
+
+    def __getattr__(self, name):
+        if name not in _DTYPES:
+            raise AttributeError(name)
+        value = self._book.get_field(self.ticker, name)
+        cast = _CASTS.get(name)
+        return cast(value) if cast else value
+
+    def __setattr__(self, name, value):
+        if name not in _DTYPES or name == "ticker":
+            raise AttributeError(f"Position.{name} is read-only")
+        self._book.set_field(self.ticker, name, value)
+
+    def __repr__(self) -> str:
+        return (f"Position({self.ticker} {self.setup_type} shares={self.shares} "
+                f"entry={self.entry_price:.2f} stop={self.stop_price:.2f})")
+
+    @property
+    def risk_per_share(self) -> float:
+        return self.entry_price - self.initial_stop
+
+    @property
+    def initial_risk(self) -> float:
+        return self.risk_per_share * self.initial_shares
+
+    @property
+    def current_value(self) -> float:
+        return self.shares * self.entry_price
+
+
+class PositionBook:
+    """Open positions as parallel arrays, with running exposure / risk totals."""
+
+    def __init__(self, capacity: int = 32):
+        self.n = 0
+        self.row_of: Dict[str, int] = {}
+        self._data = {f: np.zeros(capacity, dtype=dt) for f, dt in _DTYPES.items()}
+        self.exposure = 0.0
+        self.open_risk = 0.0
+
+    # ------------------------------------------------------------------
+    # Array access
+    # ------------------------------------------------------------------
+
+    def col(self, field: str) -> np.ndarray:
+        """Writable view of a field over the open rows."""
+        return self._data[field][:self.n]
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self._data["ticker"][:self.n])
+
+    def get_field(self, ticker: str, field: str):
+        return self._data[field][self.row_of[ticker]]
+
+    def set_field(self, ticker: str, field: str, value):
+        row = self.row_of[ticker]
+        if field in ("shares", "entry_price", "initial_stop"):
+            self._retotal(row, -1.0)
+            self._data[field][row] = value
+            self._retotal(row, 1.0)
+        else:
+            self._data[field][row] = value
+
+    def _retotal(self, row: int, sign: float):
+        entry = self._data["entry_price"][row]
+        shares = self._data["shares"][row]
+        self.exposure += sign * entry * shares
+        self.open_risk += sign * (entry - self._data["initial_stop"][row]) * shares
+
+    def change_shares(self, rows: np.ndarray, delta: np.ndarray):
+        """Add delta shares to rows (negative = sell), keeping the totals current."""
+        if len(rows) == 0:
+            return
+        entry = self._data["entry_price"][rows]
+        risk = entry - self._data["initial_stop"][rows]
+        self._data["shares"][rows] += delta
+        self.exposure += float(np.sum(entry * delta))
+        self.open_risk += float(np.sum(risk * delta))
+
+    # ------------------------------------------------------------------
+    # Open / close
+    # ------------------------------------------------------------------
+
+    def open(self, ticker: str, entry_date: pd.Timestamp, entry_price: float, shares: int,
+             stop_price: float, setup_type: str, score: float, trail_ma: int) -> Position:
+        if ticker in self.row_of:
+            raise KeyError(f"{ticker} is already open")
+        if self.n == len(self._data["ticker"]):
+            for f, arr in self._data.items():
+                grown = np.zeros(2 * len(arr), dtype=arr.dtype)
+                grown[:self.n] = arr[:self.n]
+                self._data[f] = grown
+        row = self.n
+        values = {
+            "ticker": ticker, "entry_date": entry_date, "entry_ns": pd.Timestamp(entry_date).value,
+            "entry_price": entry_price, "shares": shares, "initial_shares": shares,
+            "stop_price": stop_price, "initial_stop": stop_price,
+            "setup_type": setup_type, "score": score, "highest_close": entry_price,
+            "partial_1_sold": False, "partial_2_sold": False, "trail_ma": trail_ma,
+            "r_multiple": 0.0, "pnl": 0.0, "status": "OPEN", "days_held": 0, "pyramid_count": 0,
+        }
+        for f, v in values.items():
+            self._data[f][row] = v
+        self.n += 1
+        self.row_of[ticker] = row
+        self._retotal(row, 1.0)
+        return Position(self, ticker)
+
+    def remove_rows(self, mask: np.ndarray):
+        """Close every row where mask is True; the other rows keep their order."""
+        if not mask.any():
+            return
+        for row in np.flatnonzero(mask):
+            self._retotal(int(row), -1.0)
+        keep = ~mask
+        m = int(keep.sum())
+        for f, arr in self._data.items():
+            arr[:m] = arr[:self.n][keep]
+            if arr.dtype == object:
+                arr[m:self.n] = None
+        self.n = m
+        self.row_of = {t: i for i, t in enumerate(self._data["ticker"][:m])}
+        if m == 0:  # no rounding drift carried into the next book
+            self.exposure = 0.0
+            self.open_risk = 0.0
+
+    def clear(self):
+        self.remove_rows(np.ones(self.n, dtype=bool))
+
+    # ------------------------------------------------------------------
+    # Mapping interface (ticker -> Position)
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self.row_of
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tickers)
+
+    def __getitem__(self, ticker: str) -> Position:
+        if ticker not in self.row_of:
+            raise KeyError(ticker)
+        return Position(self, ticker)
+
+    def __delitem__(self, ticker: str):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.row_of[ticker]] = True
+        self.remove_rows(mask)
+
+    def get(self, ticker: str, default=None) -> Optional[Position]:
+        return Position(self, ticker) if ticker in self.row_of else default
+
+    def keys(self) -> List[str]:
+        return self.tickers
+
+    def values(self) -> List[Position]:
+        return [Position(self, t) for t in self.tickers]
+
+    def items(self):
+        return [(t, Position(self, t)) for t in self.tickers]
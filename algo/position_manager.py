@@ -8,6 +8,10 @@ Handles:
   - Trailing stops from day 5 (don't wait for partial)
   - Portfolio-level risk limits (30% total open risk)
   - Regime-aware exposure scaling
+
+Open positions live in an array-backed PositionBook (algo.position_book)
+with running exposure / open-risk totals. Stop and target fills inside a
+daily bar follow the fill model in config FILLS (algo.fill_simulator).
 """
 
 import pandas as pd
@@ -20,47 +24,16 @@ from algo.config import (
     MAX_POSITIONS_NEUTRAL, MAX_POSITIONS_BEAR,
     MAX_RISK_PER_TRADE_PCT, MAX_TOTAL_RISK_PCT,
     MAX_POSITION_PCT_OF_EQUITY, TARGET_POSITION_PCT,
-    COMMISSION_PCT, SLIPPAGE_PCT, QMAG, KITCHIN,
+    COMMISSION_PCT, SLIPPAGE_PCT, QMAG, KITCHIN, FILLS,
 )
-from algo.indicators import sma, ema, atr, TICKER_SECTOR_MAP
+from algo.indicators import sma, ema, atr, adr_pct, TICKER_SECTOR_MAP
+from algo.universe_panel import UniversePanel
+from algo.asof_index import asof_position
+from algo.position_book import Position, PositionBook
+from algo.fill_simulator import FillSimulator
+from algo.trade_ledger import TradeLedger
 
-
-@dataclass
-class Position:
-    """Active position tracking."""
-    ticker: str
-    entry_date: pd.Timestamp
-    entry_price: float
-    shares: int
-    initial_shares: int
-    stop_price: float
-    initial_stop: float
-    setup_type: str            # HTF, EP, BREAKOUT
-    score: float               # Scan score at entry
-    highest_close: float = 0.0 # For trailing stop
-    partial_1_sold: bool = False  # First 1/3 trim done
-    partial_2_sold: bool = False  # Second 1/3 trim done
-    trail_ma: int = 10         # Trailing MA period
-    r_multiple: float = 0.0    # Current R-multiple
-    pnl: float = 0.0          # Unrealized P&L
-    status: str = "OPEN"       # OPEN, PARTIAL, CLOSED
-    exit_date: Optional[pd.Timestamp] = None
-    exit_price: float = 0.0
-    exit_reason: str = ""
-    days_held: int = 0         # Track days in trade for early trailing
-    pyramid_count: int = 0     # Number of times we've added to this position
-
-    @property
-    def risk_per_share(self) -> float:
-        return self.entry_price - self.initial_stop
-
-    @property
-    def initial_risk(self) -> float:
-        return self.risk_per_share * self.initial_shares
-
-    @property
-    def current_value(self) -> float:
-        return self.shares * self.entry_price
+DAY_NS = 86_400_000_000_000
 
 
 @dataclass
@@ -80,6 +53,39 @@ class TradeRecord:
     score: float
 
 
+class TrailingMACache:
+    """
+    Trailing-stop SMA series keyed by (ticker, period), computed once per
+    price frame and then read by bar index, so a daily trail update is a
+    lookup instead of a rolling mean over the ticker's whole history.
+    An entry is rebuilt when the ticker's frame is replaced or grows.
+    """
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, int], Tuple[pd.DataFrame, pd.DatetimeIndex, np.ndarray]] = {}
+
+    def value(self, ticker: str, df: pd.DataFrame, period: int, current_date) -> float:
+        """SMA(period) of close on current_date's bar (the last bar's value if there is none)."""
+        key = (ticker, period)
+        entry = self._series.get(key)
+        if entry is None or entry[0] is not df or len(entry[2]) != len(df):
+            entry = (df, df.index, sma(df["close"], period).values)
+            self._series[key] = entry
+        _, index, values = entry
+        if len(values) == 0:
+            return np.nan
+        pos = int(index.searchsorted(current_date))
+        if pos < len(index) and index[pos] == current_date:
+            return values[pos]
+        return values[-1]
+
+    def retain(self, tickers):
+        """Drop the series of tickers no longer held."""
+        keep = set(tickers)
+        for key in [k for k in self._series if k[0] not in keep]:
+            del self._series[key]
+
+
 class PositionManager:
     """Manages portfolio with Qullamaggie aggressive sizing and risk rules."""
 
@@ -87,8 +93,10 @@ class PositionManager:
         self.initial_capital = initial_capital
         self.cash = initial_capital
         self.equity = initial_capital
-        self.positions: Dict[str, Position] = {}
-        self.trade_history: List[TradeRecord] = []
+        self.positions = PositionBook()  # ticker -> Position, array-backed
+        self.trailing_ma = TrailingMACache()
+        self.fills = FillSimulator(FILLS)
+        self.trade_history = TradeLedger()  # closed TradeRecords, columnar
         self.consecutive_stops: int = 0
         self.halted: bool = False
         self.halt_date: Optional[pd.Timestamp] = None
@@ -104,11 +112,13 @@ class PositionManager:
 
     @property
     def total_risk(self) -> float:
-        """Total $ at risk across all positions."""
-        return sum(
-            p.risk_per_share * p.shares
-            for p in self.positions.values()
-        )
+        """Total $ at risk across all positions (running total of the book)."""
+        return self.positions.open_risk
+
+    @property
+    def total_exposure(self) -> float:
+        """Total position value at entry prices (running total of the book)."""
+        return self.positions.exposure
 
     @property
     def total_risk_pct(self) -> float:
@@ -117,10 +127,7 @@ class PositionManager:
     @property
     def total_exposure_pct(self) -> float:
         """Total position value as % of equity (can exceed 100% with margin)."""
-        total_val = sum(
-            p.entry_price * p.shares for p in self.positions.values()
-        )
-        return total_val / self.equity if self.equity > 0 else 0
+        return self.total_exposure / self.equity if self.equity > 0 else 0
 
     def get_max_positions(self) -> int:
         """Dynamic max positions based on market regime (Qullamaggie style)."""
@@ -227,10 +234,7 @@ class PositionManager:
         # Margin-based buying power: use equity * leverage, not cash
         # Qullamaggie uses full margin (2x) and often 150-300% invested
         max_buying_power = self.equity * 2.5  # 2.5x margin (Qullamaggie uses heavy margin)
-        current_exposure = sum(
-            p.entry_price * p.shares for p in self.positions.values()
-        )
-        remaining_buying_power = max_buying_power - current_exposure
+        remaining_buying_power = max_buying_power - self.total_exposure
         if remaining_buying_power <= 0:
             return 0
 
@@ -270,216 +274,77 @@ class PositionManager:
         total_cost = fill_price * shares + commission
 
         # Margin check: total exposure should not exceed 2x equity
-        current_exposure = sum(p.entry_price * p.shares for p in self.positions.values())
-        if current_exposure + total_cost > self.equity * 2.5:
+        if self.total_exposure + total_cost > self.equity * 2.5:
             return None
 
-        pos = Position(
+        pos = self.positions.open(
             ticker=ticker,
             entry_date=entry_date,
             entry_price=fill_price,
             shares=shares,
-            initial_shares=shares,
             stop_price=stop_price,
-            initial_stop=stop_price,
             setup_type=setup_type,
             score=score,
-            highest_close=fill_price,
             trail_ma=QMAG.trail_ma_alt if setup_type == "EP" else QMAG.trail_ma,
         )
 
         self.cash -= total_cost
-        self.positions[ticker] = pos
         self.consecutive_stops = 0  # New position breaks losing streak
         return pos
 
-    def update_positions(self, current_prices: Dict[str, pd.DataFrame],
+    def _position_bars(self, current_prices, current_date: pd.Timestamp):
+        """
+        (bars, adr, frame) for every row of the book as of current_date:
+        bars holds open/high/low/close arrays (NaN where a ticker has no
+        bar), adr the ADR(20) % when the fill model needs it (else None),
+        frame(row) the ticker's full history.
+        """
+        tickers = self.positions.tickers
+        want_adr = bool(FILLS.adr_slippage_pct)
+        if isinstance(current_prices, UniversePanel):
+            rows = current_prices.rows(tickers)
+            col = current_prices.date_col(current_date)
+            bars = {f: current_prices.asof_column(f, col, rows)
+                    for f in ("open", "high", "low", "close")}
+            adr = self.fills.panel_adr(current_prices, rows, current_date) if want_adr else None
+            return bars, adr, lambda j: current_prices.frame(tickers[j])
+
+        bars = {f: np.full(len(tickers), np.nan) for f in ("open", "high", "low", "close")}
+        adr = np.full(len(tickers), np.nan) if want_adr else None
+        for j, ticker in enumerate(tickers):
+            if ticker not in current_prices or current_prices[ticker].empty:
+                continue
+            df = current_prices[ticker]
+            # Find the row for current_date (or closest)
+            bar_pos = asof_position(df.index, current_date)
+            if bar_pos < 0:
+                continue
+            for f, arr in bars.items():
+                arr[j] = df[f].iloc[bar_pos]
+            if want_adr:
+                adr[j] = adr_pct(df.iloc[max(0, bar_pos - 19):bar_pos + 1]).iloc[-1]
+        return bars, adr, lambda j: current_prices[tickers[j]]
+
+    def update_positions(self, current_prices,
                          current_date: pd.Timestamp) -> List[TradeRecord]:
         """
         Update all positions with current prices.
+        current_prices: Dict[str, DataFrame] or a UniversePanel (one
+        column gather for every held ticker).
         Qullamaggie trade management:
           1. Stop loss hits → exit full position
           2. Day 5+: Start trailing on 10/20 SMA (don't wait for partial)
           3. At 2R: Trim 1/3, move stop to breakeven
           4. At 5R: Trim another 1/3, trail rest aggressively
           5. Trail final 1/3 on 10/20 SMA until MA break
+        Each rule is a mask over all rows of the position book; cash moves
+        and trade records are then booked in row (= opening) order. Which
+        of stop / target fills first inside the bar, at what price, is up
+        to the fill model (self.fills).
         """
         closed_trades = []
-        tickers_to_close = []
-
-        for ticker, pos in self.positions.items():
-            if ticker not in current_prices or current_prices[ticker].empty:
-                continue
-
-            df = current_prices[ticker]
-            # Find the row for current_date (or closest)
-            if current_date in df.index:
-                row = df.loc[current_date]
-            else:
-                mask = df.index <= current_date
-                if not mask.any():
-                    continue
-                row = df.loc[df.index[mask][-1]]
-
-            current_close = row["close"]
-            current_low = row["low"]
-            current_high = row["high"]
-
-            # Update days held
-            pos.days_held = (current_date - pos.entry_date).days
-
-            # Update highest close
-            pos.highest_close = max(pos.highest_close, current_close)
-
-            # Calculate R-multiple
-            risk = pos.risk_per_share
-            if risk > 0:
-                pos.r_multiple = (current_close - pos.entry_price) / risk
-
-            # Unrealized P&L
-            pos.pnl = (current_close - pos.entry_price) * pos.shares
-
-            # === STOP LOSS CHECK ===
-            if current_low <= pos.stop_price:
-                fill_price = pos.stop_price * (1 - SLIPPAGE_PCT)
-                commission = fill_price * pos.shares * COMMISSION_PCT
-                proceeds = fill_price * pos.shares - commission
-                self.cash += proceeds
-
-                r_mult = (fill_price - pos.entry_price) / risk if risk > 0 else 0
-                holding_days = (current_date - pos.entry_date).days
-
-                trade = TradeRecord(
-                    ticker=ticker,
-                    setup_type=pos.setup_type,
-                    entry_date=pos.entry_date,
-                    exit_date=current_date,
-                    entry_price=pos.entry_price,
-                    exit_price=fill_price,
-                    shares=pos.shares,
-                    pnl=proceeds - pos.entry_price * pos.shares,
-                    r_multiple=r_mult,
-                    holding_days=holding_days,
-                    exit_reason="STOP_LOSS" if r_mult < 0 else "TRAILING_STOP",
-                    score=pos.score,
-                )
-                closed_trades.append(trade)
-                tickers_to_close.append(ticker)
-
-                if r_mult < 0:
-                    self.consecutive_stops += 1
-                    if self.consecutive_stops >= QMAG.max_consecutive_stops:
-                        self.halted = True
-                        self.halt_date = current_date
-                continue
-
-            # NOTE: No breakeven stop before partials. Qullamaggie waits for the
-            # 2R partial to move stop to breakeven. A 1.5R breakeven stop kills
-            # trades that pull back to 0.5R then run to 5-10R (common pattern).
-            # The 20 SMA trail after day 10 provides gradual protection instead.
-
-            # === FIRST PARTIAL: 1/3 at 2R or after 3-5 day burst ===
-            # Time-based burst: if held 3 to 5 days and in good profit (> 1.5R), take partial
-            burst_condition = (3 <= pos.days_held <= 5) and (pos.r_multiple >= 1.5)
-            if not pos.partial_1_sold and (pos.r_multiple >= QMAG.first_target_r_multiple or burst_condition):
-                sell_shares = max(1, int(pos.initial_shares * QMAG.initial_sell_pct))
-                if sell_shares > 0 and sell_shares < pos.shares:
-                    fill_price = current_close * (1 - SLIPPAGE_PCT)
-                    commission = fill_price * sell_shares * COMMISSION_PCT
-                    proceeds = fill_price * sell_shares - commission
-                    self.cash += proceeds
-                    pos.shares -= sell_shares
-                    pos.partial_1_sold = True
-                    pos.status = "PARTIAL_1"
-
-                    # Move stop to breakeven (risk-free trade now)
-                    pos.stop_price = pos.entry_price
-
-                    trade = TradeRecord(
-                        ticker=ticker,
-                        setup_type=pos.setup_type,
-                        entry_date=pos.entry_date,
-                        exit_date=current_date,
-                        entry_price=pos.entry_price,
-                        exit_price=fill_price,
-                        shares=sell_shares,
-                        pnl=(fill_price - pos.entry_price) * sell_shares,
-                        r_multiple=pos.r_multiple,
-                        holding_days=(current_date - pos.entry_date).days,
-                        exit_reason=f"PARTIAL_33%_AT_{QMAG.first_target_r_multiple}R",
-                        score=pos.score,
-                    )
-                    closed_trades.append(trade)
-
-            # === SECOND PARTIAL: 1/3 at 5R ===
-            if (pos.partial_1_sold and not pos.partial_2_sold and
-                    pos.r_multiple >= QMAG.second_target_r_multiple):
-                sell_shares = max(1, int(pos.initial_shares * QMAG.second_sell_pct))
-                sell_shares = min(sell_shares, pos.shares - 1)  # Keep at least 1 share
-                if sell_shares > 0:
-                    fill_price = current_close * (1 - SLIPPAGE_PCT)
-                    commission = fill_price * sell_shares * COMMISSION_PCT
-                    proceeds = fill_price * sell_shares - commission
-                    self.cash += proceeds
-                    pos.shares -= sell_shares
-                    pos.partial_2_sold = True
-                    pos.status = "PARTIAL_2"
-
-                    trade = TradeRecord(
-                        ticker=ticker,
-                        setup_type=pos.setup_type,
-                        entry_date=pos.entry_date,
-                        exit_date=current_date,
-                        entry_price=pos.entry_price,
-                        exit_price=fill_price,
-                        shares=sell_shares,
-                        pnl=(fill_price - pos.entry_price) * sell_shares,
-                        r_multiple=pos.r_multiple,
-                        holding_days=(current_date - pos.entry_date).days,
-                        exit_reason=f"PARTIAL_33%_AT_{QMAG.second_target_r_multiple}R",
-                        score=pos.score,
-                    )
-                    closed_trades.append(trade)
-
-            # === PYRAMIDING (add to winners) ===
-            # Qullamaggie adds to positions that are working
-            if (QMAG.pyramid_enabled and
-                    pos.r_multiple >= QMAG.pyramid_threshold_r and
-                    pos.pyramid_count < QMAG.pyramid_max_adds and
-                    not pos.partial_1_sold):
-                add_shares = max(1, int(pos.initial_shares * QMAG.pyramid_size_pct))
-                add_cost = current_close * add_shares * (1 + COMMISSION_PCT + SLIPPAGE_PCT)
-                current_exposure = sum(
-                    p.entry_price * p.shares for p in self.positions.values()
-                )
-                if current_exposure + add_cost <= self.equity * 2.5:
-                    self.cash -= add_cost
-                    pos.shares += add_shares
-                    pos.pyramid_count += 1
-                    # Move stop up to protect profits (1R below current)
-                    new_stop = current_close - pos.risk_per_share
-                    pos.stop_price = max(pos.stop_price, new_stop)
-
-            # === TRAILING STOP UPDATE ===
-            # Qullamaggie: Trail on 20/50 SMA. Start trailing after 10 days or after partial.
-            should_trail = (pos.days_held >= QMAG.trail_from_day) or pos.partial_1_sold
-            if should_trail and len(df) > pos.trail_ma:
-                trail_val = sma(df["close"], pos.trail_ma)
-                if current_date in trail_val.index:
-                    trail_price = trail_val.loc[current_date]
-                elif len(trail_val) > 0:
-                    trail_price = trail_val.iloc[-1]
-                else:
-                    trail_price = pos.stop_price
-
-                if not pd.isna(trail_price):
-                    # Only raise stop, never lower
-                    new_stop = max(pos.stop_price, trail_price * 0.99)
-                    pos.stop_price = new_stop
-
-        # Remove closed positions
-        for ticker in tickers_to_close:
-            del self.positions[ticker]
+        if len(self.positions):
+            closed_trades = self._manage_positions(current_prices, current_date)
 
         # Update equity
         self._update_equity(current_prices, current_date)
@@ -494,21 +359,213 @@ class PositionManager:
 
         return closed_trades
 
-    def _update_equity(self, current_prices: Dict[str, pd.DataFrame],
+    def _manage_positions(self, current_prices,
+                          current_date: pd.Timestamp) -> List[TradeRecord]:
+        """Stops, partials, pyramiding and trailing for every open row (see update_positions)."""
+        book = self.positions
+        n = len(book)
+        bars, adr, frame = self._position_bars(current_prices, current_date)
+        open_, high, low, close = bars["open"], bars["high"], bars["low"], bars["close"]
+        live = ~np.isnan(close)
+        fills = self.fills
+        slip = fills.slippage(adr, n, SLIPPAGE_PCT)
+
+        entry = book.col("entry_price")
+        shares = book.col("shares")
+        initial = book.col("initial_shares")
+        stop = book.col("stop_price")
+        r = book.col("r_multiple")
+        days = book.col("days_held")
+        p1_sold = book.col("partial_1_sold")
+        p2_sold = book.col("partial_2_sold")
+        risk = entry - book.col("initial_stop")
+
+        # Days held, highest close, R-multiple, unrealized P&L
+        days[live] = (pd.Timestamp(current_date).value - book.col("entry_ns")[live]) // DAY_NS
+        highest = book.col("highest_close")
+        highest[live] = np.maximum(highest[live], close[live])
+        has_risk = live & (risk > 0)
+        r[has_risk] = (close[has_risk] - entry[has_risk]) / risk[has_risk]
+        book.col("pnl")[live] = (close[live] - entry[live]) * shares[live]
+
+        # === STOP LOSS CHECK ===
+        # The fill model decides whether the stop or the next profit target
+        # fills first when a bar touches both (see algo.fill_simulator)
+        next_r = np.where(~p1_sold, QMAG.first_target_r_multiple,
+                          np.where(~p2_sold, QMAG.second_target_r_multiple, np.inf))
+        next_hit, _ = fills.target(next_r, open_, high, close, entry, risk, r, slip)
+        stop_hit, stop_fill = fills.stop(open_, low, stop, slip)
+        stopped = live & stop_hit & (fills.stop_first(open_, stop, entry + next_r * risk) | ~next_hit)
+        stop_proceeds = stop_fill * shares - stop_fill * shares * COMMISSION_PCT
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stop_r = np.where(risk > 0, (stop_fill - entry) / risk, 0.0)
+        stop_shares = shares.copy()
+        active = live & ~stopped
+
+        # NOTE: No breakeven stop before partials. Qullamaggie waits for the
+        # 2R partial to move stop to breakeven. A 1.5R breakeven stop kills
+        # trades that pull back to 0.5R then run to 5-10R (common pattern).
+        # The 20 SMA trail after day 10 provides gradual protection instead.
+
+        fill = close * (1 - slip)
+
+        # === FIRST PARTIAL: 1/3 at 2R or after 3-5 day burst ===
+        # Time-based burst: if held 3 to 5 days and in good profit (> 1.5R), take partial
+        burst = (days >= 3) & (days <= 5) & (r >= 1.5)
+        hit_1, fill_1 = fills.target(QMAG.first_target_r_multiple, open_, high, close,
+                                     entry, risk, r, slip)
+        fill_1 = np.where(hit_1, fill_1, fill)  # burst partials sell on the close
+        sell_1 = np.maximum(1, (initial * QMAG.initial_sell_pct).astype(np.int64))
+        part_1 = active & ~p1_sold & (hit_1 | burst) & (sell_1 < shares)
+        proceeds_1 = fill_1 * sell_1 - fill_1 * sell_1 * COMMISSION_PCT
+        rows = np.flatnonzero(part_1)
+        book.change_shares(rows, -sell_1[rows])
+        p1_sold[rows] = True
+        book.col("status")[rows] = "PARTIAL_1"
+        stop[rows] = entry[rows]  # Move stop to breakeven (risk-free trade now)
+
+        # === SECOND PARTIAL: 1/3 at 5R ===
+        sell_2 = np.minimum(np.maximum(1, (initial * QMAG.second_sell_pct).astype(np.int64)),
+                            shares - 1)  # Keep at least 1 share
+        hit_2, fill_2 = fills.target(QMAG.second_target_r_multiple, open_, high, close,
+                                     entry, risk, r, slip)
+        part_2 = active & p1_sold & ~p2_sold & hit_2 & (sell_2 > 0)
+        proceeds_2 = fill_2 * sell_2 - fill_2 * sell_2 * COMMISSION_PCT
+        rows = np.flatnonzero(part_2)
+        book.change_shares(rows, -sell_2[rows])
+        p2_sold[rows] = True
+        if fills.intraday:  # partials filled at a target book the target's R
+            r_1 = np.where(hit_1, QMAG.first_target_r_multiple, r)
+            r_2 = np.full(n, QMAG.second_target_r_multiple)
+        else:
+            r_1 = r_2 = r
+        book.col("status")[rows] = "PARTIAL_2"
+
+        # Intraday paths: after the targets, the bar may trade back down to
+        # the (possibly raised) stop and close the rest the same day
+        late = active & fills.retouch(low, close, stop)
+        late_fill = stop * (1 - slip)
+        late_shares = shares.copy()
+        late_proceeds = late_fill * late_shares - late_fill * late_shares * COMMISSION_PCT
+        with np.errstate(invalid="ignore", divide="ignore"):
+            late_r = np.where(risk > 0, (late_fill - entry) / risk, 0.0)
+        active &= ~late
+
+        # === PYRAMIDING (add to winners) ===
+        # Qullamaggie adds to positions that are working
+        pyramid = np.zeros(n, dtype=bool)
+        add_shares = np.maximum(1, (initial * QMAG.pyramid_size_pct).astype(np.int64))
+        add_cost = close * add_shares * (1 + COMMISSION_PCT + SLIPPAGE_PCT)
+        if QMAG.pyramid_enabled:
+            candidates = (active & (r >= QMAG.pyramid_threshold_r) & ~p1_sold
+                          & (book.col("pyramid_count") < QMAG.pyramid_max_adds))
+            if candidates.any():
+                # Margin is checked row by row in opening order: partial sales of
+                # later rows are not counted yet, adds of earlier rows are
+                sold = entry * (np.where(part_1, sell_1, 0) + np.where(part_2, sell_2, 0))
+                later_sold = np.r_[np.cumsum(sold[::-1])[::-1][1:], 0.0]
+                for j in np.flatnonzero(candidates):
+                    if book.exposure + later_sold[j] + add_cost[j] <= self.equity * 2.5:
+                        book.change_shares(np.array([j]), add_shares[j:j + 1])
+                        pyramid[j] = True
+                rows = np.flatnonzero(pyramid)
+                book.col("pyramid_count")[rows] += 1
+                # Move stop up to protect profits (1R below current)
+                stop[rows] = np.maximum(stop[rows], close[rows] - risk[rows])
+
+        # === TRAILING STOP UPDATE ===
+        # Qullamaggie: Trail on 20/50 SMA. Start trailing after 10 days or after partial.
+        trail_ma = book.col("trail_ma")
+        tickers = book.tickers
+        self.trailing_ma.retain(tickers)
+        for j in np.flatnonzero(active & ((days >= QMAG.trail_from_day) | p1_sold)):
+            df = frame(j)
+            if len(df) <= trail_ma[j]:
+                continue
+            trail_price = self.trailing_ma.value(tickers[j], df, int(trail_ma[j]), current_date)
+
+            if not pd.isna(trail_price):
+                # Only raise stop, never lower
+                stop[j] = max(stop[j], trail_price * 0.99)
+
+        # === BOOK CASH AND TRADES (row order) ===
+        closed_trades = []
+        entry_dates = book.col("entry_date")
+        setups = book.col("setup_type")
+        scores = book.col("score")
+
+        def record(j, exit_price, n_shares, pnl, r_multiple, reason):
+            closed_trades.append(TradeRecord(
+                ticker=tickers[j],
+                setup_type=setups[j],
+                entry_date=entry_dates[j],
+                exit_date=current_date,
+                entry_price=float(entry[j]),
+                exit_price=float(exit_price),
+                shares=int(n_shares),
+                pnl=float(pnl),
+                r_multiple=float(r_multiple),
+                holding_days=int(days[j]),
+                exit_reason=reason,
+                score=float(scores[j]),
+            ))
+
+        def stop_out(j, exit_price, n_shares, proceeds, r_multiple):
+            self.cash += proceeds
+            record(j, exit_price, n_shares, proceeds - entry[j] * n_shares, r_multiple,
+                   "STOP_LOSS" if r_multiple < 0 else "TRAILING_STOP")
+            if r_multiple < 0:
+                self.consecutive_stops += 1
+                if self.consecutive_stops >= QMAG.max_consecutive_stops:
+                    self.halted = True
+                    self.halt_date = current_date
+
+        for j in np.flatnonzero(stopped | part_1 | part_2 | late | pyramid):
+            if stopped[j]:
+                stop_out(j, stop_fill[j], stop_shares[j], stop_proceeds[j], stop_r[j])
+                continue
+            if part_1[j]:
+                self.cash += proceeds_1[j]
+                record(j, fill_1[j], sell_1[j], (fill_1[j] - entry[j]) * sell_1[j], r_1[j],
+                       f"PARTIAL_33%_AT_{QMAG.first_target_r_multiple}R")
+            if part_2[j]:
+                self.cash += proceeds_2[j]
+                record(j, fill_2[j], sell_2[j], (fill_2[j] - entry[j]) * sell_2[j], r_2[j],
+                       f"PARTIAL_33%_AT_{QMAG.second_target_r_multiple}R")
+            if late[j]:
+                stop_out(j, late_fill[j], late_shares[j], late_proceeds[j], late_r[j])
+            if pyramid[j]:
+                self.cash -= add_cost[j]
+
+        # Remove closed positions
+        book.remove_rows(stopped | late)
+        return closed_trades
+
+    def _update_equity(self, current_prices,
                        current_date: pd.Timestamp):
         """Update total equity (cash + positions marked-to-market)."""
         position_value = 0.0
-        for ticker, pos in self.positions.items():
-            if ticker in current_prices and not current_prices[ticker].empty:
-                df = current_prices[ticker]
-                mask = df.index <= current_date
-                if mask.any():
-                    price = df.loc[df.index[mask][-1], "close"]
-                    position_value += price * pos.shares
+        if isinstance(current_prices, UniversePanel):
+            closes = current_prices.asof_column(
+                "close", current_prices.date_col(current_date),
+                current_prices.rows(self.positions.tickers),
+            )
+            marks = self.positions.col("entry_price")
+            shares = self.positions.col("shares").astype(float)
+            if len(shares):
+                position_value = float(np.sum(np.where(np.isnan(closes), marks, closes) * shares))
+        else:
+            for ticker, pos in self.positions.items():
+                if ticker in current_prices and not current_prices[ticker].empty:
+                    df = current_prices[ticker]
+                    bar_pos = asof_position(df.index, current_date)
+                    if bar_pos >= 0:
+                        price = df["close"].iloc[bar_pos]
+                        position_value += price * pos.shares
+                    else:
+                        position_value += pos.entry_price * pos.shares
                 else:
                     position_value += pos.entry_price * pos.shares
-            else:
-                position_value += pos.entry_price * pos.shares
 
         self.equity = self.cash + position_value
         # Track peak equity and current drawdown for portfolio protection
@@ -517,18 +574,80 @@ class PositionManager:
         self.drawdown_pct = (self.peak_equity - self.equity) / self.peak_equity * 100 if self.peak_equity > 0 else 0
         self.equity_curve.append((current_date, self.equity))
 
-    def force_close_all(self, current_prices: Dict[str, pd.DataFrame],
+    def stop_new_entries(self, entry_fills: Dict[str, float], current_prices,
+                         current_date: pd.Timestamp) -> List[TradeRecord]:
+        """
+        Same-bar stop check for positions opened inside today's bar (next-bar
+        entries), which update_positions has not seen yet. entry_fills maps
+        ticker -> fill price before slippage. Filled at or below the open,
+        the whole bar follows the entry (low <= stop). Bought above the open
+        (a buy stop), only what the fill model puts after the high counts;
+        the daily "close" path keeps the plain low <= stop test.
+        """
+        book = self.positions
+        tickers = book.tickers
+        new = np.array([t in entry_fills for t in tickers], dtype=bool)
+        if not new.any():
+            return []
+        bars, adr, _ = self._position_bars(current_prices, current_date)
+        open_, low, close = bars["open"], bars["low"], bars["close"]
+        fills = self.fills
+        slip = fills.slippage(adr, len(tickers), SLIPPAGE_PCT)
+        stop = book.col("stop_price")
+        entry_fill = np.array([entry_fills.get(t, np.nan) for t in tickers])
+
+        with np.errstate(invalid="ignore"):
+            whole_bar = ~(entry_fill > open_) | ~fills.intraday
+            stopped = new & ~np.isnan(close) & np.where(
+                whole_bar, low <= stop, fills.retouch(low, close, stop))
+
+        closed = []
+        for j in np.flatnonzero(stopped):
+            pos = book[tickers[j]]
+            fill_price = float(stop[j] * (1 - slip[j]))
+            proceeds = fill_price * pos.shares - fill_price * pos.shares * COMMISSION_PCT
+            self.cash += proceeds
+            risk = pos.risk_per_share
+            r_mult = (fill_price - pos.entry_price) / risk if risk > 0 else 0
+            closed.append(TradeRecord(
+                ticker=tickers[j],
+                setup_type=pos.setup_type,
+                entry_date=pos.entry_date,
+                exit_date=current_date,
+                entry_price=pos.entry_price,
+                exit_price=fill_price,
+                shares=pos.shares,
+                pnl=proceeds - pos.entry_price * pos.shares,
+                r_multiple=r_mult,
+                holding_days=0,
+                exit_reason="STOP_LOSS" if r_mult < 0 else "TRAILING_STOP",
+                score=pos.score,
+            ))
+            if r_mult < 0:
+                self.consecutive_stops += 1
+                if self.consecutive_stops >= QMAG.max_consecutive_stops:
+                    self.halted = True
+                    self.halt_date = current_date
+        book.remove_rows(stopped)
+        return closed
+
+    def force_close_all(self, current_prices,
                         current_date: pd.Timestamp, reason: str = "END_OF_BACKTEST"
                         ) -> List[TradeRecord]:
         """Close all positions (e.g., end of backtest or regime change)."""
         closed = []
+        bars = None
+        if isinstance(current_prices, UniversePanel):
+            bars = current_prices.asof_bars(self.positions.keys(), current_date)
         for ticker in list(self.positions.keys()):
             pos = self.positions[ticker]
-            if ticker in current_prices and not current_prices[ticker].empty:
+            if bars is not None:
+                price = bars[ticker]["close"] if ticker in bars else pos.entry_price
+            elif ticker in current_prices and not current_prices[ticker].empty:
                 df = current_prices[ticker]
-                mask = df.index <= current_date
-                if mask.any():
-                    price = df.loc[df.index[mask][-1], "close"]
+                bar_pos = asof_position(df.index, current_date)
+                if bar_pos >= 0:
+                    price = df["close"].iloc[bar_pos]
                 else:
                     price = pos.entry_price
             else:
@@ -9,17 +9,19 @@ Scans universe for:
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 from algo.indicators import (
     sma, ema, adr_pct, atr, rsi, relative_volume, volume_dry_up,
     vcp_score, ma_alignment, above_long_ma, prior_run_pct,
     consolidation_depth, gap_pct, relative_strength, bollinger_squeeze,
     composite_technical_score, get_sector_score_bonus,
-    cme_t35_score_adjustment,
+    cme_t35_series,
 )
-from algo.config import QMAG
+from algo.indicator_panel import build_indicator_panel, add_rs_ranks
+from algo.config import QMAG, CME
 
 
 @dataclass
@@ -40,26 +42,114 @@ class ScanResult:
     date: pd.Timestamp       # Signal date
 
 
+HTF_RUN_LOOKBACK = 56       # Prior run window: 56 days (~8 weeks) before consolidation
+HTF_MIN_CONSOL = 5
+HTF_MAX_CONSOL = 40
+
+
+def _htf_best_consolidation(
+    high: np.ndarray,
+    low: np.ndarray,
+    row_idx: int,
+    min_run_pct: float,
+    max_retracement_pct: float,
+) -> Optional[Tuple[float, int, float, float, float]]:
+    """
+    Best prior-run / consolidation split ending at row_idx, evaluated for
+    every consolidation length (5-40 days) at once.
+
+    For consolidation length L the run window is [row_idx-L-56, row_idx-L]
+    and the consolidation window is [row_idx-L, row_idx]. Run min/max come
+    from sliding windows over one slice; consolidation min/max are running
+    extremes walking back from row_idx.
+
+    Returns (run_pct, consol_len, retracement, consol_high, consol_low) for
+    the highest combo score (first length on ties), or None.
+    Requires row_idx >= HTF_MAX_CONSOL + HTF_RUN_LOOKBACK.
+    """
+    lengths = np.arange(HTF_MIN_CONSOL, min(HTF_MAX_CONSOL + 1, row_idx - 40))
+    if len(lengths) == 0:
+        return None
+    l_min, l_max = lengths[0], lengths[-1]
+
+    # Run windows, ordered by ascending run_end (= descending length)
+    seg = slice(row_idx - l_max - HTF_RUN_LOOKBACK, row_idx - l_min + 1)
+    run_win = HTF_RUN_LOOKBACK + 1
+    run_low = np.fmin.reduce(sliding_window_view(low[seg], run_win), axis=1)[::-1]
+    run_high = np.fmax.reduce(sliding_window_view(high[seg], run_win), axis=1)[::-1]
+
+    # Consolidation extremes over [row_idx - L, row_idx]
+    back_high = np.fmax.accumulate(high[row_idx - l_max:row_idx + 1][::-1])
+    back_low = np.fmin.accumulate(low[row_idx - l_max:row_idx + 1][::-1])
+    consol_high = back_high[lengths]
+    consol_low = back_low[lengths]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        run_pct = np.where(run_low > 0, (run_high - run_low) / run_low * 100.0, 0.0)
+        retracement = np.where(consol_high > 0,
+                               (consol_high - consol_low) / consol_high * 100.0, 100.0)
+    combo = run_pct * 0.3 + (25 - retracement) * 2 + (20 - lengths) * 0.5
+
+    ok = ~((run_pct < min_run_pct) | (run_pct > 200.0) | (retracement > max_retracement_pct))
+    ok &= combo > 0
+    if not ok.any():
+        return None
+
+    k = int(np.argmax(np.where(ok, combo, -np.inf)))
+    return (run_pct[k], int(lengths[k]), retracement[k], consol_high[k], consol_low[k])
+
+
+def _require_rs_rank(columns):
+    """QMAG.rs_rank_filter needs rs_rank; a per-ticker panel cannot rank itself."""
+    if "rs_rank" not in columns:
+        raise ValueError(
+            "QMAG.rs_rank_filter needs indicator panels ranked across the universe "
+            "(build_indicator_panels / ranked_panels); this panel has no rs_rank column"
+        )
+
+
+def ranked_panels(universe_data: Dict[str, pd.DataFrame], spy_close: pd.Series,
+                  indicator_panels: Optional[Dict[str, pd.DataFrame]] = None
+                  ) -> Dict[str, pd.DataFrame]:
+    """
+    Indicator panels with rs_rank for every ticker of universe_data, for
+    QMAG.rs_rank_filter. Returned as given when already ranked; otherwise
+    missing panels are built and all of them ranked together (on shallow
+    copies, the caller's panels are left alone).
+    """
+    tickers = [t for t, df in universe_data.items() if not df.empty]
+    panels = dict(indicator_panels or {})
+    if all(t in panels and "rs_rank" in panels[t] for t in tickers):
+        return panels
+    for t in tickers:
+        if t not in panels:
+            panels[t] = build_indicator_panel(universe_data[t], spy_close)
+    return add_rs_ranks({t: panels[t].copy(deep=False) for t in tickers})
+
+
 def scan_htf(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
-             as_of_idx: int = -1) -> Optional[ScanResult]:
+             as_of_idx: int = -1,
+             panel: Optional[pd.DataFrame] = None) -> Optional[ScanResult]:
     """
     High Tight Flag Scanner.
     Criteria (from Qullamaggie Blueprint):
       1. Prior trend: +30-100% in 4-8 weeks
-      2. Top 2.5% RS rank
+      2. Top 2.5% RS rank (gated with QMAG.rs_rank_filter)
       3. Consolidation: 5-40 days, max 25% retracement
       4. VCP: 5d ATR < 50% of 20d ATR
       5. Volume dry-up: last 3-5d vol <= 70% of 20d SMA
       6. Price above 200 SMA
       7. MA alignment: 10 > 20 > 50, all rising
     """
-    if len(df) < 250:
-        return None
-
+    # Bars are only visible up to row_idx (df may be the full history)
     row_idx = as_of_idx if as_of_idx != -1 else len(df) - 1
-    if row_idx < 200:
+    if row_idx + 1 < 250:
         return None
 
+    if panel is None:
+        panel = build_indicator_panel(df, spy_close)
+    ind = panel.iloc[row_idx]
+
     close = df["close"]
     high = df["high"]
     low = df["low"]
@@ -69,53 +159,29 @@ def scan_htf(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
     current_date = df.index[row_idx]
 
     # 1. ADR filter
-    _adr = adr_pct(df, 20).iloc[row_idx]
+    _adr = ind["adr"]
     if pd.isna(_adr) or _adr < QMAG.min_adr_pct or _adr > QMAG.max_adr_pct:
         return None
 
+    # RS rank: top rs_top_pct of the universe (NaN = no RS that day, never rejects)
+    rs_rank = ind.get("rs_rank", np.nan)
+    if QMAG.rs_rank_filter:
+        _require_rs_rank(ind)
+        if rs_rank < 100.0 - QMAG.rs_top_pct:
+            return None
+
     # 2. Above 200 SMA (relaxed: allow within 5% below for emerging setups)
-    sma200 = sma(close, 200).iloc[row_idx]
+    sma200 = ind["sma200"]
     if pd.isna(sma200) or current_close < sma200 * 0.95:
         return None
 
     # 3. Prior run: find the most recent significant rise ending in consolidation
     # Look back further (up to 60 days) and find the best run/consolidation combo
     # Relaxed: accept 15%+ runs (not just 30%+) to catch more emerging breakouts
-    best_result = None
-    best_score = 0
-
-    for consol_len in range(5, min(41, row_idx - 40)):
-        run_end = row_idx - consol_len
-        run_start = max(0, run_end - 56)  # Look back 56 days (~8 weeks) for prior run
-
-        if run_end <= run_start + 10:
-            continue
-
-        window = df.iloc[run_start:run_end + 1]
-        if len(window) < 10:
-            continue
-
-        run_low = window["low"].min()
-        run_high = window["high"].max()
-        run_pct = (run_high - run_low) / run_low * 100.0 if run_low > 0 else 0
-
-        if run_pct < QMAG.htf_prior_run_pct or run_pct > 200.0:  # Strict 30%+ prior run
-            continue
-            
-        # Check consolidation quality
-        consol_window = df.iloc[run_end:row_idx + 1]
-        consol_high = consol_window["high"].max()
-        consol_low = consol_window["low"].min()
-        retracement = (consol_high - consol_low) / consol_high * 100.0 if consol_high > 0 else 100
-        
-        if retracement > QMAG.htf_max_retracement_pct:  # Strict max retracement (25%)
-            continue
-            
-        # Score this combination
-        combo_score = run_pct * 0.3 + (25 - retracement) * 2 + (20 - consol_len) * 0.5
-        if combo_score > best_score:
-            best_score = combo_score
-            best_result = (run_pct, consol_len, retracement, consol_high, consol_low)
+    best_result = _htf_best_consolidation(
+        df["high"].values, df["low"].values, row_idx,
+        QMAG.htf_prior_run_pct, QMAG.htf_max_retracement_pct,
+    )
     
     if best_result is None:
         return None
@@ -123,18 +189,18 @@ def scan_htf(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
     run_pct, consol_days, retracement, consol_high, consol_low = best_result
 
     # 6. VCP: ATR contraction
-    _vcp = vcp_score(df).iloc[row_idx]
+    _vcp = ind["vcp"]
     # VCP and volume are scored, not gated hard
-    vol_dry = volume_dry_up(vol, 20, QMAG.htf_volume_dry_ratio).iloc[row_idx]  # Strict threshold
+    vol_dry = ind["vol_contraction"] <= QMAG.htf_volume_dry_ratio  # Strict threshold
 
     # 8. MA alignment
-    aligned = ma_alignment(df, QMAG.trend_mas).iloc[row_idx]
+    aligned = ind["ma_aligned"] > 0
     if not aligned:
         return None
 
     # 9. RS vs SPY
-    if len(spy_close) > 63 and len(close) > 63:
-        _rs = relative_strength(close, spy_close, 63).iloc[row_idx]
+    if len(spy_close) > 63 and row_idx >= 63:
+        _rs = ind["rs"]
         rs_pct = _rs * 100 if not pd.isna(_rs) else 0
     else:
         rs_pct = 50.0
@@ -154,7 +220,7 @@ def scan_htf(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
     risk_pct = (entry_price - stop_price) / entry_price * 100 if entry_price > 0 else 100
 
     # Check risk is within ADR
-    _atr_val = atr(df, 14).iloc[row_idx]
+    _atr_val = ind["atr14"]
     if not pd.isna(_atr_val) and (entry_price - stop_price) > _atr_val * QMAG.max_stop_adr_multiple:
         return None
 
@@ -163,8 +229,8 @@ def scan_htf(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
         setup_type="HTF",
         score=min(100, score),
         adr=_adr,
-        rs_rank=rs_pct,
-        rvol=relative_volume(vol, 50).iloc[row_idx] if not pd.isna(relative_volume(vol, 50).iloc[row_idx]) else 0,
+        rs_rank=rs_pct if pd.isna(rs_rank) else rs_rank,
+        rvol=ind["rvol"] if not pd.isna(ind["rvol"]) else 0,
         consolidation_days=consol_days,
         retracement_pct=retracement,
         prior_run=run_pct,
@@ -177,9 +243,11 @@ def scan_htf(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
 
 def scan_ep(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
             as_of_idx: int = -1,
-            earnings_data: Optional[list] = None) -> Optional[ScanResult]:
+            earnings_data=None,
+            panel: Optional[pd.DataFrame] = None) -> Optional[ScanResult]:
     """
     Episodic Pivot Scanner.
+    earnings_data: the ticker's earnings records or its EarningsIndex.
     Criteria (from Qullamaggie Blueprint):
       1. Gap >= 10% on open
       2. RVol >= 2.0
@@ -187,11 +255,9 @@ def scan_ep(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
       4. 3-6 month flat prior base
       5. Fundamental catalyst (earnings, FDA, etc.)
     """
-    if len(df) < 150:
-        return None
-
+    # Bars are only visible up to row_idx (df may be the full history)
     row_idx = as_of_idx if as_of_idx != -1 else len(df) - 1
-    if row_idx < 130:
+    if row_idx + 1 < 150:
         return None
 
     close = df["close"]
@@ -207,13 +273,24 @@ def scan_ep(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
     if abs(_gap) < QMAG.ep_min_gap_pct:  # Strict 10% gap requirement
         return None
 
+    if panel is None:
+        panel = build_indicator_panel(df, spy_close)
+    ind = panel.iloc[row_idx]
+
     # 2. Relative volume
-    _rvol = relative_volume(vol, 50).iloc[row_idx]
+    _rvol = ind["rvol"]
     if pd.isna(_rvol) or _rvol < QMAG.ep_min_rvol:  # Strict 2x relative volume requirement
         return None
 
+    # RS rank: top rs_ep_top_pct of the universe (NaN = no RS that day, never rejects)
+    rs_rank = ind.get("rs_rank", np.nan)
+    if QMAG.rs_rank_filter:
+        _require_rs_rank(ind)
+        if rs_rank < 100.0 - QMAG.rs_ep_top_pct:
+            return None
+
     # 3. Average volume
-    avg_vol = sma(vol, 50).iloc[row_idx]
+    avg_vol = ind["avg_vol50"]
     if pd.isna(avg_vol) or avg_vol < QMAG.ep_min_avg_volume:
         return None
 
@@ -233,13 +310,13 @@ def scan_ep(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
     is_flat_base = base_range_pct < 40.0
 
     # 5. ADR
-    _adr = adr_pct(df, 20).iloc[row_idx]
+    _adr = ind["adr"]
     if pd.isna(_adr):
         _adr = 5.0
 
     # RS
-    if len(spy_close) > 63 and len(close) > 63:
-        _rs = relative_strength(close, spy_close, 63).iloc[row_idx]
+    if len(spy_close) > 63 and row_idx >= 63:
+        _rs = ind["rs"]
         rs_pct = _rs * 100 if not pd.isna(_rs) else 0
     else:
         rs_pct = 50.0
@@ -279,7 +356,7 @@ def scan_ep(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
         setup_type="EP",
         score=min(100, score),
         adr=_adr,
-        rs_rank=rs_pct,
+        rs_rank=rs_pct if pd.isna(rs_rank) else rs_rank,
         rvol=_rvol,
         consolidation_days=len(base_data),
         retracement_pct=base_range_pct,
@@ -292,16 +369,15 @@ def scan_ep(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
 
 
 def scan_breakout(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
-                  as_of_idx: int = -1) -> Optional[ScanResult]:
+                  as_of_idx: int = -1,
+                  panel: Optional[pd.DataFrame] = None) -> Optional[ScanResult]:
     """
     General breakout scanner (lighter criteria than HTF).
     Looks for: price breaking above consolidation range with volume.
     """
-    if len(df) < 100:
-        return None
-
+    # Bars are only visible up to row_idx (df may be the full history)
     row_idx = as_of_idx if as_of_idx != -1 else len(df) - 1
-    if row_idx < 60:
+    if row_idx + 1 < 100:
         return None
 
     close = df["close"]
@@ -311,8 +387,12 @@ def scan_breakout(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
     current_close = close.iloc[row_idx]
     current_date = df.index[row_idx]
 
+    if panel is None:
+        panel = build_indicator_panel(df, spy_close)
+    ind = panel.iloc[row_idx]
+
     # ADR filter
-    _adr = adr_pct(df, 20).iloc[row_idx]
+    _adr = ind["adr"]
     if pd.isna(_adr) or _adr < 2.0:
         return None
 
@@ -331,23 +411,25 @@ def scan_breakout(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
         return None
 
     # Volume confirmation
-    _rvol = relative_volume(vol, 50).iloc[row_idx]
+    _rvol = ind["rvol"]
     if pd.isna(_rvol) or _rvol < 1.0:  # Very relaxed for range breakouts
         return None
 
     # VCP bonus
-    _vcp = vcp_score(df).iloc[row_idx]
+    _vcp = ind["vcp"]
 
     # Bollinger squeeze bonus
-    _squeeze = bollinger_squeeze(close).iloc[row_idx]
+    _squeeze = ind["squeeze"] > 0
+
+    rs_rank = ind.get("rs_rank", np.nan)
 
     # MA check
-    aligned = ma_alignment(df, [10, 20, 50]).iloc[row_idx]
-    above200 = above_long_ma(df, 200).iloc[row_idx]
+    aligned = ind["ma_aligned_std"] > 0
+    above200 = current_close > ind["sma200"]
 
     # RS
-    if len(spy_close) > 63 and len(close) > 63:
-        _rs = relative_strength(close, spy_close, 63).iloc[row_idx]
+    if len(spy_close) > 63 and row_idx >= 63:
+        _rs = ind["rs"]
         rs_pct = _rs * 100 if not pd.isna(_rs) else 0
     else:
         rs_pct = 50.0
@@ -375,7 +457,7 @@ def scan_breakout(df: pd.DataFrame, ticker: str, spy_close: pd.Series,
         setup_type="BREAKOUT",
         score=min(100, score),
         adr=_adr,
-        rs_rank=rs_pct,
+        rs_rank=rs_pct if pd.isna(rs_rank) else rs_rank,
         rvol=_rvol,
         consolidation_days=len(recent),
         retracement_pct=(range_high - range_low) / range_high * 100 if range_high > 0 else 0,
@@ -396,34 +478,109 @@ def run_full_scan(
     current_date=None,
     cycle_phase: str = "",
     earnings_data: Optional[Dict[str, list]] = None,
+    indicator_panels: Optional[Dict[str, pd.DataFrame]] = None,
+    as_of_positions: Optional[Dict[str, int]] = None,
+    workers: int = 1,
+    cme_score_mult: Optional[float] = None,
 ) -> List[ScanResult]:
     """
     Run all scanners across the universe.
     Applies sector rotation bonus (with Newton cycle rotation), CME T+35 adjustment,
     composite score filter, and RSI guard.
+    indicator_panels: precomputed full-history panels (see algo.indicator_panel);
+    built per ticker on the fly when missing.
+    as_of_positions: per-ticker bar position to scan at. Lets callers pass
+    full-history frames instead of truncated copies; bars after the
+    position are never read.
+    workers: > 1 shards tickers across a process pool (see algo.parallel_scan);
+    results are identical to the serial scan.
+    cme_score_mult: the scan date's cme_t35_score_adjustment, when the caller
+    has it precomputed (see cme_t35_series); only used with CME.score_overlay.
     Returns sorted list of setups (best first).
     """
-    results = []
     spy_close = spy_df["close"] if not spy_df.empty else pd.Series()
+    if QMAG.rs_rank_filter:
+        # Ranks need the whole universe: rank here, before any sharding
+        indicator_panels = ranked_panels(universe_data, spy_close, indicator_panels)
+
+    score_mult = 1.0
+    if CME.score_overlay:
+        if cme_score_mult is None:
+            scan_date = current_date if current_date is not None else (
+                spy_df.index[-1] if not spy_df.empty else pd.Timestamp.today())
+            cme_score_mult = cme_t35_series([scan_date])["score_mult"].iloc[0]
+        score_mult = float(cme_score_mult)
+        # Scan down to the threshold a boosted score still has to clear
+        scan_min_score = min_score / score_mult
+    else:
+        scan_min_score = min_score
+
+    if workers > 1:
+        from algo.parallel_scan import parallel_scan_universe
+        results = parallel_scan_universe(
+            universe_data, spy_close, workers, as_of_idx, scan_min_score,
+            earnings_data, indicator_panels, as_of_positions,
+        )
+    else:
+        results = scan_universe(
+            universe_data, spy_close, as_of_idx, scan_min_score,
+            earnings_data, indicator_panels, as_of_positions,
+        )
+    if score_mult != 1.0:
+        results = apply_cme_overlay(results, score_mult, min_score)
+
+    # Sort by score descending
+    results.sort(key=lambda x: x.score, reverse=True)
+    return results
+
+
+def scan_universe(
+    universe_data: Dict[str, pd.DataFrame],
+    spy_close: pd.Series,
+    as_of_idx: int = -1,
+    min_score: float = 20.0,
+    earnings_data: Optional[Dict[str, list]] = None,
+    indicator_panels: Optional[Dict[str, pd.DataFrame]] = None,
+    as_of_positions: Optional[Dict[str, int]] = None,
+) -> List[ScanResult]:
+    """Scanner loop behind run_full_scan: results in ticker / scanner order, unsorted."""
+    results = []
 
     for ticker, df in universe_data.items():
-        if df.empty or len(df) < 100:
+        if df.empty:
             continue
 
         # Determine the row index to scan
-        idx = as_of_idx if as_of_idx != -1 else len(df) - 1
+        if as_of_positions is not None:
+            if ticker not in as_of_positions:
+                continue
+            idx = as_of_positions[ticker]
+        else:
+            idx = as_of_idx if as_of_idx != -1 else len(df) - 1
+        if idx + 1 < 100:
+            continue
 
         # Get earnings data for this ticker (if available)
         ticker_earnings = earnings_data.get(ticker) if earnings_data else None
 
+        # One indicator panel per ticker, shared by all three scanners
+        panel = indicator_panels.get(ticker) if indicator_panels else None
+        if panel is None:
+            try:
+                panel = build_indicator_panel(df, spy_close)
+            except Exception:
+                continue
+        if QMAG.rs_rank_filter:
+            _require_rs_rank(panel)  # outside the per-scanner try: must not pass silently
+
         # Run all scanners
         for scanner in [scan_htf, scan_ep, scan_breakout]:
             try:
                 if scanner == scan_ep and ticker_earnings:
                     result = scanner(df, ticker, spy_close, idx,
-                                     earnings_data=ticker_earnings)
+                                     earnings_data=ticker_earnings, panel=panel)
                 else:
-                    result = scanner(df, ticker, spy_close, idx)
+                    result = scanner(df, ticker, spy_close, idx, panel=panel)
                 if result is None:
                     continue
 
@@ -433,12 +590,187 @@ def run_full_scan(
                 # were stacking to create 15-20% score penalties that crushed
                 # performance from ~90% CAGR to 12%. Macro factors are already
                 # handled via Kitchin cycle position sizing + regime filter.
+                # CME timing can be switched back on for research with
+                # CME.score_overlay (applied once per scan in run_full_scan).
 
                 if result.score >= min_score:
                     results.append(result)
             except Exception:
                 continue
 
-    # Sort by score descending
+    return results
+
+
+def apply_cme_overlay(results: List[ScanResult], score_mult: float,
+                      min_score: float = 20.0) -> List[ScanResult]:
+    """
+    CME T+35 score overlay: scale every score by the day's multiplier and
+    drop what falls below min_score. Returns copies (table entries are shared).
+    """
+    out = []
+    for r in results:
+        score = r.score * score_mult
+        if score >= min_score:
+            out.append(replace(r, score=score))
+    return out
+
+
+# ----------------------------------------------------------------------
+# Whole-history signal generation
+# ----------------------------------------------------------------------
+
+SignalTable = Dict[Tuple[pd.Timestamp, str], List[ScanResult]]
+
+
+def _history_candidates(df: pd.DataFrame, panel: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Vectorized gate masks over every bar of one ticker, one per scanner.
+    Each mask only applies the scanner's cheap hard rejections (warm-up,
+    ADR, 200 SMA, MA stack, gap, RVol, range break, RS rank), so it is a
+    superset of the rows the scanner accepts. NaNs never reject here; the
+    per-row scanner makes the final call.
+    """
+    n = len(df)
+    rows = np.arange(n)
+    close = df["close"].values
+    open_ = df["open"].values
+    adr = panel["adr"].values
+    rvol = panel["rvol"].values
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # HTF
+        htf = rows + 1 >= 250
+        htf &= ~((adr < QMAG.min_adr_pct) | (adr > QMAG.max_adr_pct))
+        htf &= ~(close < panel["sma200"].values * 0.95)
+        htf &= ~(panel["ma_aligned"].values <= 0)
+        if QMAG.rs_rank_filter:
+            _require_rs_rank(panel)
+            htf &= ~(panel["rs_rank"].values < 100.0 - QMAG.rs_top_pct)
+
+        # EP
+        prev_close = np.r_[np.nan, close[:-1]]
+        gap = np.where(prev_close > 0, (open_ - prev_close) / prev_close * 100.0, 0.0)
+        ep = rows + 1 >= 150
+        ep &= ~(np.abs(gap) < QMAG.ep_min_gap_pct)
+        ep &= ~(rvol < QMAG.ep_min_rvol)
+        ep &= ~(panel["avg_vol50"].values < QMAG.ep_min_avg_volume)
+        if QMAG.rs_rank_filter:
+            ep &= ~(panel["rs_rank"].values < 100.0 - QMAG.rs_ep_top_pct)
+
+        # Breakout: close above the prior 20-bar high
+        range_high = df["high"].rolling(20, min_periods=1).max().shift(1).values
+        brk = rows + 1 >= 100
+        brk &= ~(adr < 2.0)
+        brk &= ~(close <= range_high)
+        brk &= ~(rvol < 1.0)
+
+    return {"HTF": htf, "EP": ep, "BREAKOUT": brk}
+
+
+def scan_history(
+    df: pd.DataFrame,
+    ticker: str,
+    spy_close: pd.Series,
+    min_score: float = 20.0,
+    earnings_data: Optional[list] = None,
+    panel: Optional[pd.DataFrame] = None,
+) -> List[ScanResult]:
+    """
+    Every setup a ticker produced over its whole history, in one pass.
+    Gate masks for all bars are computed at once from the indicator panel;
+    only the surviving rows are scored by the regular scanners, so each
+    result is identical to what run_full_scan returns on that bar.
+    Results are in bar order, HTF / EP / BREAKOUT within a bar.
+    """
+    if df.empty:
+        return []
+    if panel is None:
+        panel = build_indicator_panel(df, spy_close)
+
+    masks = _history_candidates(df, panel)
+    rows = np.flatnonzero(masks["HTF"] | masks["EP"] | masks["BREAKOUT"])
+    if len(rows) == 0:
+        return []
+
+    # SPY as the scanners would see it on each bar (as-of the bar date)
+    spy_ends = np.searchsorted(spy_close.index.values, df.index.values[rows], side="right")
+
+    results = []
+    for row, spy_end in zip(rows, spy_ends):
+        spy_view = spy_close.iloc[:spy_end]
+        for setup, scanner in (("HTF", scan_htf), ("EP", scan_ep), ("BREAKOUT", scan_breakout)):
+            if not masks[setup][row]:
+                continue
+            try:
+                if scanner == scan_ep and earnings_data:
+                    result = scanner(df, ticker, spy_view, int(row),
+                                     earnings_data=earnings_data, panel=panel)
+                else:
+                    result = scanner(df, ticker, spy_view, int(row), panel=panel)
+            except Exception:
+                continue
+            if result is not None and result.score >= min_score:
+                results.append(result)
+    return results
+
+
+def build_signal_table(
+    universe_data: Dict[str, pd.DataFrame],
+    spy_df: pd.DataFrame,
+    min_score: float = 20.0,
+    earnings_data: Optional[Dict[str, list]] = None,
+    indicator_panels: Optional[Dict[str, pd.DataFrame]] = None,
+) -> SignalTable:
+    """
+    Precompute every scanner signal for the universe.
+    Returns {(bar date, ticker): [ScanResult, ...]} with results in scanner
+    order, so a backtest can look signals up instead of scanning daily.
+    """
+    spy_close = spy_df["close"] if not spy_df.empty else pd.Series(dtype=float)
+    if QMAG.rs_rank_filter:
+        indicator_panels = ranked_panels(universe_data, spy_close, indicator_panels)
+    table: SignalTable = {}
+    for ticker, df in universe_data.items():
+        if df.empty:
+            continue
+        panel = indicator_panels.get(ticker) if indicator_panels else None
+        ticker_earnings = earnings_data.get(ticker) if earnings_data else None
+        try:
+            hits = scan_history(df, ticker, spy_close, min_score,
+                                earnings_data=ticker_earnings, panel=panel)
+        except Exception:
+            continue
+        for r in hits:
+            table.setdefault((r.date, ticker), []).append(r)
+    return table
+
+
+def lookup_signals(
+    signal_table: SignalTable,
+    universe_data: Dict[str, pd.DataFrame],
+    as_of_positions: Dict[str, int],
+    setup_types: Optional[Tuple[str, ...]] = None,
+) -> List[ScanResult]:
+    """
+    run_full_scan equivalent on a precomputed signal table: the signals on
+    each ticker's as-of bar, sorted by score (best first).
+    """
+    results = []
+    for ticker, pos in as_of_positions.items():
+        df = universe_data.get(ticker)
+        if df is None or pos < 0:
+            continue
+        for r in signal_table.get((df.index[pos], ticker), ()):
+            if setup_types is None or r.setup_type in setup_types:
+                results.append(r)
     results.sort(key=lambda x: x.score, reverse=True)
     return results
+
+
+def signal_table_frame(signal_table: SignalTable) -> pd.DataFrame:
+    """Flatten a signal table into a DataFrame indexed by (date, ticker)."""
+    rows = [vars(r) for hits in signal_table.values() for r in hits]
+    if not rows:
+        return pd.DataFrame(columns=list(ScanResult.__dataclass_fields__))
+    frame = pd.DataFrame(rows)
+    return frame.set_index(["date", "ticker"]).sort_index()
@@ -0,0 +1,482 @@
+"""
+STREAMING INDICATORS — O(1) per-bar indicator updates
+=====================================================
+Incremental counterparts of the rolling indicators in algo.indicators for
+the scan / live path. Each indicator keeps O(window) state and absorbs one
+new bar in O(1), so a nightly or intraday rescan only processes the bars
+that arrived since the last run instead of recomputing every window from
+scratch.
+
+Semantics follow the batch functions:
+  StreamingSMA            sma()                (NaN until the window is full)
+  StreamingEMA            ema()                (adjust=False)
+  StreamingRSI            rsi()                (Wilder, pandas ewm adjust=True)
+  StreamingATR            atr()
+  StreamingADR            adr_pct()
+  StreamingBollingerWidth bollinger_width() / bollinger_squeeze()
+  StreamingRelativeVolume relative_volume()
+  StreamingMAAlignment    ma_alignment()
+
+StreamingIndicatorEngine holds one TickerIndicatorState per ticker and
+produces the same columns as algo.indicator_panel, so its frames/panels
+can be handed straight to run_full_scan.
+"""
+
+import math
+import pickle
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from algo.config import QMAG
+from algo.indicator_panel import BREAKOUT_MAS, add_rs_ranks
+
+
+NAN = float("nan")
+
+PANEL_COLUMNS = (
+    "adr", "sma200", "atr14", "vcp", "vol_contraction", "ma_aligned",
+    "ma_aligned_std", "rvol", "avg_vol50", "squeeze", "rs",
+)
+
+
+class _RollingWindow:
+    """Fixed-size window with running sum / sum of squares (NaN-aware)."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._buf: deque = deque()
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._nans = 0
+        self._since_refresh = 0
+
+    def push(self, x: float):
+        x = float(x)
+        self._buf.append(x)
+        if math.isnan(x):
+            self._nans += 1
+        else:
+            self._sum += x
+            self._sumsq += x * x
+        if len(self._buf) > self.period:
+            old = self._buf.popleft()
+            if math.isnan(old):
+                self._nans -= 1
+            else:
+                self._sum -= old
+                self._sumsq -= old * old
+        # Re-sum once per window so add/remove rounding never accumulates
+        self._since_refresh += 1
+        if self._since_refresh >= self.period:
+            vals = [v for v in self._buf if not math.isnan(v)]
+            self._sum = math.fsum(vals)
+            self._sumsq = math.fsum(v * v for v in vals)
+            self._since_refresh = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self._buf) == self.period and self._nans == 0
+
+    def mean(self) -> float:
+        return self._sum / self.period if self.ready else NAN
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, like pandas rolling std)."""
+        if not self.ready or self.period < 2:
+            return NAN
+        var = (self._sumsq - self._sum * self._sum / self.period) / (self.period - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+# ============================================================================
+# SINGLE INDICATORS
+# ============================================================================
+
+class StreamingSMA:
+    def __init__(self, period: int):
+        self.period = period
+        self._win = _RollingWindow(period)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self._win.push(x)
+        self.value = self._win.mean()
+        return self.value
+
+
+class StreamingEMA:
+    """EMA with adjust=False: seeded with the first value."""
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1.0)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        if math.isnan(self.value):
+            self.value = float(x)
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingRSI:
+    """
+    Wilder RSI matching rsi(): gains/losses are averaged with pandas'
+    ewm(alpha=1/period, adjust=True), i.e. num/den recursions.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._decay = 1.0 - 1.0 / period
+        self._prev = NAN
+        self._gain_num = 0.0
+        self._loss_num = 0.0
+        self._den = 0.0
+        self._count = 0
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        delta = close - self._prev
+        # Same as delta.where(delta > 0, 0.0): the first (NaN) delta counts as 0
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self._prev = close
+        self._gain_num = gain + self._decay * self._gain_num
+        self._loss_num = loss + self._decay * self._loss_num
+        self._den = 1.0 + self._decay * self._den
+        self._count += 1
+
+        if self._count < self.period or self._loss_num == 0:
+            self.value = NAN
+        else:
+            rs = self._gain_num / self._loss_num
+            self.value = 100.0 - (100.0 / (1.0 + rs))
+        return self.value
+
+
+class StreamingATR:
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close = NAN
+        self._win = _RollingWindow(period)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = true_range(high, low, self._prev_close)
+        self._prev_close = close
+        self._win.push(tr)
+        self.value = self._win.mean()
+        return self.value
+
+
+class StreamingADR:
+    """ADR% — rolling mean of (high - low) / close * 100."""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self._win = _RollingWindow(period)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self._win.push((high - low) / close * 100.0)
+        self.value = self._win.mean()
+        return self.value
+
+
+class StreamingBollingerWidth:
+    """Bollinger band width (% of middle) plus the squeeze flag."""
+
+    def __init__(self, period: int = 20, mult: float = 2.0):
+        self.period = period
+        self.mult = mult
+        self._win = _RollingWindow(period)
+        self._width_sma = StreamingSMA(period)
+        self.value = NAN
+        self.squeeze = False
+
+    def update(self, close: float) -> float:
+        self._win.push(close)
+        middle = self._win.mean()
+        std = self._win.std()
+        upper = middle + self.mult * std
+        lower = middle - self.mult * std
+        self.value = (upper - lower) / middle * 100.0 if middle != 0 else NAN
+        width_sma = self._width_sma.update(self.value)
+        self.squeeze = bool(self.value < width_sma * 0.75)
+        return self.value
+
+
+class StreamingRelativeVolume:
+    """Volume / SMA(volume, period); average exposed as .average."""
+
+    def __init__(self, period: int = 50):
+        self._avg = StreamingSMA(period)
+        self.average = NAN
+        self.value = NAN
+
+    def update(self, volume: float) -> float:
+        self.average = self._avg.update(volume)
+        self.value = volume / self.average if self.average != 0 else NAN
+        return self.value
+
+
+class StreamingMAAlignment:
+    """Price > MA(short) > ... > MA(long), every MA rising over 5 bars."""
+
+    SLOPE_BARS = 5
+
+    def __init__(self, periods: List[int]):
+        self.periods = sorted(periods)
+        self._smas = [StreamingSMA(p) for p in self.periods]
+        self._history: deque = deque(maxlen=self.SLOPE_BARS + 1)
+        self.value = False
+
+    def update(self, close: float) -> bool:
+        mas = [s.update(close) for s in self._smas]
+        self._history.append(mas)
+
+        stacked = close > mas[0]
+        for a, b in zip(mas, mas[1:]):
+            stacked = stacked and a > b
+
+        rising = len(self._history) > self.SLOPE_BARS
+        if rising:
+            past = self._history[0]
+            rising = all(now - then > 0 for now, then in zip(mas, past))
+
+        self.value = bool(stacked and rising)
+        return self.value
+
+
+def true_range(high: float, low: float, prev_close: float) -> float:
+    """True range; falls back to high - low when there is no previous close."""
+    if math.isnan(prev_close):
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+# ============================================================================
+# PER-TICKER STATE
+# ============================================================================
+
+class TickerIndicatorState:
+    """
+    Every scanner indicator for one ticker, updated bar by bar.
+    Keeps the last `history` bars and indicator rows so a scan can run on
+    a bounded tail instead of the full history.
+    """
+
+    RS_LOOKBACK = 63
+
+    def __init__(self, history: int = 300, trend_mas: Optional[List[int]] = None):
+        trend_mas = list(trend_mas or QMAG.trend_mas)
+        self.adr = StreamingADR(20)
+        self.sma200 = StreamingSMA(200)
+        self.atr14 = StreamingATR(14)
+        self.atr5 = StreamingATR(5)
+        self.atr20 = StreamingATR(20)
+        self.vol5 = StreamingSMA(5)
+        self.vol20 = StreamingSMA(20)
+        self.rvol = StreamingRelativeVolume(50)
+        self.bollinger = StreamingBollingerWidth(20)
+        self.aligned = StreamingMAAlignment(trend_mas)
+        self.aligned_std = (None if sorted(trend_mas) == BREAKOUT_MAS
+                            else StreamingMAAlignment(BREAKOUT_MAS))
+        self._closes: deque = deque(maxlen=self.RS_LOOKBACK + 1)
+
+        self.dates: deque = deque(maxlen=history)
+        self.bars: deque = deque(maxlen=history)
+        self.rows: deque = deque(maxlen=history)
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        return self.dates[-1] if self.dates else None
+
+    @property
+    def last_close(self) -> float:
+        return self.bars[-1][3] if self.bars else NAN
+
+    def update(self, date, open_: float, high: float, low: float,
+               close: float, volume: float) -> Dict[str, float]:
+        """Absorb one bar; returns its indicator row (panel columns + ret63)."""
+        atr5 = self.atr5.update(high, low, close)
+        atr20 = self.atr20.update(high, low, close)
+        ratio = atr5 / atr20 if atr20 != 0 else NAN
+        vcp = NAN if math.isnan(ratio) else min(max((1.0 - ratio) * 100.0, 0.0), 100.0)
+
+        vol20 = self.vol20.update(volume)
+        vol5 = self.vol5.update(volume)
+        vol_contraction = vol5 / vol20 if vol20 != 0 else NAN
+
+        self.bollinger.update(close)
+        aligned = self.aligned.update(close)
+        aligned_std = aligned if self.aligned_std is None else self.aligned_std.update(close)
+
+        self._closes.append(close)
+        ret63 = (close / self._closes[0] - 1.0
+                 if len(self._closes) > self.RS_LOOKBACK else NAN)
+
+        row = {
+            "adr": self.adr.update(high, low, close),
+            "sma200": self.sma200.update(close),
+            "atr14": self.atr14.update(high, low, close),
+            "vcp": vcp,
+            "vol_contraction": vol_contraction,
+            "ma_aligned": float(aligned),
+            "ma_aligned_std": float(aligned_std),
+            "rvol": self.rvol.update(volume),
+            "avg_vol50": self.rvol.average,
+            "squeeze": float(self.bollinger.squeeze),
+            "ret63": ret63,
+        }
+        self.dates.append(pd.Timestamp(date))
+        self.bars.append((open_, high, low, close, volume))
+        self.rows.append(row)
+        return row
+
+    def frame(self) -> pd.DataFrame:
+        """OHLCV for the retained bars."""
+        return pd.DataFrame(list(self.bars), index=pd.DatetimeIndex(list(self.dates)),
+                            columns=["open", "high", "low", "close", "volume"])
+
+    def ret63_series(self) -> pd.Series:
+        return pd.Series([r["ret63"] for r in self.rows],
+                         index=pd.DatetimeIndex(list(self.dates)))
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+class StreamingIndicatorEngine:
+    """
+    Streaming indicator state for a whole universe.
+
+        engine = StreamingIndicatorEngine.load(path, benchmark="SPY")
+        for ticker, df in data.items():
+            engine.sync(ticker, df)                     # only new bars are processed
+        engine.save(path)
+        run_full_scan(engine.frames(tickers), spy_df,
+                      indicator_panels=engine.panels(tickers))
+
+    The benchmark keeps twice the history so RS stays defined on the
+    retained dates of tickers with gaps in their bars.
+    """
+
+    def __init__(self, history: int = 300, trend_mas: Optional[List[int]] = None,
+                 benchmark: Optional[str] = None):
+        self.history = history
+        self.trend_mas = list(trend_mas or QMAG.trend_mas)
+        self.benchmark = benchmark
+        self.states: Dict[str, TickerIndicatorState] = {}
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.states
+
+    def update(self, ticker: str, date, open_: float, high: float, low: float,
+               close: float, volume: float) -> Dict[str, float]:
+        """Append one new bar for ticker (O(1))."""
+        state = self.states.get(ticker)
+        if state is None:
+            history = self.history * 2 if ticker == self.benchmark else self.history
+            state = TickerIndicatorState(history, self.trend_mas)
+            self.states[ticker] = state
+        return state.update(date, open_, high, low, close, volume)
+
+    def sync(self, ticker: str, df: pd.DataFrame) -> int:
+        """
+        Bring ticker up to date with df; returns the number of bars processed.
+        Only bars after the last seen date are fed. The state is rebuilt when
+        the last seen bar is missing from df or its close changed (the price
+        history was re-adjusted).
+        """
+        if df.empty:
+            return 0
+        state = self.states.get(ticker)
+        if state is not None and state.last_date is not None:
+            last = state.last_date
+            pos = int(df.index.searchsorted(last, side="left"))
+            stale = (pos >= len(df) or df.index[pos] != last
+                     or not math.isclose(float(df["close"].iloc[pos]), state.last_close,
+                                         rel_tol=1e-9))
+            if not stale:
+                new = df.iloc[pos + 1:]
+                self._feed(ticker, new)
+                return len(new)
+            del self.states[ticker]
+        self._feed(ticker, df)
+        return len(df)
+
+    def _feed(self, ticker: str, df: pd.DataFrame):
+        cols = [df[c].values.astype(float) for c in ("open", "high", "low", "close", "volume")]
+        for i, date in enumerate(df.index):
+            self.update(ticker, date, cols[0][i], cols[1][i], cols[2][i],
+                        cols[3][i], cols[4][i])
+
+    def snapshot(self, ticker: str) -> Dict[str, float]:
+        """Latest indicator row for ticker (without RS)."""
+        state = self.states.get(ticker)
+        return dict(state.rows[-1]) if state and state.rows else {}
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        state = self.states.get(ticker)
+        return state.frame() if state else pd.DataFrame()
+
+    def panel(self, ticker: str, benchmark: Optional[str] = None) -> pd.DataFrame:
+        """
+        Indicator panel over the retained bars, same columns as
+        build_indicator_panel. rs needs the benchmark to be tracked too.
+        """
+        benchmark = benchmark or self.benchmark
+        state = self.states.get(ticker)
+        if state is None:
+            return pd.DataFrame(columns=list(PANEL_COLUMNS))
+        index = pd.DatetimeIndex(list(state.dates))
+        panel = pd.DataFrame(list(state.rows), index=index)
+        bench = self.states.get(benchmark) if benchmark else None
+        if bench is not None:
+            bench_ret = bench.ret63_series().reindex(index)
+        else:
+            bench_ret = pd.Series(np.nan, index=index)
+        panel["rs"] = panel.pop("ret63") - bench_ret
+        return panel[list(PANEL_COLUMNS)].astype(float)
+
+    def frames(self, tickers: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        tickers = self.states.keys() if tickers is None else tickers
+        return {t: self.frame(t) for t in tickers if t in self.states}
+
+    def panels(self, tickers: Optional[List[str]] = None,
+               benchmark: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Panels for tickers, with rs_rank ranked across them (see add_rs_ranks)."""
+        tickers = self.states.keys() if tickers is None else tickers
+        return add_rs_ranks({t: self.panel(t, benchmark) for t in tickers if t in self.states})
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str, history: int = 300,
+             trend_mas: Optional[List[int]] = None,
+             benchmark: Optional[str] = None) -> "StreamingIndicatorEngine":
+        """Load saved state; a fresh engine if the file is missing, unreadable or
+        was built with different settings."""
+        try:
+            with open(path, "rb") as f:
+                engine = pickle.load(f)
+            if (isinstance(engine, cls) and engine.history == history
+                    and engine.trend_mas == list(trend_mas or QMAG.trend_mas)
+                    and engine.benchmark == benchmark):
+                return engine
+        except Exception:
+            pass
+        return cls(history, trend_mas, benchmark)
@@ -0,0 +1,298 @@
+"""
+PARAMETER SWEEP — Parallel BacktestEngine runs over a parameter space
+=====================================================================
+Runs one backtest per parameter set and ranks them, instead of editing
+config.py by hand between runs.
+
+Parameters are addressed as "<TARGET>.<name>":
+  QMAG.<field>          QullamaggieConfig (scanner / trade management)
+  MACRO_ENGINE.<field>  MacroEngineConfig
+  PM.<CONSTANT>         position-manager sizing / cost constants (PM_CONSTANTS)
+
+Space spec (used by param_grid / random_params):
+  "QMAG.min_adr_pct": [2.0, 3.0, 4.0]                 explicit values
+  "QMAG.trail_ma": {"low": 10, "high": 50, "num": 5}   grid: linspace; random: uniform
+                                                       (ints when low/high are ints)
+
+The universe, UniversePanel, indicator panels, macro and earnings data are
+loaded once in the parent. Workers are forked from it, so every run shares
+them copy-on-write and only pays for the day-by-day simulation.
+"""
+
+import itertools
+import multiprocessing as mp
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import algo.position_manager as position_manager
+from algo.config import (
+    QMAG, MACRO_ENGINE, FILLS, EXECUTION, INITIAL_CAPITAL, BACKTEST_START, BACKTEST_END,
+)
+
+
+PARAM_TARGETS = {
+    "QMAG": QMAG,
+    "MACRO_ENGINE": MACRO_ENGINE,
+    "FILLS": FILLS,
+    "EXECUTION": EXECUTION,
+    "PM": position_manager,
+}
+
+# Module constants of algo.position_manager a sweep may override as PM.<name>
+PM_CONSTANTS = (
+    "MAX_POSITIONS", "MAX_POSITIONS_BULL", "MAX_POSITIONS_NEUTRAL", "MAX_POSITIONS_BEAR",
+    "MAX_RISK_PER_TRADE_PCT", "MAX_TOTAL_RISK_PCT", "MAX_POSITION_PCT_OF_EQUITY",
+    "TARGET_POSITION_PCT", "COMMISSION_PCT", "SLIPPAGE_PCT",
+)
+
+# Parameters that change the precomputed indicator panels (MA stack periods).
+# Runs that override them rebuild their own panels.
+PANEL_PARAMS = {"QMAG.trend_mas"}
+
+SUMMARY_METRICS = [
+    "total_return_pct", "cagr_pct", "max_drawdown_pct", "sharpe_ratio",
+    "sortino_ratio", "calmar_ratio", "final_equity",
+]
+TRADE_METRICS = ["total", "win_rate_pct", "profit_factor", "avg_r_multiple"]
+
+
+# ============================================================================
+# PARAMETER OVERRIDES
+# ============================================================================
+
+def _resolve(key: str):
+    target_name, _, attr = key.partition(".")
+    target = PARAM_TARGETS.get(target_name)
+    if target is None or not attr:
+        raise ValueError(f"Unknown sweep parameter '{key}' "
+                         f"(expected one of {sorted(PARAM_TARGETS)} + '.<name>')")
+    if target_name == "PM" and attr not in PM_CONSTANTS:
+        raise ValueError(f"Sweep parameter '{key}' is not a position-manager constant "
+                         f"(expected one of {', '.join(PM_CONSTANTS)})")
+    if not hasattr(target, attr):
+        raise ValueError(f"Unknown sweep parameter '{key}': {target_name} has no '{attr}'")
+    return target, attr
+
+
+def apply_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Set parameters in place; returns the previous values."""
+    previous = {}
+    for key, value in params.items():
+        target, attr = _resolve(key)
+        previous[key] = getattr(target, attr)
+        setattr(target, attr, value)
+    return previous
+
+
+@contextmanager
+def override_params(params: Dict[str, Any]):
+    """Temporarily apply parameters, restoring the old values on exit."""
+    previous = apply_params(params)
+    try:
+        yield
+    finally:
+        apply_params(previous)
+
+
+def _values(spec, num_default: int = 3) -> list:
+    if isinstance(spec, dict):
+        low, high = spec["low"], spec["high"]
+        vals = np.linspace(low, high, int(spec.get("num", num_default)))
+        if isinstance(low, int) and isinstance(high, int):
+            return sorted(set(int(round(v)) for v in vals))
+        return [float(v) for v in vals]
+    return list(spec)
+
+
+def param_grid(space: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Full Cartesian grid over the space."""
+    for key in space:
+        _resolve(key)
+    keys = list(space)
+    return [dict(zip(keys, combo))
+            for combo in itertools.product(*(_values(space[k]) for k in keys))]
+
+
+def random_params(space: Dict[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """n random draws: choice for value lists, uniform for low/high ranges."""
+    for key in space:
+        _resolve(key)
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        params = {}
+        for key, spec in space.items():
+            if isinstance(spec, dict):
+                low, high = spec["low"], spec["high"]
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(list(spec))
+        out.append(params)
+    return out
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+# Inputs shared by every run. Set in the parent before the pool forks.
+_SHARED: Dict[str, Any] = {}
+
+
+def _init_worker(shared: Dict[str, Any]):
+    """Pool initializer for platforms without fork (shared inputs pickled once per worker)."""
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+
+def _run_point(run_id: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one backtest with params applied; returns its summary row."""
+    from algo.backtest_engine import BacktestEngine
+
+    row: Dict[str, Any] = {"run": run_id, **params}
+    engine_kwargs = dict(_SHARED["engine_kwargs"])
+    if PANEL_PARAMS & set(params):
+        engine_kwargs["indicator_panels"] = None
+    try:
+        with override_params(params):
+            engine = BacktestEngine(**engine_kwargs)
+            results = engine.run()
+        if "error" in results:
+            row["error"] = results["error"]
+            return row
+        for k in SUMMARY_METRICS:
+            row[k] = results["performance"][k]
+        for k in TRADE_METRICS:
+            row[f"trades_{k}" if k == "total" else k] = results["trades"][k]
+        row["error"] = ""
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def load_shared_inputs(
+    universe_data: Dict[str, pd.DataFrame],
+    spy_data: pd.DataFrame,
+    start_date: str = BACKTEST_START,
+    end_date: str = BACKTEST_END,
+    sector_etf_data: Optional[Dict[str, pd.DataFrame]] = None,
+    param_sets: Iterable[Dict[str, Any]] = (),
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """
+    Build the inputs every run can share: UniversePanel, indicator panels,
+    macro and earnings data (the last two fetched if the config or any of
+    param_sets enables them). Pass the result to BacktestEngine as kwargs.
+    """
+    from algo.backtest_engine import BacktestEngine
+
+    param_sets = list(param_sets)
+    load_flags = {
+        key: getattr(MACRO_ENGINE, key.split(".", 1)[1])
+             or any(p.get(key) for p in param_sets)
+        for key in ("MACRO_ENGINE.enabled", "MACRO_ENGINE.earnings_enabled")
+    }
+    with override_params(load_flags):
+        base = BacktestEngine(
+            universe_data, spy_data, start_date=start_date, end_date=end_date,
+            verbose=verbose, sector_etf_data=sector_etf_data,
+        )
+    return {
+        "universe_panel": base.universe,
+        "indicator_panels": base.indicator_panels,
+        "macro_data": base.macro_data,
+        "earnings_data": base.earnings_data,
+    }
+
+
+def run_sweep(
+    universe_data: Dict[str, pd.DataFrame],
+    spy_data: pd.DataFrame,
+    param_sets: Iterable[Dict[str, Any]],
+    start_date: str = BACKTEST_START,
+    end_date: str = BACKTEST_END,
+    initial_capital: float = INITIAL_CAPITAL,
+    scan_frequency: int = 1,
+    sector_etf_data: Optional[Dict[str, pd.DataFrame]] = None,
+    workers: int = 1,
+    rank_by: str = "calmar_ratio",
+    verbose: bool = True,
+    preloaded: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Backtest every parameter set and return a summary table ranked by
+    `rank_by` (best first). One row per run: the parameters, the headline
+    performance metrics, trade stats and an error column.
+    preloaded: output of load_shared_inputs to reuse (loaded here when None).
+    """
+    param_sets = [dict(p) for p in param_sets]
+    for params in param_sets:
+        for key in params:
+            _resolve(key)
+
+    if preloaded is None:
+        if verbose:
+            print(f"Sweep: loading shared inputs for {len(param_sets)} runs...")
+        preloaded = load_shared_inputs(universe_data, spy_data, start_date, end_date,
+                                       sector_etf_data, param_sets, verbose)
+
+    shared = {"engine_kwargs": dict(
+        universe_data=universe_data,
+        spy_data=spy_data,
+        initial_capital=initial_capital,
+        scan_frequency=scan_frequency,
+        start_date=start_date,
+        end_date=end_date,
+        verbose=False,
+        sector_etf_data=sector_etf_data,
+        **preloaded,
+    )}
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+    rows = []
+    if workers <= 1 or len(param_sets) <= 1:
+        for i, params in enumerate(param_sets):
+            rows.append(_run_point(i, params))
+            if verbose:
+                _print_progress(rows[-1], len(param_sets))
+    else:
+        if "fork" in mp.get_all_start_methods():
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork"))
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(shared,))
+        with pool:
+            futures = [pool.submit(_run_point, i, p) for i, p in enumerate(param_sets)]
+            for fut in futures:
+                rows.append(fut.result())
+                if verbose:
+                    _print_progress(rows[-1], len(param_sets))
+    _SHARED.clear()
+
+    return rank_results(pd.DataFrame(rows), rank_by)
+
+
+def rank_results(table: pd.DataFrame, rank_by: str = "calmar_ratio") -> pd.DataFrame:
+    """Sort a sweep table best-first on rank_by (failed runs last) and add a rank column."""
+    if table.empty or rank_by not in table.columns:
+        return table
+    table = table.sort_values(rank_by, ascending=False, kind="mergesort", na_position="last")
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+def _print_progress(row: Dict[str, Any], total: int):
+    if row.get("error"):
+        print(f"  run {row['run'] + 1}/{total}: FAILED ({row['error']})")
+    else:
+        print(f"  run {row['run'] + 1}/{total}: CAGR {row['cagr_pct']:.1f}% | "
+              f"MaxDD {row['max_drawdown_pct']:.1f}% | Calmar {row['calmar_ratio']:.3f}")
@@ -0,0 +1,198 @@
+"""
+TRADE LEDGER — Append-only columnar store of closed trades
+==========================================================
+Replaces List[TradeRecord]: one growable numpy column per field, with
+setup type and exit reason stored as small integer codes into category
+lists (first-seen order):
+
+  entry_ns / exit_ns / shares / holding_days       int64
+  entry_price / exit_price / pnl / r_multiple /
+  score                                            float64
+  setup_code / reason_code                         int16
+  ticker                                           object
+
+Trade statistics are whole-column reductions and the by-setup breakdown
+is a bincount group-by over setup_code, so analytics cost does not grow
+with a Python pass per statistic. The ledger still behaves like the old
+list where callers need it: append(TradeRecord), len(), and iteration /
+indexing return TradeRecord objects.
+"""
+
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+
+_DTYPES = {
+    "ticker": object,
+    "setup_code": np.int16,
+    "reason_code": np.int16,
+    "entry_ns": np.int64,
+    "exit_ns": np.int64,
+    "entry_price": np.float64,
+    "exit_price": np.float64,
+    "shares": np.int64,
+    "pnl": np.float64,
+    "r_multiple": np.float64,
+    "holding_days": np.int64,
+    "score": np.float64,
+}
+
+
+class TradeLedger:
+    """Closed trades as parallel columns, with categorical setup / exit-reason codes."""
+
+    def __init__(self, capacity: int = 256):
+        self.n = 0
+        self._data = {f: np.zeros(capacity, dtype=dt) for f, dt in _DTYPES.items()}
+        self.setups: List[str] = []
+        self.reasons: List[str] = []
+        self._setup_codes: Dict[str, int] = {}
+        self._reason_codes: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Append / access
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _code(value: str, codes: Dict[str, int], names: List[str]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def append(self, trade):
+        """Add one TradeRecord."""
+        if self.n == len(self._data["ticker"]):
+            for f, arr in self._data.items():
+                grown = np.zeros(2 * len(arr), dtype=arr.dtype)
+                grown[:self.n] = arr[:self.n]
+                self._data[f] = grown
+        values = {
+            "ticker": trade.ticker,
+            "setup_code": self._code(trade.setup_type, self._setup_codes, self.setups),
+            "reason_code": self._code(trade.exit_reason, self._reason_codes, self.reasons),
+            "entry_ns": pd.Timestamp(trade.entry_date).value,
+            "exit_ns": pd.Timestamp(trade.exit_date).value,
+            "entry_price": trade.entry_price,
+            "exit_price": trade.exit_price,
+            "shares": trade.shares,
+            "pnl": trade.pnl,
+            "r_multiple": trade.r_multiple,
+            "holding_days": trade.holding_days,
+            "score": trade.score,
+        }
+        row = self.n
+        for f, v in values.items():
+            self._data[f][row] = v
+        self.n += 1
+
+    def extend(self, trades):
+        for trade in trades:
+            self.append(trade)
+
+    def col(self, field: str) -> np.ndarray:
+        """Read-only view of a column over the recorded trades."""
+        view = self._data[field][:self.n]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int):
+        from algo.position_manager import TradeRecord
+
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        d = self._data
+        return TradeRecord(
+            ticker=d["ticker"][i],
+            setup_type=self.setups[d["setup_code"][i]],
+            entry_date=pd.Timestamp(int(d["entry_ns"][i])),
+            exit_date=pd.Timestamp(int(d["exit_ns"][i])),
+            entry_price=float(d["entry_price"][i]),
+            exit_price=float(d["exit_price"][i]),
+            shares=int(d["shares"][i]),
+            pnl=float(d["pnl"][i]),
+            r_multiple=float(d["r_multiple"][i]),
+            holding_days=int(d["holding_days"][i]),
+            exit_reason=self.reasons[d["reason_code"][i]],
+            score=float(d["score"][i]),
+        )
+
+    def __iter__(self) -> Iterator:
+        return (self[i] for i in range(self.n))
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """Trade statistics for the results dict (unrounded)."""
+        n = self.n
+        if n == 0:
+            return {"total": 0, "win_rate_pct": 0, "avg_win": 0, "avg_loss": 0,
+                    "profit_factor": 0, "avg_r_multiple": 0, "avg_holding_days": 0,
+                    "by_setup": {}}
+        pnl = self.col("pnl")
+        r = self.col("r_multiple")
+        win = pnl > 0
+
+        # [loser sum, winner sum] and counts in one grouped pass (summed in trade order)
+        side_pnl = np.bincount(win, weights=pnl, minlength=2)
+        side_n = np.bincount(win, minlength=2)
+        loss_sum, win_sum = float(side_pnl[0]), float(side_pnl[1])
+        profit_factor = (abs(win_sum / loss_sum) if side_n[0] and loss_sum != 0
+                         else float("inf"))
+
+        # By setup type: group-by over the setup codes
+        codes = self.col("setup_code")
+        k = len(self.setups)
+        s_n = np.bincount(codes, minlength=k)
+        s_win = np.bincount(codes, weights=win, minlength=k)
+        s_r = np.bincount(codes, weights=r, minlength=k)
+        s_pnl = np.bincount(codes, weights=pnl, minlength=k)
+        by_setup = {
+            stype: {
+                "count": int(s_n[c]),
+                "win_rate": float(s_win[c] / s_n[c] * 100),
+                "avg_r": float(s_r[c] / s_n[c]),
+                "total_pnl": float(s_pnl[c]),
+            }
+            for c, stype in enumerate(self.setups) if s_n[c]
+        }
+
+        return {
+            "total": n,
+            "win_rate_pct": int(side_n[1]) / n * 100,
+            "avg_win": float(np.mean(pnl[win])) if side_n[1] else 0,
+            "avg_loss": float(np.mean(pnl[~win])) if side_n[0] else 0,
+            "profit_factor": profit_factor,
+            "avg_r_multiple": float(np.mean(r)),
+            "avg_holding_days": float(np.mean(self.col("holding_days"))),
+            "by_setup": by_setup,
+        }
+
+    def to_records(self) -> List[dict]:
+        """Per-trade dicts for the JSON trade log."""
+        d = {f: self.col(f) for f in _DTYPES}
+        day = {f: np.datetime_as_string(d[f].astype("datetime64[ns]"), unit="D").tolist()
+               for f in ("entry_ns", "exit_ns")}
+        setups = [self.setups[c] for c in d["setup_code"].tolist()]
+        reasons = [self.reasons[c] for c in d["reason_code"].tolist()]
+        rounded = {f: [round(v, 2) for v in d[f].tolist()]
+                   for f in ("entry_price", "exit_price", "pnl", "r_multiple")}
+        keys = ("ticker", "setup", "entry_date", "exit_date", "entry_price", "exit_price",
+                "shares", "pnl", "r_multiple", "days", "exit_reason")
+        return [
+            dict(zip(keys, row))
+            for row in zip(d["ticker"].tolist(), setups, day["entry_ns"], day["exit_ns"],
+                           rounded["entry_price"], rounded["exit_price"], d["shares"].tolist(),
+                           rounded["pnl"], rounded["r_multiple"], d["holding_days"].tolist(),
+                           reasons)
+        ]
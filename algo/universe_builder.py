@@ -19,6 +19,7 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
 from algo.config import CHINA_ADR_UNIVERSE
+from algo.universe_panel import UniversePanel, trailing_mean
 
 
 # ============================================================================
@@ -236,58 +237,67 @@ def pre_filter_universe(
 # ============================================================================
 
 def daily_scan_prefilter(
-    universe_data: Dict[str, pd.DataFrame],
+    universe_data,
     as_of_date: pd.Timestamp,
     min_adr_pct: float = 2.0,
     above_sma: int = 200,
+    min_avg_volume: float = 50000,
 ) -> List[str]:
     """
     Fast vectorized pre-filter on OHLCV data.
     Returns tickers that:
       1. Have price above their 200 SMA (uptrend)
       2. Have ADR(20) > 2% (volatile enough for momentum)
+      3. Trade more than 50K shares a day (20-day average)
 
     This narrows ~3000 tickers to ~200-500 candidates per day.
     Only these go to the full HTF/EP/Breakout scanner.
+
+    The SMA / ADR / volume windows are each ticker's own last N bars (a
+    window holding a missing value fails), so calendar gaps such as halts
+    or a late listing do not shorten them.
+
+    universe_data may be a UniversePanel (every ticker evaluated at once
+    on one calendar column) or a Dict[str, DataFrame] (each ticker's last
+    N bars sliced from its own frame; no panel is built). A backtest that
+    filters every day should build a ScanPrefilter once instead.
     """
-    candidates = []
+    if isinstance(universe_data, UniversePanel):
+        return _panel_scan_prefilter(universe_data, as_of_date, min_adr_pct, above_sma, min_avg_volume)
 
+    as_of = np.datetime64(pd.Timestamp(as_of_date))
+    candidates = []
     for ticker, df in universe_data.items():
-        if df.empty or len(df) < above_sma + 20:
+        if len(df) < above_sma + 20:
             continue
-
-        # Get data up to as_of_date
-        mask = df.index <= as_of_date
-        if not mask.any():
+        close = df["close"].values
+        has_bar = ~np.isnan(close)
+        gaps = not has_bar.all()
+        if gaps and has_bar.sum() < above_sma + 20:   # Enough history overall
             continue
-
-        idx = mask.sum() - 1
+        dates = df.index.values[has_bar] if gaps else df.index.values
+        idx = int(np.searchsorted(dates, as_of, side="right")) - 1
         if idx < above_sma:
             continue
 
-        close = df["close"].values
         high = df["high"].values
         low = df["low"].values
+        vol = df["volume"].values
+        if gaps:
+            close, high, low, vol = close[has_bar], high[has_bar], low[has_bar], vol[has_bar]
 
-        current_close = close[idx]
-
-        # 1. Above 200 SMA
-        sma_val = np.mean(close[idx - above_sma + 1:idx + 1])
-        if current_close < sma_val:
-            continue
+        with np.errstate(invalid="ignore"):
+            # 1. Above 200 SMA
+            if not close[idx] >= np.mean(close[idx - above_sma + 1:idx + 1]):
+                continue
 
-        # 2. ADR(20) > min_adr_pct
-        if idx >= 20:
-            daily_range = (high[idx - 19:idx + 1] - low[idx - 19:idx + 1]) / close[idx - 19:idx + 1] * 100
-            adr = np.mean(daily_range)
-            if adr < min_adr_pct:
+            # 2. ADR(20) > min_adr_pct
+            w = slice(idx - 19, idx + 1)
+            if not np.mean((high[w] - low[w]) / close[w] * 100) >= min_adr_pct:
                 continue
 
-        # 3. Minimum volume (last 20 days avg > 50K)
-        vol = df["volume"].values
-        if idx >= 20:
-            avg_vol = np.mean(vol[idx - 19:idx + 1])
-            if avg_vol < 50000:
+            # 3. Minimum volume (last 20 days avg > 50K)
+            if not np.mean(vol[w]) >= min_avg_volume:
                 continue
 
         candidates.append(ticker)
@@ -295,6 +305,93 @@ def daily_scan_prefilter(
     return candidates
 
 
+def _panel_scan_prefilter(
+    panel: UniversePanel,
+    as_of_date: pd.Timestamp,
+    min_adr_pct: float,
+    above_sma: int,
+    min_avg_volume: float = 50000,
+) -> List[str]:
+    """daily_scan_prefilter over a UniversePanel: one column, all tickers at once."""
+    col = panel.date_col(as_of_date)
+    if col < 0:
+        return []
+
+    counts = panel.bar_count
+    ok = counts[:, -1] >= above_sma + 20     # Enough history overall
+    ok &= counts[:, col] - 1 >= above_sma
+
+    close = panel.bar_values("close")
+    daily_range = (panel.bar_values("high") - panel.bar_values("low")) / close * 100
+
+    with np.errstate(invalid="ignore"):
+        # 1. Above 200 SMA
+        current_close = panel.asof_column("close", col)
+        ok &= current_close >= np.mean(panel.bar_window(close, col, above_sma), axis=1)
+
+        # 2. ADR(20) > min_adr_pct
+        ok &= np.mean(panel.bar_window(daily_range, col, 20), axis=1) >= min_adr_pct
+
+        # 3. Minimum volume (last 20 days avg > 50K)
+        avg_vol = np.mean(panel.bar_window(panel.bar_values("volume"), col, 20), axis=1)
+        ok &= avg_vol >= min_avg_volume
+
+    return [panel.tickers[i] for i in np.flatnonzero(ok)]
+
+
+def scan_prefilter_matrix(
+    panel: UniversePanel,
+    min_adr_pct: float = 2.0,
+    above_sma: int = 200,
+    min_avg_volume: float = 50000,
+) -> np.ndarray:
+    """
+    daily_scan_prefilter for every calendar column at once:
+    bool[n_tickers, n_dates], True where the ticker passes on that date.
+    The 200 SMA, ADR(20) and 20-day average volume are rolling means over
+    each ticker's own bars (running sums), mapped back to the calendar, so
+    the cost does not grow with the SMA length and nothing is recomputed
+    per day.
+    """
+    counts = panel.bar_count
+    ok = (counts[:, -1] >= above_sma + 20)[:, None] & (counts - 1 >= above_sma)
+
+    close = panel.bar_values("close")
+    daily_range = (panel.bar_values("high") - panel.bar_values("low")) / close * 100
+
+    with np.errstate(invalid="ignore"):
+        # 1. Above 200 SMA
+        ok &= panel.asof_matrix("close") >= panel.on_calendar(trailing_mean(close, above_sma))
+
+        # 2. ADR(20) > min_adr_pct
+        ok &= panel.on_calendar(trailing_mean(daily_range, 20)) >= min_adr_pct
+
+        # 3. Minimum volume (last 20 days avg > 50K)
+        ok &= panel.on_calendar(trailing_mean(panel.bar_values("volume"), 20)) >= min_avg_volume
+    return ok
+
+
+class ScanPrefilter:
+    """Precomputed daily_scan_prefilter over every date of a UniversePanel."""
+
+    def __init__(
+        self,
+        panel: UniversePanel,
+        min_adr_pct: float = 2.0,
+        above_sma: int = 200,
+        min_avg_volume: float = 50000,
+    ):
+        self.panel = panel
+        self.mask = scan_prefilter_matrix(panel, min_adr_pct, above_sma, min_avg_volume)
+
+    def candidates(self, as_of_date) -> List[str]:
+        """Tickers passing on the latest calendar date at or before as_of_date."""
+        col = self.panel.date_col(as_of_date)
+        if col < 0:
+            return []
+        return [self.panel.tickers[i] for i in np.flatnonzero(self.mask[:, col])]
+
+
 # ============================================================================
 # CONVENIENCE: Build full filtered universe for backtest
 # ============================================================================
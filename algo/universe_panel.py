@@ -0,0 +1,231 @@
+"""
+UNIVERSE PANEL — Cross-sectional (ticker × date) OHLCV store
+============================================================
+Holds the whole universe as aligned 2-D float arrays on one trading
+calendar (the SPY calendar in the backtest):
+
+  open/high/low/close/volume : float64[n_tickers, n_dates], NaN = no bar
+  valid                      : bool[n_tickers, n_dates]
+  ticker_index               : ticker -> row
+  date_index                 : date -> column
+
+Daily work becomes a column slice plus vectorized reductions across all
+tickers at once, instead of a Python loop over Dict[str, DataFrame].
+
+Indicators defined over a ticker's own last N bars (not N calendar
+columns) use the per-ticker bar axis: bar_values() left-aligns each
+ticker's bars, on_calendar() / bar_window() map them back to dates.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Iterable
+
+
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class UniversePanel:
+    """Aligned OHLCV arrays for a universe of tickers on a shared calendar."""
+
+    def __init__(
+        self,
+        tickers: List[str],
+        dates: pd.DatetimeIndex,
+        arrays: Dict[str, np.ndarray],
+        frames: Optional[Dict[str, pd.DataFrame]] = None,
+    ):
+        self.tickers = list(tickers)
+        self.dates = pd.DatetimeIndex(dates)
+        for f in OHLCV_FIELDS:
+            setattr(self, f, arrays[f])
+        self.valid = ~np.isnan(self.close)
+        self.ticker_index: Dict[str, int] = {t: i for i, t in enumerate(self.tickers)}
+        self.date_index: Dict[pd.Timestamp, int] = {d: j for j, d in enumerate(self.dates)}
+        self._date_values = self.dates.values
+        self._frames: Dict[str, pd.DataFrame] = dict(frames) if frames else {}
+        self._last_valid: Optional[np.ndarray] = None
+        self._bar_count: Optional[np.ndarray] = None
+        self._bar_values: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_frames(cls, universe_data: Dict[str, pd.DataFrame],
+                    calendar: pd.DatetimeIndex) -> "UniversePanel":
+        """
+        Align per-ticker OHLCV frames onto the calendar.
+        Bars on dates outside the calendar are dropped; missing bars are NaN.
+        """
+        tickers = [t for t, df in universe_data.items() if not df.empty]
+        calendar = pd.DatetimeIndex(calendar)
+        shape = (len(tickers), len(calendar))
+        arrays = {f: np.full(shape, np.nan) for f in OHLCV_FIELDS}
+
+        for i, ticker in enumerate(tickers):
+            df = universe_data[ticker]
+            cols = calendar.get_indexer(df.index)
+            hit = cols >= 0
+            for f in OHLCV_FIELDS:
+                arrays[f][i, cols[hit]] = df[f].values[hit]
+
+        frames = {t: universe_data[t] for t in tickers}
+        return cls(tickers, calendar, arrays, frames=frames)
+
+    # ------------------------------------------------------------------
+    # Shape / lookups
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.ticker_index
+
+    @property
+    def n_dates(self) -> int:
+        return len(self.dates)
+
+    def date_col(self, date) -> int:
+        """Calendar column for date (the last column <= date); -1 if before start."""
+        j = self.date_index.get(date)
+        if j is not None:
+            return j
+        return int(np.searchsorted(self._date_values, np.datetime64(pd.Timestamp(date)),
+                                   side="right")) - 1
+
+    def rows(self, tickers: Iterable[str]) -> np.ndarray:
+        """Row numbers for tickers (unknown tickers map to -1)."""
+        return np.array([self.ticker_index.get(t, -1) for t in tickers], dtype=np.int64)
+
+    @property
+    def last_valid(self) -> np.ndarray:
+        """int[n_tickers, n_dates]: column of the latest bar at or before each column (-1 = none)."""
+        if self._last_valid is None:
+            cols = np.where(self.valid, np.arange(self.n_dates)[None, :], -1)
+            self._last_valid = np.maximum.accumulate(cols, axis=1)
+        return self._last_valid
+
+    @property
+    def bar_count(self) -> np.ndarray:
+        """int[n_tickers, n_dates]: number of bars at or before each column."""
+        if self._bar_count is None:
+            self._bar_count = np.cumsum(self.valid, axis=1, dtype=np.int32)
+        return self._bar_count
+
+    def asof_matrix(self, field: str) -> np.ndarray:
+        """float[n_tickers, n_dates]: asof_column for every column at once."""
+        src = self.last_valid
+        vals = np.take_along_axis(getattr(self, field), np.maximum(src, 0), axis=1)
+        return np.where(src >= 0, vals, np.nan)
+
+    def asof_column(self, field: str, col: int,
+                    rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Latest value of field at or before calendar column col, for all rows
+        (or the given rows). NaN where a ticker has no bar yet.
+        """
+        if rows is None:
+            rows = np.arange(len(self.tickers))
+        out = np.full(len(rows), np.nan)
+        if col < 0:
+            return out
+        ok = rows >= 0
+        src = self.last_valid[rows[ok], col]
+        has = src >= 0
+        vals = np.full(ok.sum(), np.nan)
+        vals[has] = getattr(self, field)[rows[ok][has], src[has]]
+        out[ok] = vals
+        return out
+
+    def asof_bars(self, tickers: Iterable[str], date) -> Dict[str, Dict[str, float]]:
+        """{ticker: {open, high, low, close, volume}} for the latest bar at or before date."""
+        tickers = list(tickers)
+        rows = self.rows(tickers)
+        col = self.date_col(date)
+        cols = {f: self.asof_column(f, col, rows) for f in OHLCV_FIELDS}
+        bars = {}
+        for k, ticker in enumerate(tickers):
+            if np.isnan(cols["close"][k]):
+                continue
+            bars[ticker] = {f: cols[f][k] for f in OHLCV_FIELDS}
+        return bars
+
+    # ------------------------------------------------------------------
+    # Per-ticker bar axis (a ticker's own bars, skipping calendar gaps)
+    # ------------------------------------------------------------------
+
+    def bar_values(self, field: str) -> np.ndarray:
+        """
+        float[n_tickers, max_bars]: each ticker's own bars left-aligned
+        (column k = its k-th bar, as in its DataFrame), NaN-padded.
+        """
+        compact = self._bar_values.get(field)
+        if compact is None:
+            counts = self.bar_count
+            width = int(counts[:, -1].max()) if counts.size else 0
+            compact = np.full((len(self.tickers), width), np.nan)
+            rows, cols = np.nonzero(self.valid)
+            compact[rows, counts[rows, cols] - 1] = getattr(self, field)[rows, cols]
+            self._bar_values[field] = compact
+        return compact
+
+    def bar_window(self, values: np.ndarray, col: int, window: int) -> np.ndarray:
+        """
+        float[n_tickers, window]: the last `window` bars at or before calendar
+        column col from per-bar values (bar_values layout); NaN-padded
+        where a ticker has fewer bars.
+        """
+        n_bars = self.bar_count[:, col] if col >= 0 else np.zeros(len(self.tickers), dtype=np.int32)
+        idx = n_bars[:, None] - window + np.arange(window)[None, :]
+        vals = np.take_along_axis(values, np.clip(idx, 0, max(values.shape[1] - 1, 0)), axis=1) \
+            if values.shape[1] else np.full(idx.shape, np.nan)
+        return np.where(idx >= 0, vals, np.nan)
+
+    def on_calendar(self, values: np.ndarray) -> np.ndarray:
+        """
+        float[n_tickers, n_dates]: per-bar values (bar_values layout) mapped
+        to the calendar, each column taking the latest bar at or before it.
+        """
+        k = self.bar_count.astype(np.int64) - 1
+        if not values.shape[1]:
+            return np.full(k.shape, np.nan)
+        vals = np.take_along_axis(values, np.maximum(k, 0), axis=1)
+        return np.where(k >= 0, vals, np.nan)
+
+    # ------------------------------------------------------------------
+    # Per-ticker views
+    # ------------------------------------------------------------------
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        """Full-history OHLCV frame for one ticker (rebuilt from the arrays if needed)."""
+        df = self._frames.get(ticker)
+        if df is None:
+            i = self.ticker_index.get(ticker)
+            if i is None:
+                return pd.DataFrame()
+            m = self.valid[i]
+            df = pd.DataFrame({f: getattr(self, f)[i, m] for f in OHLCV_FIELDS},
+                              index=self.dates[m])
+            self._frames[ticker] = df
+        return df
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        return {t: self.frame(t) for t in self.tickers}
+
+
+def trailing_mean(a: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the last `window` columns at every column (e.g. the last N
+    bars of bar_values); NaN until a row has `window` columns or where the
+    window holds a NaN, like np.mean over the slice. Running sums, so the
+    cost does not depend on `window`.
+    """
+    bad = np.isnan(a)
+    zero = np.zeros((a.shape[0], 1))
+    total = np.concatenate([zero, np.cumsum(np.where(bad, 0.0, a), axis=1)], axis=1)
+    n_bad = np.concatenate([zero, np.cumsum(bad, axis=1)], axis=1)
+    hi = np.arange(1, a.shape[1] + 1)
+    lo = hi - window
+    ok = lo >= 0
+    lo = np.maximum(lo, 0)
+    clean = ok[None, :] & (n_bad[:, hi] == n_bad[:, lo])
+    return np.where(clean, (total[:, hi] - total[:, lo]) / window, np.nan)
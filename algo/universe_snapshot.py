@@ -0,0 +1,170 @@
+"""
+UNIVERSE SNAPSHOT — Memory-mapped OHLCV panel for instant backtest startup
+==========================================================================
+A build step writes the aligned universe (plus the benchmark and sector
+ETFs) for one date range to disk once:
+
+  <path>.bin   float64[5, n_rows, n_dates]   open/high/low/close/volume,
+                                              NaN = no bar (raw, C order)
+  <path>.json  index: dates, row tickers, group row ranges, build metadata
+
+Rows are grouped universe | benchmark | sector ETFs, so each group's
+arrays are plain views into one np.memmap. Opening a snapshot only reads
+the JSON index; pages are loaded on first touch and shared through the
+OS page cache by every process that maps the same file (sweep workers,
+parallel backtests).
+
+The calendar is the benchmark's (the BacktestEngine calendar); bars on
+dates outside it are dropped, exactly as UniversePanel.from_frames does.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from algo.universe_panel import OHLCV_FIELDS, UniversePanel
+
+
+SNAPSHOT_VERSION = 1
+
+GROUPS = ("universe", "benchmark", "sector_etfs")
+
+
+def snapshot_paths(path: str):
+    """(<path>.bin, <path>.json) for a snapshot path given with or without extension."""
+    base, ext = os.path.splitext(path)
+    if ext not in (".bin", ".json"):
+        base = path
+    return base + ".bin", base + ".json"
+
+
+def write_snapshot(
+    path: str,
+    universe_data: Dict[str, pd.DataFrame],
+    spy_data: pd.DataFrame,
+    sector_etf_data: Optional[Dict[str, pd.DataFrame]] = None,
+    benchmark: str = "SPY",
+    meta: Optional[dict] = None,
+) -> str:
+    """
+    Align everything on the benchmark calendar and write the snapshot.
+    meta: build parameters (date range, universe mode, ...) stored in the
+    index so callers can check the snapshot is still the one they want.
+    Returns the .bin path.
+    """
+    bin_path, json_path = snapshot_paths(path)
+    os.makedirs(os.path.dirname(os.path.abspath(bin_path)), exist_ok=True)
+
+    calendar = pd.DatetimeIndex(spy_data.index)
+    groups = {
+        "universe": {t: df for t, df in universe_data.items() if not df.empty},
+        "benchmark": {benchmark: spy_data},
+        "sector_etfs": {t: df for t, df in (sector_etf_data or {}).items() if not df.empty},
+    }
+    rows: List[str] = []
+    ranges = {}
+    for name in GROUPS:
+        ranges[name] = [len(rows), len(rows) + len(groups[name])]
+        rows.extend(groups[name])
+
+    tmp = bin_path + ".tmp"
+    data = np.memmap(tmp, dtype=np.float64, mode="w+",
+                     shape=(len(OHLCV_FIELDS), len(rows), len(calendar)))
+    data[:] = np.nan
+    r = 0
+    for name in GROUPS:
+        for df in groups[name].values():
+            cols = calendar.get_indexer(df.index)
+            hit = cols >= 0
+            for k, f in enumerate(OHLCV_FIELDS):
+                data[k, r, cols[hit]] = df[f].values[hit]
+            r += 1
+    data.flush()
+    del data
+    os.replace(tmp, bin_path)
+
+    index = {
+        "version": SNAPSHOT_VERSION,
+        "fields": list(OHLCV_FIELDS),
+        "shape": [len(OHLCV_FIELDS), len(rows), len(calendar)],
+        "dates": [str(d.date()) for d in calendar],
+        "tickers": rows,
+        "groups": ranges,
+        "meta": meta or {},
+    }
+    tmp = json_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, json_path)
+    return bin_path
+
+
+def read_snapshot_meta(path: str) -> Optional[dict]:
+    """Build metadata of an existing snapshot (None if missing or unreadable)."""
+    bin_path, json_path = snapshot_paths(path)
+    if not os.path.exists(bin_path):
+        return None
+    try:
+        with open(json_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != SNAPSHOT_VERSION:
+        return None
+    return index.get("meta", {})
+
+
+class UniverseSnapshot:
+    """Read-only view of a snapshot file; arrays are memmap views."""
+
+    def __init__(self, path: str):
+        bin_path, json_path = snapshot_paths(path)
+        with open(json_path) as f:
+            index = json.load(f)
+        if index.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {index.get('version')} in {json_path}")
+        self.path = bin_path
+        self.meta: dict = index.get("meta", {})
+        self.dates = pd.DatetimeIndex(pd.to_datetime(index["dates"]))
+        self.tickers: List[str] = index["tickers"]
+        self.groups: Dict[str, List[int]] = index["groups"]
+        self.data = np.memmap(bin_path, dtype=np.float64, mode="r",
+                              shape=tuple(index["shape"]))
+        self._panels: Dict[str, UniversePanel] = {}
+
+    def group_tickers(self, group: str) -> List[str]:
+        lo, hi = self.groups[group]
+        return self.tickers[lo:hi]
+
+    def panel(self, group: str = "universe") -> UniversePanel:
+        """UniversePanel over the group's rows (no copy of the OHLCV arrays)."""
+        panel = self._panels.get(group)
+        if panel is None:
+            lo, hi = self.groups[group]
+            arrays = {f: self.data[k, lo:hi] for k, f in enumerate(OHLCV_FIELDS)}
+            panel = UniversePanel(self.tickers[lo:hi], self.dates, arrays)
+            self._panels[group] = panel
+        return panel
+
+    def frames(self, group: str = "universe") -> Dict[str, pd.DataFrame]:
+        """Per-ticker OHLCV frames for a group (built once, cached on the panel)."""
+        return self.panel(group).to_frames()
+
+    @property
+    def universe_data(self) -> Dict[str, pd.DataFrame]:
+        return self.frames("universe")
+
+    @property
+    def spy_data(self) -> pd.DataFrame:
+        return next(iter(self.frames("benchmark").values()))
+
+    @property
+    def sector_etf_data(self) -> Dict[str, pd.DataFrame]:
+        return self.frames("sector_etfs")
+
+
+def load_snapshot(path: str) -> UniverseSnapshot:
+    return UniverseSnapshot(path)
@@ -0,0 +1,170 @@
+"""
+WALK-FORWARD — Rolling train/test optimization on top of BacktestEngine
+=======================================================================
+Splits the backtest span into folds on the SPY calendar:
+
+  |---- train ----|-- test --|
+         |---- train ----|-- test --|
+                |---- train ----|-- test --|
+
+For each fold the parameter sets are swept on the train window
+(algo.sweep, fresh capital per run), the best set by `rank_by` is then
+traded out-of-sample on the test window, and the test equity curves are
+stitched into one continuous curve.
+
+Everything heavy is built once for the whole span and reused by every
+fold: UniversePanel, indicator panels, macro and earnings data. Test
+windows are warm-started: the PositionManager (cash, open positions,
+trade history) carries from one test window into the next, and positions
+are only liquidated at the end of the last fold.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from algo.config import INITIAL_CAPITAL, BACKTEST_START, BACKTEST_END
+from algo.backtest_engine import BacktestEngine, equity_performance
+from algo.position_manager import PositionManager
+from algo.sweep import run_sweep, load_shared_inputs, override_params, PANEL_PARAMS
+
+
+@dataclass
+class Fold:
+    """One train/test split (inclusive dates)."""
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+def make_folds(
+    calendar: pd.DatetimeIndex,
+    train_days: int = 504,
+    test_days: int = 126,
+    step_days: Optional[int] = None,
+    anchored: bool = False,
+) -> List[Fold]:
+    """
+    Rolling (or anchored, i.e. expanding-train) folds over a trading calendar.
+    Test windows are back to back when step_days == test_days (the default);
+    the last test window may be shorter.
+    """
+    step_days = step_days or test_days
+    folds = []
+    start = 0
+    while start + train_days < len(calendar):
+        train_lo = 0 if anchored else start
+        train_hi = start + train_days - 1
+        test_hi = min(train_hi + test_days, len(calendar) - 1)
+        folds.append(Fold(
+            train_start=calendar[train_lo],
+            train_end=calendar[train_hi],
+            test_start=calendar[train_hi + 1],
+            test_end=calendar[test_hi],
+        ))
+        start += step_days
+    return folds
+
+
+def run_walk_forward(
+    universe_data: Dict[str, pd.DataFrame],
+    spy_data: pd.DataFrame,
+    param_sets: Iterable[Dict[str, Any]],
+    start_date: str = BACKTEST_START,
+    end_date: str = BACKTEST_END,
+    train_days: int = 504,
+    test_days: int = 126,
+    step_days: Optional[int] = None,
+    anchored: bool = False,
+    initial_capital: float = INITIAL_CAPITAL,
+    scan_frequency: int = 1,
+    sector_etf_data: Optional[Dict[str, pd.DataFrame]] = None,
+    workers: int = 1,
+    rank_by: str = "calmar_ratio",
+    verbose: bool = True,
+) -> dict:
+    """
+    Walk-forward optimization. Returns:
+      folds        per fold: dates, chosen params, in-sample metric, test performance
+      performance  stats of the stitched out-of-sample equity curve
+      equity_curve {date: equity} out-of-sample
+      trade_log    all out-of-sample trades
+    """
+    param_sets = [dict(p) for p in param_sets] or [{}]
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    calendar = spy_data.index[(spy_data.index >= start) & (spy_data.index <= end)]
+    if step_days is not None and step_days < test_days:
+        raise ValueError("step_days < test_days would overlap test windows")
+    folds = make_folds(calendar, train_days, test_days, step_days, anchored)
+    if not folds:
+        return {"error": f"Not enough history for one fold ({len(calendar)} days, "
+                         f"train_days={train_days})"}
+
+    if verbose:
+        print(f"Walk-forward: {len(folds)} folds x {len(param_sets)} parameter sets")
+    preloaded = load_shared_inputs(universe_data, spy_data, start_date, end_date,
+                                   sector_etf_data, param_sets, verbose)
+
+    pm = PositionManager(initial_capital)
+    fold_reports, curves = [], []
+    for k, fold in enumerate(folds):
+        table = run_sweep(
+            universe_data, spy_data, param_sets,
+            start_date=str(fold.train_start.date()), end_date=str(fold.train_end.date()),
+            initial_capital=initial_capital, scan_frequency=scan_frequency,
+            sector_etf_data=sector_etf_data, workers=workers, rank_by=rank_by,
+            verbose=False, preloaded=preloaded,
+        )
+        ok = table[table["error"] == ""] if "error" in table.columns else table.iloc[0:0]
+        if ok.empty:
+            best, best_score = {}, float("nan")
+        else:
+            top = ok.iloc[0]
+            best = param_sets[int(top["run"])]
+            best_score = float(top[rank_by])
+
+        # Panel-building params (e.g. trend MAs) need panels built under them,
+        # as in the training sweep
+        test_inputs = dict(preloaded)
+        if PANEL_PARAMS & set(best):
+            test_inputs["indicator_panels"] = None
+        with override_params(best):
+            engine = BacktestEngine(
+                universe_data, spy_data,
+                scan_frequency=scan_frequency,
+                start_date=str(fold.test_start.date()), end_date=str(fold.test_end.date()),
+                verbose=False, sector_etf_data=sector_etf_data,
+                position_manager=pm, close_at_end=(k == len(folds) - 1),
+                **test_inputs,
+            )
+            results = engine.run()
+
+        curve = pd.Series({d["date"]: d["equity"] for d in engine.daily_log}, dtype=float)
+        curves.append(curve)
+        fold_reports.append({
+            "fold": k + 1,
+            "train_start": str(fold.train_start.date()),
+            "train_end": str(fold.train_end.date()),
+            "test_start": str(fold.test_start.date()),
+            "test_end": str(fold.test_end.date()),
+            "params": best,
+            f"train_{rank_by}": best_score,
+            "test": results.get("performance", {}),
+            "open_positions": pm.num_positions,
+        })
+        if verbose and "performance" in results:
+            p = results["performance"]
+            print(f"  Fold {k + 1}/{len(folds)} test {fold.test_start.date()}..{fold.test_end.date()}: "
+                  f"return {p['total_return_pct']:.1f}% | MaxDD {p['max_drawdown_pct']:.1f}% | "
+                  f"params {best}")
+
+    equity = pd.concat(curves)
+    return {
+        "folds": fold_reports,
+        "performance": equity_performance(equity),
+        "equity_curve": {str(d): v for d, v in equity.items()},
+        "trade_log": pm.trade_history.to_records(),
+    }
+